@@ -1,7 +1,38 @@
 # Audio handling modules for Lexy
+# Submodules are imported on first attribute access so that light code paths
+# (help, device listing) don't pay for numpy, pyaudio or speech_recognition
 
-from .utils import suppress_alsa_messages, restore_stderr
-from .microphone import MicrophoneManager
-from .processing import AudioProcessor
+import importlib
 
-__all__ = ['suppress_alsa_messages', 'restore_stderr', 'MicrophoneManager', 'AudioProcessor']
\ No newline at end of file
+_EXPORTS = {
+    'suppress_alsa_messages': '.utils',
+    'restore_stderr': '.utils',
+    'AudioBackend': '.backend',
+    'get_audio_backend': '.backend',
+    'device_capabilities': '.capabilities',
+    'preferred_sample_rate': '.capabilities',
+    'MicrophoneManager': '.microphone',
+    'SharedMicrophone': '.microphone',
+    'AudioProcessor': '.processing',
+    'RingBuffer': '.stream',
+    'CaptureStream': '.stream',
+    'StreamingResampler': '.resample',
+    'VADConfig': '.vad',
+    'VADResult': '.vad',
+    'VoiceActivityDetector': '.vad',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    # Resolve exported names lazily (PEP 562)
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
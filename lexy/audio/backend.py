@@ -0,0 +1,178 @@
+# Process-wide PortAudio backend shared by every capture path
+
+import atexit
+import threading
+from typing import Callable, Optional, Tuple
+
+import pyaudio
+
+from .utils import suppress_alsa_messages, restore_stderr
+
+
+StreamKey = Tuple[Optional[int], int, int, int]
+
+
+class BackendStream:
+    # Blocking input stream handed out by the backend; close() returns it to the pool
+
+    def __init__(self, backend: "AudioBackend", key: StreamKey, pyaudio_stream):
+        self.backend = backend
+        self.key = key
+        self.pyaudio_stream = pyaudio_stream
+        self.on_read: Optional[Callable[[], None]] = None   # Called after every read
+
+    def read(self, size: int) -> bytes:
+        # Read frames without raising on input overflow (matches sr.Microphone)
+        data = self.pyaudio_stream.read(size, exception_on_overflow=False)
+        if self.on_read is not None:
+            self.on_read()
+        return data
+
+    def close(self) -> None:
+        # Hand the stream back for reuse instead of tearing it down
+        self.backend.release_stream(self)
+
+
+class AudioBackend:
+    # Owns the single PyAudio handle and a pool of reusable input streams
+
+    def __init__(self, debug: bool = False):
+        self.debug = debug
+        self._audio = None
+        self._lock = threading.RLock()
+        self._idle_streams: dict[StreamKey, list[BackendStream]] = {}
+
+    @property
+    def audio(self) -> pyaudio.PyAudio:
+        # Initialize PortAudio on first use only
+        with self._lock:
+            if self._audio is None:
+                old_stderr = None
+                if not self.debug:
+                    old_stderr = suppress_alsa_messages()
+                try:
+                    self._audio = pyaudio.PyAudio()
+                finally:
+                    if not self.debug and old_stderr is not None:
+                        restore_stderr(old_stderr)
+            return self._audio
+
+    def device_count(self) -> int:
+        # Number of PortAudio devices (inputs and outputs)
+        return self.audio.get_device_count()
+
+    def device_names(self) -> list[str]:
+        # Device names indexed like sr.Microphone.list_microphone_names()
+        audio = self.audio
+        return [audio.get_device_info_by_index(i).get("name") for i in range(audio.get_device_count())]
+
+    def device_info(self, device_index: Optional[int] = None) -> dict:
+        # Device info for an index, or for the default input device
+        if device_index is None:
+            return self.audio.get_default_input_device_info()
+        return self.audio.get_device_info_by_index(device_index)
+
+    def acquire_stream(self, sample_rate: int, channels: int = 1, frames_per_buffer: int = 1024,
+                       device_index: Optional[int] = None) -> BackendStream:
+        # Reuse an idle stream with the same parameters, or open a new one
+        key = (device_index, sample_rate, channels, frames_per_buffer)
+        with self._lock:
+            idle = self._idle_streams.get(key)
+            if idle:
+                # Restart a pooled stream: input captured before it went idle was
+                # discarded when it stopped, so the caller only reads fresh audio
+                stream = idle.pop()
+                try:
+                    stream.pyaudio_stream.start_stream()
+                except Exception:
+                    self._close_pyaudio_stream(stream.pyaudio_stream)
+                else:
+                    return stream
+
+            old_stderr = None
+            if not self.debug:
+                old_stderr = suppress_alsa_messages()
+            try:
+                pyaudio_stream = self.audio.open(
+                    format=pyaudio.paInt16, channels=channels, rate=sample_rate, input=True,
+                    input_device_index=device_index, frames_per_buffer=frames_per_buffer
+                )
+            finally:
+                if not self.debug and old_stderr is not None:
+                    restore_stderr(old_stderr)
+            return BackendStream(self, key, pyaudio_stream)
+
+    def release_stream(self, stream: BackendStream) -> None:
+        # Stop the stream and keep it open for reuse; a stream left running unread would
+        # overflow PortAudio's input buffer and hand stale audio to the next user
+        with self._lock:
+            stream.on_read = None
+            try:
+                stream.pyaudio_stream.stop_stream()
+            except Exception:
+                self._close_pyaudio_stream(stream.pyaudio_stream)
+                return
+            self._idle_streams.setdefault(stream.key, []).append(stream)
+
+    def discard_stream(self, stream: BackendStream) -> None:
+        # Close a stream that errored instead of returning it to the pool
+        with self._lock:
+            idle = self._idle_streams.get(stream.key, [])
+            if stream in idle:
+                idle.remove(stream)
+            self._close_pyaudio_stream(stream.pyaudio_stream)
+
+    def close_idle_streams(self, device_index: Optional[int] = None) -> None:
+        # Close a device's pooled streams so the next acquire opens it afresh
+        with self._lock:
+            for key in [key for key in self._idle_streams if key[0] == device_index]:
+                for stream in self._idle_streams.pop(key):
+                    self._close_pyaudio_stream(stream.pyaudio_stream)
+
+    def open_callback_stream(self, sample_rate: int, channels: int, frames_per_buffer: int,
+                             callback, device_index: Optional[int] = None):
+        # Open a dedicated callback-driven stream on the shared handle
+        with self._lock:
+            return self.audio.open(
+                format=pyaudio.paInt16, channels=channels, rate=sample_rate, input=True,
+                input_device_index=device_index, frames_per_buffer=frames_per_buffer,
+                stream_callback=callback
+            )
+
+    def close_callback_stream(self, pyaudio_stream) -> None:
+        # Stop and close a stream opened with open_callback_stream
+        with self._lock:
+            self._close_pyaudio_stream(pyaudio_stream)
+
+    def _close_pyaudio_stream(self, pyaudio_stream) -> None:
+        try:
+            if pyaudio_stream.is_active():
+                pyaudio_stream.stop_stream()
+            pyaudio_stream.close()
+        except Exception:
+            pass
+
+    def terminate(self) -> None:
+        # Close pooled streams and shut PortAudio down
+        with self._lock:
+            for streams in self._idle_streams.values():
+                for stream in streams:
+                    self._close_pyaudio_stream(stream.pyaudio_stream)
+            self._idle_streams.clear()
+            if self._audio is not None:
+                self._audio.terminate()
+                self._audio = None
+
+
+_backend: Optional[AudioBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_audio_backend(debug: bool = False) -> AudioBackend:
+    # Return the process-wide audio backend, creating it on first call
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = AudioBackend(debug)
+            atexit.register(_backend.terminate)
+        return _backend
@@ -0,0 +1,73 @@
+# Reusable capture frames so the steady-state capture loop allocates nothing per chunk
+
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from ..metrics import metrics
+
+
+class Frame:
+    # One pooled buffer of 16-bit PCM
+    # `view` (a memoryview) and `samples` (an int16 array) both alias `buffer` and are
+    # made once, so handing a frame between stages copies no audio; release() returns it
+    # to its pool, after which none of the three may be used
+
+    __slots__ = ("buffer", "view", "samples", "sample_rate", "_pool")
+
+    def __init__(self, size: int, sample_rate: int, pool: Optional["FramePool"] = None):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.samples = np.frombuffer(self.buffer, dtype=np.int16)
+        self.sample_rate = sample_rate
+        self._pool = pool
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def release(self) -> None:
+        if self._pool is not None:
+            self._pool.release(self)
+
+
+class FramePool:
+    # Free list of equally sized frames
+    # It starts with `prealloc` frames and grows only when more are in flight at once
+    # (e.g. while a pipeline queue fills); after that, acquire/release reuse buffers
+
+    def __init__(self, frame_bytes: int, sample_rate: int, prealloc: int = 4):
+        self.frame_bytes = frame_bytes
+        self.sample_rate = sample_rate
+        self.allocated = 0
+        self._free: deque[Frame] = deque()
+        for _ in range(prealloc):
+            self._free.append(self._allocate())
+
+    def _allocate(self) -> Frame:
+        self.allocated += 1
+        metrics.counter("lexy_frame_pool_allocations_total", "Capture frame buffers allocated").inc()
+        return Frame(self.frame_bytes, self.sample_rate, self)
+
+    def acquire(self) -> Frame:
+        try:
+            return self._free.pop()
+        except IndexError:
+            return self._allocate()
+
+    def release(self, frame: Frame) -> None:
+        self._free.append(frame)
+
+
+class Scratch:
+    # Grow-only work area for level and VAD math; callers get a view of the first n
+    # elements, valid until the next call
+
+    def __init__(self, dtype=np.float32):
+        self.dtype = dtype
+        self._buffer = np.empty(0, dtype=dtype)
+
+    def get(self, n: int) -> np.ndarray:
+        if len(self._buffer) < n:
+            self._buffer = np.empty(n, dtype=self.dtype)
+        return self._buffer[:n]
@@ -0,0 +1,123 @@
+# Per-host table of what each input device supports, probed once and cached on disk
+
+import json
+import os
+import threading
+from typing import Optional
+
+import pyaudio
+
+from .backend import get_audio_backend
+from .utils import suppress_alsa_messages, restore_stderr
+
+
+# Vosk's rate first: a device that captures it natively needs no resampling
+PROBE_RATES = (16000, 8000, 22050, 32000, 44100, 48000)
+TARGET_RATE = 16000
+CACHE_VERSION = 1
+
+_lock = threading.Lock()
+_table: Optional[dict] = None
+
+
+def cache_path() -> str:
+    # $LEXY_DEVICE_CACHE, else the XDG cache directory
+    if os.environ.get("LEXY_DEVICE_CACHE"):
+        return os.environ["LEXY_DEVICE_CACHE"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "lexy", "devices.json")
+
+
+def probe_device(audio: pyaudio.PyAudio, device_index: int) -> dict:
+    # Ask PortAudio which 16-bit rate/channel combinations the device accepts
+    info = audio.get_device_info_by_index(device_index)
+    max_channels = int(info.get("maxInputChannels", 0))
+    supported = []
+    for channels in range(1, min(max_channels, 2) + 1):
+        for rate in PROBE_RATES:
+            try:
+                if audio.is_format_supported(rate, input_device=device_index, input_channels=channels,
+                                             input_format=pyaudio.paInt16):
+                    supported.append([rate, channels])
+            except ValueError:
+                pass
+    return {
+        "max_input_channels": max_channels,
+        "default_sample_rate": int(info.get("defaultSampleRate", 0)),
+        "low_input_latency": info.get("defaultLowInputLatency"),
+        "high_input_latency": info.get("defaultHighInputLatency"),
+        "supported": supported,
+    }
+
+
+def _load_table() -> dict:
+    global _table
+    if _table is None:
+        try:
+            with open(cache_path(), encoding="utf-8") as f:
+                table = json.load(f)
+            _table = table if table.get("version") == CACHE_VERSION else {}
+        except (OSError, ValueError):
+            _table = {}
+        _table.setdefault("version", CACHE_VERSION)
+        _table.setdefault("devices", {})
+    return _table
+
+
+def _save_table(table: dict) -> None:
+    # Atomic write; a read-only home just means probing again next start
+    path = cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(table, f, indent=2, sort_keys=True)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+
+
+def device_capabilities(device_index: Optional[int] = None, refresh: bool = False,
+                        debug: bool = False) -> dict:
+    # Capabilities of a device (default input if None), probing only on a cache miss
+    backend = get_audio_backend(debug)
+    info = backend.device_info(device_index)
+    index, name = int(info["index"]), info.get("name", "")
+    with _lock:
+        table = _load_table()
+        entry = table["devices"].get(name)
+        if entry is None or refresh:
+            old_stderr = None
+            if not debug:
+                old_stderr = suppress_alsa_messages()
+            try:
+                entry = table["devices"][name] = probe_device(backend.audio, index)
+            finally:
+                if not debug and old_stderr is not None:
+                    restore_stderr(old_stderr)
+            _save_table(table)
+            if debug:
+                print(f"Probed '{name}': {len(entry['supported'])} supported rate/channel formats")
+        return entry
+
+
+def preferred_sample_rate(device_index: Optional[int] = None, channels: int = 1,
+                          debug: bool = False) -> int:
+    # 16kHz when the device can capture it directly, otherwise its default rate
+    try:
+        entry = device_capabilities(device_index, debug=debug)
+    except OSError:
+        return int(get_audio_backend(debug).device_info(device_index)["defaultSampleRate"])
+    if [TARGET_RATE, channels] in entry["supported"]:
+        return TARGET_RATE
+    return entry["default_sample_rate"]
+
+
+def probe_all_devices(debug: bool = False) -> dict[str, dict]:
+    # Re-probe every input device and rewrite the cache (lexy --probe-devices)
+    backend = get_audio_backend(debug)
+    results = {}
+    for index, name in enumerate(backend.device_names()):
+        if int(backend.device_info(index).get("maxInputChannels", 0)) > 0:
+            results[name] = device_capabilities(index, refresh=True, debug=debug)
+    return results
@@ -0,0 +1,152 @@
+# Chunked readers for WAV and raw PCM recordings on disk
+
+import hashlib
+import mmap
+import os
+import struct
+from typing import BinaryIO, Iterator, Optional
+
+import numpy as np
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+AUDIO_EXTENSIONS = (".wav", ".raw", ".pcm")
+
+
+def expand_audio_paths(paths: list[str]) -> list[str]:
+    # Expand directories into the recordings they contain, in a stable order
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        expanded.append(os.path.join(root, name))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+class AudioFileReader:
+    # Memory-maps a 16-bit PCM recording and yields it in fixed-size chunks
+    # Only the pages being decoded are resident, so hours-long files never load fully
+
+    def __init__(self, path: str, raw_sample_rate: int = 16000, raw_channels: int = 1):
+        self.path = path
+        self.sample_rate = raw_sample_rate
+        self.channels = raw_channels
+        self.sample_width = 2
+        self.data_offset = 0
+        self.data_size = 0
+        self._file: Optional[BinaryIO] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._open()
+
+    def _open(self) -> None:
+        # Map the file and locate the PCM payload
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self.data_offset, self.data_size = 0, 0
+            return
+        self._mmap = buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if buf[:4] == b"RIFF" and buf[8:12] == b"WAVE":
+            self._parse_wav_header(buf)
+        else:
+            # Headerless PCM uses the caller-supplied format
+            self.data_offset = 0
+            self.data_size = size
+        frame_size = self.sample_width * self.channels
+        self.data_size -= self.data_size % frame_size
+
+    def _parse_wav_header(self, buf: mmap.mmap) -> None:
+        # Walk the RIFF chunks to find 'fmt ' and 'data'
+        pos = 12
+        found_fmt = False
+        while pos + 8 <= len(buf):
+            chunk_id = buf[pos:pos + 4]
+            chunk_size = struct.unpack_from("<I", buf, pos + 4)[0]
+            body = pos + 8
+            if chunk_id == b"fmt ":
+                format_tag, channels, sample_rate = struct.unpack_from("<HHI", buf, body)
+                bits = struct.unpack_from("<H", buf, body + 14)[0]
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                    format_tag = struct.unpack_from("<H", buf, body + 24)[0]
+                if format_tag != WAVE_FORMAT_PCM or bits != 16:
+                    raise ValueError(f"{self.path}: only 16-bit PCM WAV files are supported")
+                self.channels = channels
+                self.sample_rate = sample_rate
+                found_fmt = True
+            elif chunk_id == b"data":
+                if not found_fmt:
+                    raise ValueError(f"{self.path}: WAV data chunk appears before fmt chunk")
+                self.data_offset = body
+                # Streaming writers leave the size at 0 or 0xFFFFFFFF; use the rest of the file
+                available = len(buf) - body
+                self.data_size = chunk_size if 0 < chunk_size <= available else available
+                return
+            pos = body + chunk_size + (chunk_size & 1)
+        raise ValueError(f"{self.path}: WAV file has no data chunk")
+
+    @property
+    def frame_count(self) -> int:
+        return self.data_size // (self.sample_width * self.channels)
+
+    @property
+    def duration(self) -> float:
+        # Length of the recording in seconds
+        return self.frame_count / self.sample_rate if self.sample_rate else 0.0
+
+    def chunks(self, chunk_seconds: float = 2.0, start_frame: int = 0,
+               end_frame: Optional[int] = None) -> Iterator[bytes]:
+        # Yield mono 16-bit PCM chunks covering [start_frame, end_frame)
+        if self._mmap is None:
+            return
+        frame_size = self.sample_width * self.channels
+        end_frame = self.frame_count if end_frame is None else min(end_frame, self.frame_count)
+        step = max(1, int(self.sample_rate * chunk_seconds))
+        for frame in range(start_frame, end_frame, step):
+            begin = self.data_offset + frame * frame_size
+            end = self.data_offset + min(frame + step, end_frame) * frame_size
+            data = self._mmap[begin:end]
+            yield data if self.channels == 1 else self._downmix(data)
+
+    def digest(self, start_frame: int = 0, end_frame: Optional[int] = None) -> str:
+        # SHA-256 of the PCM in [start_frame, end_frame) and its format, so identical
+        # audio matches whatever its file name, container or header metadata
+        frame_size = self.sample_width * self.channels
+        end_frame = self.frame_count if end_frame is None else min(end_frame, self.frame_count)
+        digest = hashlib.sha256(f"{self.sample_rate}:{self.channels}:".encode())
+        if self._mmap is not None and end_frame > start_frame:
+            # Hashed straight from the mapping, a block at a time, without copying
+            view = memoryview(self._mmap)
+            begin = self.data_offset + start_frame * frame_size
+            end = self.data_offset + end_frame * frame_size
+            try:
+                for block in range(begin, end, 1 << 24):
+                    digest.update(view[block:min(block + (1 << 24), end)])
+            finally:
+                view.release()
+        return digest.hexdigest()
+
+    def _downmix(self, data: bytes) -> bytes:
+        # Average interleaved channels into mono
+        samples = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+        return samples.mean(axis=1, dtype=np.float32).astype(np.int16).tobytes()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "AudioFileReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -1,17 +1,62 @@
 # Microphone management and initialization
 
+import pyaudio
 import speech_recognition as sr
 from typing import Optional, Tuple
+from .backend import BackendStream, get_audio_backend
+from .capabilities import preferred_sample_rate
 from .utils import suppress_alsa_messages, restore_stderr
 
 
+class SharedMicrophone(sr.Microphone):
+    # sr.Microphone that borrows PortAudio and its input stream from the shared backend
+    # instead of initializing PortAudio on construction and on every `with` block
+    
+    def __init__(self, device_index: Optional[int] = None, sample_rate: Optional[int] = None,
+                 chunk_size: int = 1024):
+        self.backend = get_audio_backend()
+        if device_index is not None:
+            assert 0 <= device_index < self.backend.device_count(), "Device index out of range"
+        if sample_rate is None:
+            # Capture at 16kHz when the device supports it so nothing needs resampling
+            sample_rate = preferred_sample_rate(device_index)
+        
+        self.pyaudio_module = pyaudio
+        self.device_index = device_index
+        self.format = pyaudio.paInt16
+        self.SAMPLE_WIDTH = pyaudio.get_sample_size(self.format)
+        self.SAMPLE_RATE = sample_rate
+        self.CHUNK = chunk_size
+        self.audio = None
+        self.stream: Optional[BackendStream] = None
+    
+    def __enter__(self) -> "SharedMicrophone":
+        assert self.stream is None, "This audio source is already inside a context manager"
+        self.stream = self.backend.acquire_stream(
+            self.SAMPLE_RATE, 1, self.CHUNK, self.device_index
+        )
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        stream = self.stream
+        assert stream is not None, "__exit__ without __enter__"
+        try:
+            if exc_type is None:
+                self.backend.release_stream(stream)
+            else:
+                # Don't hand a stream that just failed to the next caller
+                self.backend.discard_stream(stream)
+        finally:
+            self.stream = None
+
+
 class MicrophoneManager:
     # Manages microphone initialization and configuration
     
     def __init__(self, device_index: Optional[int] = None, debug: bool = False):
         self.device_index = device_index
         self.debug = debug
-        self.microphone = None
+        self.microphone: Optional[SharedMicrophone] = None
         self._initialize_microphone()
     
     def _initialize_microphone(self) -> None:
@@ -24,9 +69,9 @@ class MicrophoneManager:
         try:
             # Use specific microphone device if provided, otherwise use default
             if self.device_index is not None:
-                self.microphone = sr.Microphone(device_index=self.device_index)
+                self.microphone = SharedMicrophone(device_index=self.device_index)
                 if self.debug:
-                    mic_names = sr.Microphone.list_microphone_names()
+                    mic_names = get_audio_backend().device_names()
                     if self.device_index < len(mic_names):
                         print(f"Using specified microphone: {mic_names[self.device_index]} (index {self.device_index})")
             else:
@@ -38,16 +83,30 @@ class MicrophoneManager:
             if not self.debug and old_stderr is not None:
                 restore_stderr(old_stderr)
     
-    def _find_working_microphone(self) -> Tuple[sr.Microphone, str]:
+    def reinitialize(self) -> None:
+        # Recover from a failed or stalled device: close its streams and open the
+        # microphone again. Call this from the capture thread, never while another
+        # thread reads the stream - PortAudio is not thread-safe
+        microphone = self.microphone
+        if microphone is not None:
+            if microphone.stream is not None:
+                microphone.backend.discard_stream(microphone.stream)
+            microphone.backend.close_idle_streams(microphone.device_index)
+        self._initialize_microphone()
+        if self.debug:
+            print("Reinitialized microphone")
+    
+    def _find_working_microphone(self) -> Tuple[SharedMicrophone, str]:
         # Find the first working microphone device
-        # Use system default microphone - this is most reliable
+        # Use system default microphone - this is most reliable - at its best rate
+        microphone = SharedMicrophone()
         if self.debug:
-            print("Using system default microphone (most reliable)")
-        return sr.Microphone(), "System default microphone"
+            print(f"Using system default microphone (most reliable) at {microphone.SAMPLE_RATE}Hz")
+        return microphone, "System default microphone"
     
     def list_microphones(self) -> None:
         # List all available microphone devices
-        for index, name in enumerate(sr.Microphone.list_microphone_names()):
+        for index, name in enumerate(get_audio_backend().device_names()):
             print(f"  {index}: {name}")
     
     def test_microphone(self) -> None:
@@ -57,6 +116,7 @@ class MicrophoneManager:
         if not self.debug:
             old_stderr = suppress_alsa_messages()
         
+        assert self.microphone is not None, "set up in __init__"
         try:
             with self.microphone as source:
                 if self.debug:
@@ -73,7 +133,7 @@ class MicrophoneManager:
                 self.list_microphones()
                 # Try to use PulseAudio directly as fallback
                 print("Attempting to use PulseAudio default source...")
-            self.microphone = sr.Microphone()
+            self.microphone = SharedMicrophone()
             try:
                 with self.microphone as source:
                     pass  # Just test access
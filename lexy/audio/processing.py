@@ -1,10 +1,10 @@
 # Audio processing utilities for level calculation and monitoring
 
 import numpy as np
-import pyaudio
 import speech_recognition as sr
-from typing import Optional
-from .utils import suppress_alsa_messages, restore_stderr
+from typing import Optional, Union
+from .buffers import Scratch
+from .resample import StreamingResampler
 
 
 class AudioProcessor:
@@ -12,60 +12,45 @@ class AudioProcessor:
     
     def __init__(self, debug: bool = False):
         self.debug = debug
+        # One stateful resampler per capture rate so chunk edges join seamlessly
+        self._resamplers: dict[tuple[int, int], StreamingResampler] = {}
+        self._scratch = Scratch()
     
     def get_audio_level(self, audio_data: sr.AudioData) -> float:
         # Calculate RMS audio level from audio data
         try:
-            # Convert audio data to numpy array
-            audio_np = np.frombuffer(audio_data.get_raw_data(), dtype=np.int16)
-            # Calculate RMS (Root Mean Square) level
-            rms = np.sqrt(np.mean(audio_np.astype(np.float32) ** 2))
-            # Convert to dB-like scale (0-100)
-            if rms > 0:
-                level = min(100, max(0, 20 * np.log10(rms / 32768.0) + 100))
-            else:
-                level = 0
-            return level
+            return self.pcm_level(audio_data.get_raw_data())
         except Exception:
             return 0
     
+    def pcm_level(self, pcm: Union[bytes, memoryview, np.ndarray]) -> float:
+        # RMS level of 16-bit PCM on a 0-100 dB-like scale
+        # The samples are widened into a reused float32 scratch buffer and squared-summed
+        # by a dot product, so no array is allocated per chunk
+        samples = pcm if isinstance(pcm, np.ndarray) else np.frombuffer(pcm, dtype=np.int16)
+        if not len(samples):
+            return 0
+        work = self._scratch.get(len(samples))
+        np.copyto(work, samples)
+        rms = float(np.sqrt(np.dot(work, work) / len(samples)))
+        # Convert to dB-like scale (0-100)
+        if rms > 0:
+            return min(100, max(0, 20 * np.log10(rms / 32768.0) + 100))
+        return 0
+    
     def capture_ambient_audio(self, source: sr.Microphone, chunk: int, 
                              sample_rate: int) -> Optional[sr.AudioData]:
         # Capture a small chunk of ambient audio for level monitoring
-        # Suppress ALSA messages if not in debug mode
-        old_stderr = None
-        if not self.debug:
-            old_stderr = suppress_alsa_messages()
+        # Reads from the source's already-open stream rather than opening a second one
+        if source.stream is None:
+            return None
         
         try:
-            # Get audio format from the source
-            format_type = pyaudio.paInt16  # 16-bit audio
-            channels = 1
-            
-            # Record a small chunk to show audio levels
-            p = pyaudio.PyAudio()
-            stream = p.open(format=format_type, channels=channels, rate=sample_rate, 
-                          input=True, frames_per_buffer=chunk)
-            
-            try:
-                raw_data = stream.read(chunk, exception_on_overflow=False)
-                stream.stop_stream()
-                stream.close()
-                p.terminate()
-                
-                # Create a fake audio object for level calculation
-                audio = sr.AudioData(raw_data, sample_rate, 2)  # 2 bytes per sample for int16
-                return audio
-            except Exception:
-                if stream:
-                    stream.stop_stream()
-                    stream.close()
-                if p:
-                    p.terminate()
-                return None
-        finally:
-            if not self.debug and old_stderr is not None:
-                restore_stderr(old_stderr)
+            raw_data = source.stream.read(chunk)
+            # Create a fake audio object for level calculation
+            return sr.AudioData(raw_data, sample_rate, source.SAMPLE_WIDTH)
+        except Exception:
+            return None
     
     def display_audio_level(self, audio_level: float, raw_bytes: int = 0) -> None:
         # Display audio level as a visual bar
@@ -76,12 +61,16 @@ class AudioProcessor:
             bar = '█' * filled_length + '░' * (bar_length - filled_length)
             print(f"\\rAudio: [{bar}] {audio_level:.1f} ({raw_bytes} bytes)", end="", flush=True)
     
-    def resample_audio_for_vosk(self, audio_data: bytes, original_rate: int, 
-                               target_rate: int = 16000) -> bytes:
+    def resample_audio_for_vosk(self, audio_data: Union[bytes, memoryview], original_rate: int, 
+                               target_rate: int = 16000) -> Union[bytes, memoryview]:
         # Resample audio data to target rate for Vosk processing
+        # Consecutive calls are treated as one continuous signal; audio already at the
+        # target rate comes back as passed in, so a pooled view must still be copied
         if original_rate == target_rate:
             return audio_data
         
-        # Resample audio data to target rate
-        import audioop
-        return audioop.ratecv(audio_data, 2, 1, original_rate, target_rate, None)[0]
\ No newline at end of file
+        key = (original_rate, target_rate)
+        resampler = self._resamplers.get(key)
+        if resampler is None:
+            resampler = self._resamplers[key] = StreamingResampler(original_rate, target_rate)
+        return resampler.process(audio_data)
@@ -0,0 +1,124 @@
+# Streaming polyphase resampler for feeding arbitrary capture rates to Vosk
+
+from functools import lru_cache
+from math import gcd
+from typing import Union
+
+import numpy as np
+
+
+# Largest number of output samples computed in one vectorized block
+BLOCK_SIZE = 4096
+
+
+@lru_cache(maxsize=8)
+def _design_filter(up: int, down: int, half_width: int, rolloff: float,
+                   beta: float) -> np.ndarray:
+    # Kaiser-windowed sinc low-pass split into polyphase rows
+    # Row p holds taps h[p + j * up] in reverse order, ready to dot with input windows
+    factor = max(up, down)
+    taps = 2 * half_width * factor + 1
+    cutoff = rolloff / factor  # Fraction of the upsampled Nyquist rate
+    n = np.arange(taps) - (taps - 1) / 2
+    prototype = cutoff * np.sinc(cutoff * n) * np.kaiser(taps, beta) * up
+
+    width = -(-taps // up)
+    padded = np.zeros(width * up)
+    padded[:taps] = prototype
+    phases = padded.reshape(width, up).T
+    return np.ascontiguousarray(phases[:, ::-1], dtype=np.float32)
+
+
+class StreamingResampler:
+    # Rational-ratio resampler that carries filter history across chunks
+    # so consecutive chunks resample exactly as one continuous signal would
+
+    def __init__(self, input_rate: int, output_rate: int = 16000, half_width: int = 16,
+                 rolloff: float = 0.94, beta: float = 8.6):
+        divisor = gcd(input_rate, output_rate)
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.up = output_rate // divisor
+        self.down = input_rate // divisor
+        self.filters = _design_filter(self.up, self.down, half_width, rolloff, beta)
+        self.width = self.filters.shape[1]
+        # Offset that centres the symmetric filter, giving zero phase delay
+        self.delay = (half_width * max(self.up, self.down))
+        self.reset()
+
+    def reset(self) -> None:
+        # Start a new signal: clear history and output position
+        self._history = np.zeros(self.width - 1, dtype=np.float32)
+        self._history_start = -(self.width - 1)  # Absolute index of _history[0]
+        self._next_output = 0
+        self._consumed = 0
+
+    def process(self, pcm: Union[bytes, memoryview]) -> bytes:
+        # Resample a chunk of 16-bit mono PCM (bytes or a view of a pooled buffer)
+        # The int16 samples are widened while being joined to the filter history, in
+        # one pass rather than a conversion followed by a concatenation
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if self.up == self.down:
+            self.process_array(samples)
+            return bytes(pcm)
+        return self._to_pcm(self.process_array(samples))
+
+    def flush(self) -> bytes:
+        # Emit the outputs still waiting on look-ahead at the end of a signal
+        pending = -(-self._consumed * self.up // self.down) - self._next_output
+        if pending <= 0:
+            return b""
+        padding = np.zeros(self.width, dtype=np.float32)
+        output = self.process_array(padding)[:pending]
+        self._consumed -= self.width
+        return self._to_pcm(output)
+
+    def process_array(self, samples: np.ndarray) -> np.ndarray:
+        # Resample float32 (or int16) samples, returning every output whose inputs are available
+        if self.up == self.down:
+            self._consumed += len(samples)
+            self._next_output += len(samples)
+            return samples
+
+        buffer = np.concatenate((self._history, samples)).astype(np.float32, copy=False)
+        self._consumed += len(samples)
+        last_input = self._history_start + len(buffer) - 1
+
+        # Output m needs input up to (m * down + delay) // up
+        last_output = ((last_input + 1) * self.up - 1 - self.delay) // self.down
+        count = max(0, last_output - self._next_output + 1)
+        output = np.empty(count, dtype=np.float32)
+        for start in range(0, count, BLOCK_SIZE):
+            outputs = np.arange(start, min(start + BLOCK_SIZE, count)) + self._next_output
+            output[start:start + len(outputs)] = self._compute(buffer, outputs)
+        self._next_output += count
+
+        # Keep only the history the next output's window reaches back into
+        next_base = (self._next_output * self.down + self.delay) // self.up
+        keep_from = next_base - self.width + 1 - self._history_start
+        keep_from = min(max(keep_from, 0), len(buffer))
+        self._history = buffer[keep_from:].copy()
+        self._history_start += keep_from
+        return output
+
+    def _compute(self, buffer: np.ndarray, outputs: np.ndarray) -> np.ndarray:
+        # Dot each output's input window with its polyphase filter row
+        position = outputs * self.down + self.delay
+        base = position // self.up - self._history_start
+        first = base - self.width + 1
+
+        if self.up == 1:
+            # Integer decimation (e.g. 48k -> 16k): one filter row, strided windows
+            windows = np.lib.stride_tricks.sliding_window_view(buffer, self.width)
+            return windows[first[0]:first[-1] + 1:self.down] @ self.filters[0]
+
+        # General rational ratio (e.g. 44.1k -> 16k): gather windows per phase
+        windows = buffer[first[:, None] + np.arange(self.width)]
+        return np.einsum("ij,ij->i", windows, self.filters[position % self.up])
+
+    @staticmethod
+    def _to_pcm(samples: np.ndarray) -> bytes:
+        # Round and clip in place; samples is always a temporary owned by the caller
+        np.rint(samples, out=samples)
+        np.clip(samples, -32768, 32767, out=samples)
+        return samples.astype(np.int16).tobytes()
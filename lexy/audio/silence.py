@@ -0,0 +1,77 @@
+# Silence scan for cutting long recordings into independently decodable spans
+
+from typing import Optional
+
+import numpy as np
+
+from .files import AudioFileReader
+
+
+FRAME_MS = 20
+ENERGY_RATIO = 3.0        # Same margin over the noise floor the VAD uses for speech
+MIN_ENERGY = 60.0         # Absolute RMS (int16 units) below which a frame is always quiet
+
+
+def frame_levels(reader: AudioFileReader, frame_ms: int = FRAME_MS,
+                 block_seconds: float = 60.0) -> np.ndarray:
+    # RMS energy of every frame in the recording, a block of the memory map at a time
+    # An hour at 20 ms frames is 180k floats, so the whole envelope fits comfortably
+    frame = max(1, reader.sample_rate * frame_ms // 1000)
+    levels = []
+    remainder = np.zeros(0, dtype=np.int16)
+    for chunk in reader.chunks(block_seconds):
+        samples = np.concatenate((remainder, np.frombuffer(chunk, dtype=np.int16)))
+        count = len(samples) // frame
+        frames = samples[:count * frame].reshape(count, frame).astype(np.float32)
+        levels.append(np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame))
+        remainder = samples[count * frame:]
+    return np.concatenate(levels) if levels else np.zeros(0, dtype=np.float32)
+
+
+def quiet_runs(levels: np.ndarray, min_frames: int) -> tuple[np.ndarray, np.ndarray]:
+    # Start frame and length of every quiet stretch at least min_frames long
+    floor = float(np.percentile(levels, 10)) if levels.size else 0.0
+    threshold = max(floor * ENERGY_RATIO, MIN_ENERGY)
+    quiet = np.concatenate(([0], (levels < threshold).astype(np.int8), [0]))
+    edges = np.diff(quiet)
+    starts = np.flatnonzero(edges == 1)
+    lengths = np.flatnonzero(edges == -1) - starts
+    keep = lengths >= min_frames
+    return starts[keep], lengths[keep]
+
+
+def split_points(levels: np.ndarray, frame_seconds: float, target_seconds: float,
+                 min_silence_seconds: float = 0.3, search_seconds: Optional[float] = None) -> list[int]:
+    # Frame indices to cut at: roughly every target_seconds, in the middle of the
+    # longest pause near each target; the quietest frame if no pause is long enough
+    target = max(1, int(target_seconds / frame_seconds))
+    search = int((search_seconds if search_seconds is not None else target_seconds / 4) / frame_seconds)
+    starts, lengths = quiet_runs(levels, max(1, int(min_silence_seconds / frame_seconds)))
+    centers = starts + lengths // 2
+
+    cuts = []
+    position = 0
+    # Leave the tail whole unless it is well over a segment long
+    while len(levels) - position > target * 1.5:
+        low, high = position + max(1, target - search), min(position + target + search, len(levels) - 1)
+        candidates = np.flatnonzero((centers >= low) & (centers <= high))
+        if candidates.size:
+            cut = int(centers[candidates[np.argmax(lengths[candidates])]])
+        else:
+            cut = low + int(np.argmin(levels[low:high + 1]))
+        cuts.append(cut)
+        position = cut
+    return cuts
+
+
+def split_spans(reader: AudioFileReader, target_seconds: float, min_silence_seconds: float = 0.3,
+                frame_ms: int = FRAME_MS) -> list[tuple[int, int]]:
+    # [start_frame, end_frame) sample ranges that together cover the recording
+    if reader.duration <= target_seconds * 1.5:
+        return [(0, reader.frame_count)]
+    frame = max(1, reader.sample_rate * frame_ms // 1000)
+    levels = frame_levels(reader, frame_ms)
+    bounds = [0] + [cut * frame for cut in split_points(
+        levels, frame / reader.sample_rate, target_seconds, min_silence_seconds
+    )] + [reader.frame_count]
+    return list(zip(bounds[:-1], bounds[1:]))
@@ -0,0 +1,210 @@
+# Continuous callback-driven audio capture into a preallocated ring buffer
+
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import pyaudio
+
+from ..metrics import metrics
+from .backend import AudioBackend, get_audio_backend
+from .buffers import Frame, FramePool
+from .capabilities import preferred_sample_rate
+from .utils import suppress_alsa_messages, restore_stderr
+
+
+class RingBuffer:
+    # Fixed-size byte ring buffer written by the audio callback and drained by the reader
+
+    def __init__(self, capacity: int, align: int = 2):
+        # Keep capacity a whole number of samples so overruns never split one
+        self.align = align
+        self.capacity = capacity - (capacity % align)
+        self._buffer = bytearray(self.capacity)
+        self._view = memoryview(self._buffer)
+        self._read_pos = 0   # Total bytes consumed (monotonic)
+        self._write_pos = 0  # Total bytes produced (monotonic)
+        self._cond = threading.Condition()
+        self.overrun_bytes = 0
+        self.closed = False
+
+    def available(self) -> int:
+        # Number of buffered bytes not yet read
+        with self._cond:
+            return self._write_pos - self._read_pos
+
+    def write(self, data: bytes) -> None:
+        # Append data, overwriting the oldest unread bytes if the reader fell behind
+        size = len(data)
+        if size == 0:
+            return
+
+        with self._cond:
+            if size > self.capacity:
+                data = data[size - self.capacity:]
+                self.overrun_bytes += size - self.capacity
+                size = self.capacity
+
+            overflow = self._write_pos + size - self._read_pos - self.capacity
+            if overflow > 0:
+                overflow += -overflow % self.align
+                self._read_pos += overflow
+                self.overrun_bytes += overflow
+                metrics.counter("lexy_capture_dropped_bytes_total",
+                                "Captured bytes overwritten before they were read").inc(overflow)
+
+            start = self._write_pos % self.capacity
+            first = min(size, self.capacity - start)
+            self._buffer[start:start + first] = data[:first]
+            if first < size:
+                self._buffer[:size - first] = data[first:]
+            self._write_pos += size
+            self._cond.notify_all()
+
+    def _wait_for(self, size: int, timeout: Optional[float]) -> bool:
+        # With the lock held: wait until size bytes are buffered; False on timeout or close
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._write_pos - self._read_pos < size:
+            if self.closed:
+                return False
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._cond.wait(remaining)
+        return True
+
+    def read(self, size: int, timeout: Optional[float] = None) -> Optional[bytes]:
+        # Block until size bytes are buffered and return them
+        # Returns None on timeout or when the buffer has been closed
+        with self._cond:
+            if not self._wait_for(size, timeout):
+                return None
+            start = self._read_pos % self.capacity
+            first = min(size, self.capacity - start)
+            data = bytes(self._view[start:start + first])
+            if first < size:
+                data += self._view[:size - first]
+            self._read_pos += size
+            return data
+
+    def read_into(self, out: memoryview, timeout: Optional[float] = None) -> bool:
+        # Like read(), but copies straight into a caller-owned buffer (one memcpy, no
+        # new bytes object); returns False on timeout or close
+        size = len(out)
+        with self._cond:
+            if not self._wait_for(size, timeout):
+                return False
+            start = self._read_pos % self.capacity
+            first = min(size, self.capacity - start)
+            out[:first] = self._view[start:start + first]
+            if first < size:
+                out[first:] = self._view[:size - first]
+            self._read_pos += size
+            return True
+
+    def close(self) -> None:
+        # Wake up any blocked reader
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class CaptureStream:
+    # Long-lived PyAudio input stream delivering gap-free fixed-size frames
+
+    def __init__(self, device_index: Optional[int] = None, sample_rate: Optional[int] = None,
+                 frame_ms: int = 100, buffer_seconds: float = 10.0, debug: bool = False,
+                 channels: int = 1):
+        self.device_index = device_index
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.buffer_seconds = buffer_seconds
+        self.debug = debug
+        self.sample_width = 2  # 16-bit audio
+        self.channels = channels  # Frames are interleaved when more than one
+        self.frame_samples = 0
+        self.frame_bytes = 0
+        self.overflows = 0
+        self.ring: Optional[RingBuffer] = None
+        self.pool: Optional[FramePool] = None
+        self._backend: Optional[AudioBackend] = None
+        self._stream: Optional["pyaudio.Stream"] = None
+
+    def start(self) -> None:
+        # Open the device once and start the callback stream
+        old_stderr = None
+        if not self.debug:
+            old_stderr = suppress_alsa_messages()
+
+        try:
+            backend = self._backend = get_audio_backend(self.debug)
+            if self.sample_rate is None:
+                # Native 16kHz when the device has it, so frames skip the resampler
+                self.sample_rate = preferred_sample_rate(self.device_index, self.channels, self.debug)
+
+            self.frame_samples = self.sample_rate * self.frame_ms // 1000
+            self.frame_bytes = self.frame_samples * self.sample_width * self.channels
+            capacity = int(self.sample_rate * self.buffer_seconds) * self.sample_width * self.channels
+            self.ring = RingBuffer(capacity, align=self.sample_width * self.channels)
+            self.pool = FramePool(self.frame_bytes, self.sample_rate)
+
+            self._stream = backend.open_callback_stream(
+                self.sample_rate, self.channels, self.frame_samples, self._callback,
+                self.device_index
+            )
+            self._stream.start_stream()
+        except Exception:
+            self.stop()
+            raise
+        finally:
+            if not self.debug and old_stderr is not None:
+                restore_stderr(old_stderr)
+
+        if self.debug:
+            print(f"Capture stream: {self.sample_rate}Hz x{self.channels}, {self.frame_ms}ms frames, "
+                  f"{self.buffer_seconds:.1f}s ring buffer")
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        # Runs on the PortAudio thread - only copy into the ring buffer
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+            metrics.counter("lexy_capture_overflows_total", "PortAudio input overflows").inc()
+        self.ring.write(in_data)
+        return (None, pyaudio.paContinue)
+
+    def read_frame(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        # Return the next fixed-size frame, or None if none arrived in time
+        assert self.ring is not None, "start() opens the stream"
+        return self.ring.read(self.frame_bytes, timeout)
+
+    def read_pooled(self, timeout: Optional[float] = None) -> Optional[Frame]:
+        # The next frame in a pooled buffer; the caller must release() it when done
+        assert self.pool is not None and self.ring is not None, "start() opens the stream"
+        frame = self.pool.acquire()
+        if self.ring.read_into(frame.view, timeout):
+            return frame
+        frame.release()
+        return None
+
+    def split_channels(self, frame: bytes) -> list[bytes]:
+        # Deinterleave a multi-channel frame into one mono PCM buffer per channel
+        if self.channels == 1:
+            return [frame]
+        samples = np.frombuffer(frame, dtype=np.int16).reshape(-1, self.channels)
+        return [samples[:, channel].tobytes() for channel in range(self.channels)]
+
+    def stop(self) -> None:
+        # Stop the stream; the shared PortAudio handle stays up for reuse
+        if self.ring is not None:
+            self.ring.close()
+        if self._stream is not None and self._backend is not None:
+            self._backend.close_callback_stream(self._stream)
+            self._stream = None
+
+    def __enter__(self) -> "CaptureStream":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
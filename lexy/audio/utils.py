@@ -1,27 +1,51 @@
 # Audio utility functions for suppressing system messages
 
 import os
+import threading
 from typing import Optional
 
 
+# stderr is process-wide, so overlapping suppressions (e.g. a model loading in the
+# background while the microphone is opened) share one redirect; the last restore
+# puts the real stderr back
+_lock = threading.Lock()
+_depth = 0
+_saved_stderr: Optional[int] = None
+
+
 def suppress_alsa_messages() -> Optional[int]:
     # Suppress ALSA library error messages by redirecting stderr
-    try:
-        # Redirect stderr to devnull to suppress ALSA messages
-        devnull = os.open(os.devnull, os.O_WRONLY)
-        old_stderr = os.dup(2)
-        os.dup2(devnull, 2)
-        os.close(devnull)
+    global _depth, _saved_stderr
+    with _lock:
+        if _depth:
+            _depth += 1
+            return _saved_stderr
+        try:
+            # Redirect stderr to devnull to suppress ALSA messages
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            old_stderr = os.dup(2)
+            os.dup2(devnull, 2)
+            os.close(devnull)
+        except OSError:
+            return None
+        _depth, _saved_stderr = 1, old_stderr
         return old_stderr
-    except OSError:
-        return None
 
 
 def restore_stderr(old_stderr: Optional[int]) -> None:
     # Restore stderr if it was previously saved
-    if old_stderr is not None:
+    global _depth, _saved_stderr
+    if old_stderr is None:
+        return
+    with _lock:
+        if _depth == 0:
+            return
+        _depth -= 1
+        if _depth:
+            return
+        _saved_stderr = None
         try:
             os.dup2(old_stderr, 2)
             os.close(old_stderr)
         except OSError:
-            pass
\ No newline at end of file
+            pass
@@ -0,0 +1,227 @@
+# Frame-level voice activity detection used to gate audio sent to Vosk
+
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+import numpy as np
+
+from .buffers import Scratch
+
+
+@dataclass
+class VADConfig:
+    # Tunable parameters for the voice activity detector
+    frame_ms: int = 20             # Analysis frame length (10-30 ms)
+    energy_ratio: float = 3.0      # Frame RMS must exceed the noise floor by this factor
+    min_energy: float = 60.0       # Absolute RMS (int16 units) below which nothing is speech
+    max_zcr: float = 0.35          # Zero-crossing rate above this looks like hiss or fan noise
+    noise_adapt: float = 0.05      # Per-frame rate at which the noise floor tracks non-speech
+    hangover_ms: int = 300         # Keep sending this long after the last speech frame
+    padding_ms: int = 200          # Context sent before the first speech frame
+
+
+@dataclass
+class VADResult:
+    # Output of one VoiceActivityDetector.process call
+    audio: bytes                   # Speech frames plus context, in order
+    speech_ended: bool = False     # An utterance ended inside this chunk
+    speech_frames: int = 0         # Frames classified as speech (before hangover/padding)
+    total_frames: int = 0
+    # Byte offsets into audio at which an utterance ended; audio after an offset
+    # belongs to the next utterance
+    end_offsets: list[int] = field(default_factory=list)
+
+    def pieces(self) -> list[tuple[bytes, bool]]:
+        # audio split at each utterance end as (pcm, ends_utterance) pairs, in order
+        # Callers finalize after each piece that ends an utterance, so the start of the
+        # next one is never decoded into the previous final
+        if not self.end_offsets:
+            return [(self.audio, False)] if self.audio else []
+        pieces, start = [], 0
+        for offset in self.end_offsets:
+            pieces.append((self.audio[start:offset], True))
+            start = offset
+        if start < len(self.audio):
+            pieces.append((self.audio[start:], False))
+        return pieces
+
+
+class VoiceActivityDetector:
+    # Scores fixed-size frames by energy, zero-crossing rate and an adaptive noise floor
+    # All per-frame math is vectorized over the chunk into reused work arrays; state
+    # carries across chunks
+
+    def __init__(self, sample_rate: int = 16000, config: Optional[VADConfig] = None):
+        self.sample_rate = sample_rate
+        self.config = config or VADConfig()
+        self.frame_samples = max(1, sample_rate * self.config.frame_ms // 1000)
+        self.frame_bytes = self.frame_samples * 2
+        self.hangover_frames = self.config.hangover_ms // self.config.frame_ms
+        self.padding_frames = self.config.padding_ms // self.config.frame_ms
+        # Work arrays for scoring and gating, reused across chunks
+        self._samples = Scratch(np.float32)
+        self._signs = Scratch(np.bool_)
+        self._crossings = Scratch(np.bool_)
+        self._rms = Scratch(np.float32)
+        self._zcr = Scratch(np.float64)
+        self._noise = Scratch(np.float32)
+        self._speech = Scratch(np.bool_)
+        self._send = Scratch(np.bool_)
+        self._edges = Scratch(np.bool_)
+        self._flags = Scratch(np.bool_)
+        self._last_speech = Scratch(np.intp)
+        self._since = Scratch(np.intp)
+        self._next_speech = Scratch(np.intp)
+        self._sent_before = Scratch(np.intp)
+        self._gather = Scratch(np.int16)
+        self._index = np.arange(0)
+        # Unsent frames kept as context for the next onset, as a ring of whole frames
+        self._preroll = np.empty((self.padding_frames, self.frame_samples), dtype=np.int16)
+        self.reset()
+
+    def reset(self) -> None:
+        # Forget the noise floor and any utterance in progress
+        self.noise_floor: Optional[float] = None
+        self._remainder = b""
+        self._since_speech = self.hangover_frames + 1  # Frames since the last speech frame
+        self._sending = False                          # Whether the last frame was sent
+        self._preroll_len = 0
+        self._preroll_next = 0                         # Ring slot the next frame goes into
+
+    def _frame_index(self, count: int) -> np.ndarray:
+        # 0..count-1, grown as needed
+        if len(self._index) < count:
+            self._index = np.arange(count)
+        return self._index[:count]
+
+    def score_frames(self, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Per-frame RMS energy and zero-crossing rate for an (n, frame_samples) int16 array
+        # Both results are views of work arrays, valid until the next call
+        count, size = frames.shape
+        samples = self._samples.get(frames.size).reshape(count, size)
+        np.copyto(samples, frames)
+        rms = self._rms.get(count)
+        np.einsum("ij,ij->i", samples, samples, out=rms)
+        rms /= size
+        np.sqrt(rms, out=rms)
+        signs = self._signs.get(frames.size).reshape(count, size)
+        np.less(frames, 0, out=signs)
+        crossings = self._crossings.get(count * (size - 1)).reshape(count, size - 1)
+        np.not_equal(signs[:, 1:], signs[:, :-1], out=crossings)
+        zcr = self._zcr.get(count)
+        np.sum(crossings, axis=1, dtype=np.float64, out=zcr)
+        zcr /= size
+        return rms, zcr
+
+    def classify(self, rms: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+        # Raw speech decision per frame, updating the adaptive noise floor
+        # The result is a view of a work array, valid until the next call
+        config = self.config
+        count = len(rms)
+        if self.noise_floor is None:
+            self.noise_floor = max(float(np.percentile(rms, 10)), 1.0)
+
+        threshold = max(self.noise_floor * config.energy_ratio, config.min_energy)
+        speech = self._speech.get(count)
+        np.greater(rms, threshold, out=speech)
+        voiced = self._flags.get(count)
+        np.less(zcr, config.max_zcr, out=voiced)
+        speech &= voiced
+
+        # Track the floor on non-speech frames; drop straight to quieter frames
+        quiet = count - int(np.count_nonzero(speech))
+        if quiet:
+            np.logical_not(speech, out=voiced)
+            noise = np.compress(voiced, rms, out=self._noise.get(quiet))
+            noise_level = float(noise.mean())
+            if noise_level < self.noise_floor:
+                self.noise_floor = noise_level
+            else:
+                weight = 1.0 - (1.0 - config.noise_adapt) ** quiet
+                self.noise_floor += weight * (noise_level - self.noise_floor)
+            self.noise_floor = max(self.noise_floor, 1.0)
+        return speech
+
+    def process(self, pcm: Union[bytes, memoryview]) -> VADResult:
+        # Gate a chunk of 16-bit mono PCM, returning only speech frames plus context
+        # pcm may be a view of a pooled buffer; nothing returned or kept refers to it
+        data = self._remainder + pcm if self._remainder else pcm
+        count = len(data) // self.frame_bytes
+        self._remainder = bytes(data[count * self.frame_bytes:])
+        if count == 0:
+            return VADResult(b"")
+
+        frames = np.frombuffer(data, dtype=np.int16, count=count * self.frame_samples)
+        frames = frames.reshape(count, self.frame_samples)
+        rms, zcr = self.score_frames(frames)
+        speech = self.classify(rms, zcr)
+        index = self._frame_index(count)
+        first = int(np.argmax(speech)) if speech.any() else count
+
+        # Hangover: frames within hangover_frames after the most recent speech frame;
+        # before the chunk's first speech frame the count runs on from the last chunk
+        last_speech = self._last_speech.get(count)
+        last_speech.fill(-1)
+        np.copyto(last_speech, index, where=speech)
+        np.maximum.accumulate(last_speech, out=last_speech)
+        since = self._since.get(count)
+        np.subtract(index, last_speech, out=since)
+        np.add(index[:first], self._since_speech + 1, out=since[:first])
+        send = self._send.get(count)
+        np.less_equal(since, self.hangover_frames, out=send)
+
+        # Padding: frames within padding_frames before the next speech frame
+        if self.padding_frames:
+            next_speech = self._next_speech.get(count)
+            next_speech.fill(count + self.padding_frames)
+            np.copyto(next_speech, index, where=speech)
+            backwards = next_speech[::-1]
+            np.minimum.accumulate(backwards, out=backwards)
+            np.subtract(next_speech, index, out=next_speech)
+            near = self._flags.get(count)
+            np.less_equal(next_speech, self.padding_frames, out=near)
+            send |= near
+
+        # Pre-roll from the previous chunk when speech starts near the chunk boundary
+        prefix = b""
+        if not self._sending and first < count and self._preroll_len:
+            wanted = min(self.padding_frames - first, self._preroll_len)
+            if wanted > 0:
+                slots = range(self._preroll_next - wanted, self._preroll_next)
+                prefix = np.take(self._preroll, slots, axis=0, mode="wrap").tobytes()
+
+        # An utterance ends where sending stops; locate each end in the output audio
+        # (the end frame itself is unsent, so the frames sent before it are a running sum)
+        edges = self._edges.get(count + 1)
+        edges[0] = self._sending
+        edges[1:] = send
+        ends = self._flags.get(count)
+        np.greater(edges[:-1], edges[1:], out=ends)
+        end_offsets = []
+        if ends.any():
+            sent_before = self._sent_before.get(count)
+            np.cumsum(send, out=sent_before)
+            end_offsets = [len(prefix) + int(sent_before[end]) * self.frame_bytes
+                           for end in np.flatnonzero(ends)]
+
+        # Remember unsent tail frames as context for the next onset
+        sent = int(np.count_nonzero(send))
+        tail_start = count - int(np.argmax(send[::-1])) if sent else 0
+        if sent:
+            self._preroll_len = 0
+        for frame in frames[max(tail_start, count - self.padding_frames):]:
+            self._preroll[self._preroll_next] = frame
+            self._preroll_next = (self._preroll_next + 1) % self.padding_frames
+            self._preroll_len = min(self._preroll_len + 1, self.padding_frames)
+
+        self._since_speech = int(since[-1])
+        self._sending = bool(send[-1])
+        if sent == count:
+            # The whole chunk is speech: one copy, no gather
+            audio = prefix + frames.tobytes()
+        elif sent:
+            gathered = self._gather.get(sent * self.frame_samples).reshape(sent, self.frame_samples)
+            audio = prefix + np.compress(send, frames, axis=0, out=gathered).tobytes()
+        else:
+            audio = prefix
+        return VADResult(audio, bool(end_offsets), int(np.count_nonzero(speech)), count, end_offsets)
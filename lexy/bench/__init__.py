@@ -0,0 +1,2 @@
+# Benchmarks and performance budgets for Lexy
+# Run individual benchmarks with: python -m lexy.bench.<name>
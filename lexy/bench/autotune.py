@@ -0,0 +1,190 @@
+# Latency-profile auto-tuner
+# Replays fixtures through the benchmark harness and searches capture and endpointing
+# settings (one at a time, repeated until nothing improves) for the lowest p95
+# end-of-utterance latency whose word error rate stays within a budget. Fixtures
+# without reference transcripts are scored against what the base profile produces,
+# so the budget then bounds how far results may drift from today's behaviour
+#
+# Usage: python -m lexy.bench.autotune [--model PATH] [--mode listen|stream]
+#                                      [--base PROFILE] [--wer-budget X] [--rounds N]
+#                                      [--rate HZ] [--output FILE] [FIXTURE.wav...]
+
+import json
+import sys
+from dataclasses import dataclass, replace
+from typing import Callable, Optional
+
+import numpy as np
+
+from ..transcription.engine import TranscriptionEngine
+from ..transcription.profiles import PROFILES, LatencyProfile, load_profile, save_profile
+from .fakes import StubEngine
+from .harness import Fixture, _quiet, load_fixture, run_fixture, synthetic_fixture
+
+# Values tried for each setting; the listen loop is driven by speech_recognition's
+# pause detection, the streaming loop by frame size and the VAD's hangover
+SEARCH_SPACE: dict[str, dict[str, list[float]]] = {
+    "stream": {
+        "frame_ms": [30, 50, 100, 200],
+        "vad_hangover_ms": [100, 150, 200, 300, 400, 500],
+    },
+    "listen": {
+        "pause_threshold": [0.3, 0.4, 0.5, 0.6, 0.8],
+        "non_speaking_duration": [0.1, 0.2, 0.3, 0.5],
+        "phrase_time_limit": [1.0, 2.0, 3.0, 5.0],
+        "listen_timeout": [0.3, 0.5, 1.0],
+        "vad_hangover_ms": [100, 200, 300, 500],
+    },
+}
+
+
+@dataclass
+class Trial:
+    # One profile's score over every fixture
+    profile: LatencyProfile
+    latency_p95_ms: float       # Mean over fixtures of the p95 audio latency
+    latency_p50_ms: float
+    wer: float                  # Mean over fixtures
+
+    def within(self, budget: float) -> bool:
+        return self.wer <= budget
+
+    def better_than(self, other: "Trial", budget: float) -> bool:
+        # Within budget beats over budget; then lower latency (or, over budget, lower WER)
+        if self.within(budget) != other.within(budget):
+            return self.within(budget)
+        if not self.within(budget):
+            return self.wer < other.wer
+        return (self.latency_p95_ms, self.latency_p50_ms) < (other.latency_p95_ms, other.latency_p50_ms)
+
+    def to_dict(self) -> dict:
+        return {"profile": self.profile.to_dict(), "latency_p95_ms": round(self.latency_p95_ms, 1),
+                "latency_p50_ms": round(self.latency_p50_ms, 1), "wer": round(self.wer, 4)}
+
+
+def engine_factory(model_path: Optional[str]) -> Callable[[], TranscriptionEngine]:
+    # A fresh recognizer per trial so no state carries over; the model is loaded once
+    if not model_path:
+        return StubEngine
+    with _quiet():
+        model = TranscriptionEngine(model_path).vosk_model
+    return lambda: TranscriptionEngine(model_path, model=model)
+
+
+def evaluate(profile: LatencyProfile, fixtures: list[Fixture],
+             create_engine: Callable[[], TranscriptionEngine], mode: str) -> Trial:
+    results = [run_fixture(fixture, create_engine(), 0.0, mode, profile=profile) for fixture in fixtures]
+    # A fixture where no utterance was detected at all has no latency; treat it as unusable
+    p95 = [r["latency_audio_ms"]["p95"] for r in results]
+    p50 = [r["latency_audio_ms"]["p50"] for r in results]
+    wer = float(np.mean([r["wer"] for r in results]))
+    if any(value is None for value in p95):
+        return Trial(profile, float("inf"), float("inf"), wer)
+    return Trial(profile, float(np.mean(p95)), float(np.mean(p50)), wer)
+
+
+def tune(fixtures: list[Fixture], base: LatencyProfile, mode: str, wer_budget: float,
+         create_engine: Callable[[], TranscriptionEngine], rounds: int = 3,
+         on_trial: Optional[Callable[[Trial], None]] = None) -> tuple[Trial, Trial, list[Trial]]:
+    # Coordinate search from base; returns (base trial, best trial, every trial)
+    unscored = [fixture for fixture in fixtures if not fixture.transcripts]
+    if unscored:
+        # The base profile's own output is the reference for fixtures without one
+        for fixture in unscored:
+            result = run_fixture(fixture, create_engine(), 0.0, mode, profile=base)
+            fixture.transcripts = result["transcripts"]
+
+    baseline = evaluate(base, fixtures, create_engine, mode)
+    best, trials = baseline, [baseline]
+    for _ in range(rounds):
+        improved = False
+        for setting, values in SEARCH_SPACE[mode].items():
+            for value in values:
+                if value == getattr(best.profile, setting):
+                    continue
+                candidate = replace(best.profile, name="tuned")
+                setattr(candidate, setting, value)
+                try:
+                    candidate.validate()
+                except ValueError:
+                    continue
+                trial = evaluate(candidate, fixtures, create_engine, mode)
+                trials.append(trial)
+                if on_trial is not None:
+                    on_trial(trial)
+                if trial.better_than(best, wer_budget):
+                    best, improved = trial, True
+        if not improved:
+            break
+    return baseline, best, trials
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    model_path, mode, base_name, output_path = None, "stream", "balanced", None
+    wer_budget, rounds, rate = 0.05, 3, 16000
+    paths = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ("--model", "--mode", "--base", "--wer-budget", "--rounds", "--rate",
+                   "--output") and i + 1 < len(argv):
+            value = argv[i + 1]
+            try:
+                if arg == "--model":
+                    model_path = value
+                elif arg == "--mode" and value in SEARCH_SPACE:
+                    mode = value
+                elif arg == "--base":
+                    base_name = value
+                elif arg == "--wer-budget":
+                    wer_budget = float(value)
+                elif arg == "--rounds":
+                    rounds = int(value)
+                elif arg == "--rate":
+                    rate = int(value)
+                elif arg == "--output":
+                    output_path = value
+                else:
+                    raise ValueError(value)
+            except ValueError:
+                print(f"Invalid value for {arg}: {value}")
+                return 2
+            i += 1
+        elif not arg.startswith("-"):
+            paths.append(arg)
+        else:
+            print(f"Unknown argument: {arg}")
+            return 2
+        i += 1
+
+    try:
+        base = load_profile(base_name)
+    except ValueError as e:
+        print(e)
+        return 2
+    fixtures = [load_fixture(path) for path in paths] or [synthetic_fixture(rate)]
+
+    def progress(trial: Trial) -> None:
+        changed = {key: value for key, value in trial.profile.to_dict().items()
+                   if key != "name" and value != getattr(base, key)}
+        print(f"p95 {trial.latency_p95_ms:7.1f}ms  WER {trial.wer:.3f}  {changed}", file=sys.stderr)
+
+    baseline, best, trials = tune(fixtures, base, mode, wer_budget, engine_factory(model_path), rounds, progress)
+    report = {
+        "config": {"engine": model_path or "stub", "mode": mode, "base": base.name,
+                   "wer_budget": wer_budget, "fixtures": [fixture.name for fixture in fixtures],
+                   "trials": len(trials)},
+        "baseline": baseline.to_dict(),
+        "best": best.to_dict(),
+        "within_budget": best.within(wer_budget),
+    }
+    print(json.dumps(report, indent=2))
+    if output_path:
+        save_profile(best.profile, output_path, base.name if base.name in PROFILES else "balanced")
+        print(f"Saved profile to {output_path} (use with --profile {output_path})", file=sys.stderr)
+    return 0 if best.within(wer_budget) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+# Stand-ins for the microphone and the Vosk recognizer used by the benchmarks
+
+import json
+import time
+from typing import Optional
+
+import numpy as np
+import speech_recognition as sr
+
+from ..audio.files import AudioFileReader
+from ..audio.resample import StreamingResampler
+from ..transcription.engine import TranscriptionEngine
+
+
+class FakeMicrophone(sr.AudioSource):
+    # sr.AudioSource that replays PCM at real-time or accelerated speed
+    # speed=1.0 paces reads like a live device; speed=0 reads as fast as possible
+
+    def __init__(self, pcm: bytes, sample_rate: int, speed: float = 1.0, chunk_size: int = 1024):
+        self.pcm = pcm
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = chunk_size
+        self.speed = speed
+        self.device_index = None
+        self.stream: Optional["FakeMicrophone"] = None
+        self.position = 0  # Bytes delivered so far
+        self.start_time: Optional[float] = None
+        self.exhausted = False
+
+    @classmethod
+    def from_wav(cls, path: str, speed: float = 1.0, chunk_size: int = 1024) -> "FakeMicrophone":
+        # Load a fixture, downmixed to mono at its native rate
+        with AudioFileReader(path) as reader:
+            pcm = b"".join(reader.chunks(60.0))
+            return cls(pcm, reader.sample_rate, speed, chunk_size)
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / (2 * self.SAMPLE_RATE)
+
+    @property
+    def audio_seconds(self) -> float:
+        # Audio time of everything delivered so far
+        return self.position / (2 * self.SAMPLE_RATE)
+
+    def wall_time_at(self, audio_seconds: float) -> float:
+        # Wall-clock time at which a live device would have delivered this instant
+        assert self.start_time is not None, "the first read() starts the clock"
+        return self.start_time + audio_seconds / self.speed
+
+    def read(self, frames: int) -> bytes:
+        # Deliver the next frames, sleeping to honour the replay speed
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        data = self.pcm[self.position:self.position + frames * 2]
+        self.position += len(data)
+        if not data:
+            self.exhausted = True
+        elif self.speed > 0:
+            delay = self.wall_time_at(self.audio_seconds) - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def __enter__(self) -> "FakeMicrophone":
+        self.stream = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stream = None
+
+
+class FakeMicrophoneManager:
+    # MicrophoneManager stand-in wrapping a FakeMicrophone
+
+    def __init__(self, microphone: FakeMicrophone, debug: bool = False):
+        self.microphone = microphone
+        self.device_index = None
+        self.debug = debug
+
+    def reinitialize(self) -> None:
+        pass
+
+    def test_microphone(self) -> None:
+        pass
+
+    def list_microphones(self) -> None:
+        print("  0: Fake microphone")
+
+
+class StubRecognizer:
+    # Model-free stand-in for vosk.KaldiRecognizer
+    # Tracks speech by frame energy and reports an utterance final after endpoint_ms of
+    # silence, mimicking Vosk's endpointing; decode_rtf burns CPU to model decoder cost
+
+    def __init__(self, sample_rate: int = 16000, energy_threshold: float = 300.0,
+                 endpoint_ms: int = 500, decode_rtf: float = 0.0):
+        self.sample_rate = sample_rate
+        self.energy_threshold = energy_threshold
+        self.frame_samples = sample_rate // 100
+        self.endpoint_frames = endpoint_ms // 10
+        self.decode_rtf = decode_rtf
+        self.utterances = 0
+        self.words = False
+        # Frames consumed since creation, the recognizer's clock for word timings
+        self.frames = 0
+        self.Reset()
+
+    def Reset(self) -> None:
+        self._remainder = b""
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._speech_start = 0
+        self._final: Optional[str] = None
+        self._final_span = (0.0, 0.0)
+
+    def SetWords(self, enabled: bool) -> None:
+        self.words = enabled
+
+    def _burn(self, seconds: float) -> None:
+        # Busy-wait so the stub costs CPU like a real decoder would
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+
+    def AcceptWaveform(self, data: bytes) -> bool:
+        data = self._remainder + bytes(data)
+        count = len(data) // (2 * self.frame_samples)
+        self._remainder = data[count * 2 * self.frame_samples:]
+        if self.decode_rtf:
+            self._burn(count * 0.01 * self.decode_rtf)
+        if count == 0:
+            return False
+
+        frames = np.frombuffer(data, dtype=np.int16, count=count * self.frame_samples)
+        frames = frames.reshape(count, self.frame_samples).astype(np.float32)
+        speech = np.sqrt(np.mean(frames * frames, axis=1)) > self.energy_threshold
+
+        endpoint = False
+        for is_speech in speech:
+            self.frames += 1
+            if is_speech:
+                if not self._speech_frames:
+                    self._speech_start = self.frames - 1
+                self._speech_frames += 1
+                self._silence_frames = 0
+            elif self._speech_frames:
+                self._silence_frames += 1
+                if self._silence_frames >= self.endpoint_frames:
+                    self._finish()
+                    endpoint = True
+        return endpoint
+
+    def _finish(self) -> None:
+        self.utterances += 1
+        self._final = f"utterance {self.utterances}"
+        self._final_span = (self._speech_start / 100, (self._speech_start + self._speech_frames) / 100)
+        self._speech_frames = 0
+        self._silence_frames = 0
+
+    def _result(self, text: str) -> str:
+        result: dict[str, object] = {"text": text}
+        if self.words and text:
+            # Spread the utterance's words evenly across its speech frames
+            start, end = self._final_span
+            tokens = text.split()
+            step = (end - start) / len(tokens)
+            result["result"] = [{"conf": 1.0, "start": round(start + i * step, 2),
+                                 "end": round(start + (i + 1) * step, 2), "word": token}
+                                for i, token in enumerate(tokens)]
+        return json.dumps(result)
+
+    def Result(self) -> str:
+        text, self._final = self._final or "", None
+        return self._result(text)
+
+    def PartialResult(self) -> str:
+        partial = f"utterance {self.utterances + 1}" if self._speech_frames else ""
+        return json.dumps({"partial": partial})
+
+    def FinalResult(self) -> str:
+        if self._speech_frames:
+            self._finish()
+        text = self._final or ""
+        result = self._result(text)
+        self.Reset()
+        return result
+
+
+class StubEngine(TranscriptionEngine):
+    # TranscriptionEngine backed by a StubRecognizer - needs neither vosk nor a model
+    # load_seconds stands in for model loading time when measuring startup
+
+    def __init__(self, debug: bool = False, load_seconds: float = 0.0,
+                 background_load: bool = False, **stub_options):
+        self.stub_options = stub_options
+        self.load_seconds = load_seconds
+        super().__init__("stub", debug, background_load=background_load)
+
+    def _initialize_vosk(self) -> None:
+        if self.load_seconds:
+            time.sleep(self.load_seconds)
+        self.vosk_rec = self._create_recognizer()
+
+    def _create_recognizer(self) -> StubRecognizer:
+        recognizer = StubRecognizer(**self.stub_options)
+        recognizer.SetWords(self.words)
+        return recognizer
+
+
+def synthesize_fixture(seconds: float = 30.0, sample_rate: int = 16000,
+                       seed: int = 0) -> tuple[bytes, list[tuple[float, float]]]:
+    # Voiced harmonic bursts separated by room noise; returns (pcm, utterance spans)
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    signal = rng.normal(0.0, 40.0, total)
+    spans = []
+    position = 1.0
+    while True:
+        length = rng.uniform(0.8, 2.5)
+        if position + length + 0.5 > seconds:
+            break
+        start, end = int(position * sample_rate), int((position + length) * sample_rate)
+        t = np.arange(end - start) / sample_rate
+        pitch = rng.uniform(110.0, 220.0)
+        envelope = 0.6 + 0.4 * np.sin(2 * np.pi * rng.uniform(2.0, 5.0) * t)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        signal[start:end] += 4000.0 * envelope * voiced
+        spans.append((position, position + length))
+        position += length + rng.uniform(0.7, 1.8)
+    pcm = np.clip(signal, -32768, 32767).astype(np.int16).tobytes()
+    return pcm, spans
+
+
+def resample_fixture(pcm: bytes, sample_rate: int, target_rate: int) -> bytes:
+    # Convert a fixture to another capture rate (e.g. to exercise the resampler)
+    if sample_rate == target_rate:
+        return pcm
+    resampler = StreamingResampler(sample_rate, target_rate)
+    return resampler.process(pcm) + resampler.flush()
@@ -0,0 +1,276 @@
+# Latency and throughput benchmark for SpeechTranscriber
+# Replays WAV fixtures (or a synthetic one) through a fake microphone and a stub or
+# real recognizer, and reports end-of-utterance latency, real-time factor, CPU per
+# audio-second and peak RSS as JSON
+#
+# Usage: python -m lexy.bench.harness [--model PATH] [--speed X] [--mode listen|stream]
+#                                     [--rate HZ] [--profile NAME|FILE] [--json FILE]
+#                                     [FIXTURE.wav...]
+
+import contextlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+try:
+    import resource
+    HAVE_RESOURCE = True
+except ImportError:  # Windows: peak RSS is not reported
+    HAVE_RESOURCE = False
+
+from ..audio.vad import VADConfig, VoiceActivityDetector
+from ..transcription.engine import TranscriptionEngine
+from ..transcription.profiles import LatencyProfile, load_profile
+from ..transcription.speech import SpeechTranscriber
+from .fakes import FakeMicrophone, FakeMicrophoneManager, StubEngine, resample_fixture, synthesize_fixture
+
+
+@dataclass
+class Fixture:
+    # Audio to replay plus the instants at which each utterance ends
+    name: str
+    pcm: bytes
+    sample_rate: int
+    utterance_ends: list[float]
+    transcripts: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Emission:
+    # One [TRANSCRIBED] result observed by the harness
+    text: str
+    audio_position: float
+    wall_time: float
+
+
+def find_utterance_ends(pcm: bytes, sample_rate: int, min_gap: float = 0.3) -> list[float]:
+    # Ground-truth utterance ends from an offline pass of the VAD without hangover
+    vad = VoiceActivityDetector(sample_rate, VADConfig(hangover_ms=0, padding_ms=0))
+    count = len(pcm) // vad.frame_bytes
+    if count == 0:
+        return []
+    frames = np.frombuffer(pcm, dtype=np.int16, count=count * vad.frame_samples)
+    speech = vad.classify(*vad.score_frames(frames.reshape(count, vad.frame_samples)))
+
+    frame_seconds = vad.frame_samples / sample_rate
+    ends: list[float] = []
+    for index in np.flatnonzero(speech[:-1] & ~speech[1:]):
+        end = (index + 1) * frame_seconds
+        following = np.flatnonzero(speech[index + 1:])
+        if following.size == 0 or following[0] * frame_seconds >= min_gap:
+            ends.append(round(end, 3))
+    if speech[-1]:
+        ends.append(round(count * frame_seconds, 3))
+    return ends
+
+
+def load_fixture(path: str) -> Fixture:
+    # WAV fixture with an optional <name>.json sidecar listing utterances
+    microphone = FakeMicrophone.from_wav(path)
+    sidecar = os.path.splitext(path)[0] + ".json"
+    ends, transcripts = None, []
+    if os.path.exists(sidecar):
+        with open(sidecar, encoding="utf-8") as f:
+            utterances = json.load(f).get("utterances", [])
+        ends = [float(u["end"]) for u in utterances]
+        transcripts = [u.get("text", "") for u in utterances]
+    if ends is None:
+        ends = find_utterance_ends(microphone.pcm, microphone.SAMPLE_RATE)
+    return Fixture(os.path.basename(path), microphone.pcm, microphone.SAMPLE_RATE, ends, transcripts)
+
+
+def synthetic_fixture(sample_rate: int = 16000) -> Fixture:
+    # The stub recognizer names the bursts "utterance 1", "utterance 2", ...
+    pcm, spans = synthesize_fixture()
+    return Fixture("synthetic", resample_fixture(pcm, 16000, sample_rate), sample_rate,
+                   [round(end, 3) for _, end in spans],
+                   [f"utterance {index + 1}" for index in range(len(spans))])
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    # Word-level edit distance over the reference length (insertions count too)
+    ref, hyp = reference.split(), hypothesis.split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1,
+                                           previous + (ref_word != hyp_word))
+    return row[-1] / len(ref)
+
+
+@contextlib.contextmanager
+def _quiet():
+    # Hide the transcriber's console chatter so only the report is printed
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def peak_rss_mb() -> Optional[float]:
+    # Peak resident set size of this process so far
+    if not HAVE_RESOURCE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentile(values: list[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+    return round(float(np.percentile(values, percent)), 1)
+
+
+def replay(transcriber: SpeechTranscriber, microphone: FakeMicrophone, mode: str,
+           frame_ms: Optional[int] = None) -> list[Emission]:
+    # Drive the transcriber until the fake microphone runs dry
+    emissions = []
+
+    def record(text: Optional[str]) -> None:
+        if text:
+            emissions.append(Emission(text, microphone.audio_seconds, time.perf_counter()))
+
+    if mode == "stream":
+        frame_samples = microphone.SAMPLE_RATE * (frame_ms or transcriber.profile.frame_ms) // 1000
+        while not microphone.exhausted:
+            frame = microphone.read(frame_samples)
+            if frame:
+                for text, _ in transcriber._transcribe_raw(frame, microphone.SAMPLE_RATE):
+                    record(text)
+    else:
+        while not microphone.exhausted:
+            for text, _ in transcriber.listen_for_speech():
+                record(text)
+
+    # Whatever is still buffered at end of input
+    record(transcriber.transcription_engine.flush())
+    return emissions
+
+
+def match_latencies(fixture: Fixture, emissions: list[Emission],
+                    microphone: FakeMicrophone) -> tuple[list[float], list[float]]:
+    # Pair each emission with the latest unmatched utterance that ended before it
+    # Audio latency: how much audio past the end had to be captured
+    # Wall latency: time from the end being "spoken" to the result (paced replay only)
+    audio_latencies, wall_latencies = [], []
+    pending = list(fixture.utterance_ends)
+    for emission in emissions:
+        ended = [end for end in pending if end <= emission.audio_position]
+        if not ended:
+            continue
+        end = ended[-1]
+        pending = [e for e in pending if e > end]
+        audio_latencies.append((emission.audio_position - end) * 1000.0)
+        if microphone.speed > 0:
+            wall_latencies.append((emission.wall_time - microphone.wall_time_at(end)) * 1000.0)
+    return audio_latencies, wall_latencies
+
+
+def run_fixture(fixture: Fixture, engine: TranscriptionEngine, speed: float, mode: str,
+                vad_config: Optional[VADConfig] = None,
+                profile: Optional[LatencyProfile] = None) -> dict:
+    microphone = FakeMicrophone(fixture.pcm, fixture.sample_rate, speed)
+    with _quiet():
+        transcriber = SpeechTranscriber(
+            vad_config=vad_config, mic_manager=FakeMicrophoneManager(microphone),
+            transcription_engine=engine, profile=profile
+        )
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        emissions = replay(transcriber, microphone, mode)
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    duration = microphone.duration
+    audio_latencies, wall_latencies = match_latencies(fixture, emissions, microphone)
+    return {
+        "fixture": fixture.name,
+        "audio_seconds": round(duration, 3),
+        "utterances": len(fixture.utterance_ends),
+        "results": len(emissions),
+        "latency_audio_ms": {"p50": _percentile(audio_latencies, 50),
+                             "p95": _percentile(audio_latencies, 95),
+                             "max": _percentile(audio_latencies, 100)},
+        "latency_wall_ms": {"p50": _percentile(wall_latencies, 50),
+                            "p95": _percentile(wall_latencies, 95),
+                            "max": _percentile(wall_latencies, 100)},
+        "real_time_factor": round(wall / duration, 4) if duration else None,
+        "cpu_per_audio_second": round(cpu / duration, 4) if duration else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "wer": round(word_error_rate(" ".join(fixture.transcripts),
+                                     " ".join(emission.text for emission in emissions)), 4)
+        if fixture.transcripts else None,
+        "transcripts": [emission.text for emission in emissions],
+    }
+
+
+def run(fixtures: list[Fixture], model_path: Optional[str], speed: float, mode: str,
+        vad_config: Optional[VADConfig] = None, profile: Optional[LatencyProfile] = None) -> dict:
+    if model_path:
+        with _quiet():
+            engine = TranscriptionEngine(model_path)
+    else:
+        engine = StubEngine()
+
+    results = [run_fixture(fixture, engine, speed, mode, vad_config, profile) for fixture in fixtures]
+    return {
+        "config": {"engine": model_path or "stub", "speed": speed, "mode": mode,
+                   "profile": profile.name if profile else "balanced"},
+        "fixtures": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    model_path, speed, mode, rate, json_path, profile = None, 0.0, "listen", 16000, None, None
+    paths = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ("--model", "--speed", "--mode", "--rate", "--json", "--profile") and i + 1 < len(argv):
+            value = argv[i + 1]
+            if arg == "--model":
+                model_path = value
+            elif arg == "--speed":
+                speed = float(value)
+            elif arg == "--mode" and value in ("listen", "stream"):
+                mode = value
+            elif arg == "--rate":
+                rate = int(value)
+            elif arg == "--json":
+                json_path = value
+            elif arg == "--profile":
+                try:
+                    profile = load_profile(value)
+                except ValueError as e:
+                    print(e)
+                    return 2
+            else:
+                print(f"Invalid value for {arg}: {value}")
+                return 2
+            i += 1
+        elif not arg.startswith("-"):
+            paths.append(arg)
+        else:
+            print(f"Unknown argument: {arg}")
+            return 2
+        i += 1
+
+    fixtures = [load_fixture(path) for path in paths] or [synthetic_fixture(rate)]
+    report = run(fixtures, model_path, speed, mode, profile=profile)
+    output = json.dumps(report, indent=2)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# Import-time budget check for light CLI paths
+# Runs `python -X importtime -m lexy --help` and fails if startup regresses
+# Modules the bare interpreter already imports (site, .pth hooks) are not counted
+#
+# Usage: python -m lexy.bench.importtime [--budget-ms MS] [--runs N] [-- LEXY ARGS...]
+
+import json
+import subprocess
+import sys
+from typing import Optional
+
+
+# Modules that must never be imported just to print help or list devices
+HEAVY_MODULES = ("vosk", "numpy", "speech_recognition", "pyaudio")
+
+DEFAULT_BUDGET_MS = 30.0
+
+
+def measure_imports(command: list[str]) -> dict[str, int]:
+    # Run a Python command under -X importtime and return self time (us) per module
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime"] + command,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False
+    )
+    timings: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        name = fields[2].strip()
+        timings[name] = timings.get(name, 0) + int(fields[0])
+    return timings
+
+
+def run(lexy_args: list[str], budget_ms: float, runs: int) -> dict:
+    # Take the fastest of several runs to keep noise from failing the check
+    interpreter = set(measure_imports(["-c", "pass"]))
+    best: Optional[dict[str, int]] = None
+    for _ in range(runs):
+        timings = measure_imports(["-m", "lexy"] + lexy_args)
+        timings = {name: us for name, us in timings.items() if name not in interpreter}
+        if best is None or sum(timings.values()) < sum(best.values()):
+            best = timings
+    assert best is not None, "runs must be at least 1"
+
+    total_ms = sum(best.values()) / 1000.0
+    heavy = sorted({name.split(".")[0] for name in best} & set(HEAVY_MODULES))
+    slowest = sorted(best.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {
+        "args": lexy_args,
+        "total_ms": round(total_ms, 2),
+        "budget_ms": budget_ms,
+        "heavy_modules": heavy,
+        "slowest": [{"module": name, "self_ms": round(us / 1000.0, 2)} for name, us in slowest],
+        "passed": total_ms <= budget_ms and not heavy,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    # Parse our own options; anything after `--` is passed to lexy
+    argv = sys.argv[1:] if argv is None else argv
+    budget_ms = DEFAULT_BUDGET_MS
+    runs = 5
+    lexy_args = ["--help"]
+    if "--" in argv:
+        split = argv.index("--")
+        lexy_args = argv[split + 1:]
+        argv = argv[:split]
+
+    i = 0
+    while i < len(argv):
+        if argv[i] == "--budget-ms" and i + 1 < len(argv):
+            budget_ms = float(argv[i + 1])
+            i += 1
+        elif argv[i] == "--runs" and i + 1 < len(argv):
+            runs = max(1, int(argv[i + 1]))
+            i += 1
+        else:
+            print(f"Unknown argument: {argv[i]}")
+            return 2
+        i += 1
+
+    report = run(lexy_args, budget_ms, runs)
+    print(json.dumps(report, indent=2))
+    if report["heavy_modules"]:
+        print(f"FAIL: `lexy {' '.join(lexy_args)}` imports {', '.join(report['heavy_modules'])}",
+              file=sys.stderr)
+    elif not report["passed"]:
+        print(f"FAIL: import time {report['total_ms']}ms exceeds budget of {budget_ms}ms",
+              file=sys.stderr)
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# Resampler benchmark: StreamingResampler against audioop.ratecv
+# Measures throughput and accuracy on tone, sweep and stop-band fixtures
+#
+# Usage: python -m lexy.bench.resample [--seconds N] [--chunk-ms MS] [--json FILE]
+
+import json
+import sys
+import time
+import warnings
+from typing import Callable, Optional
+
+import numpy as np
+
+from ..audio.resample import StreamingResampler
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+        HAVE_AUDIOOP = True
+    except ImportError:  # Removed in Python 3.13
+        HAVE_AUDIOOP = False
+
+
+TARGET_RATE = 16000
+INPUT_RATES = (48000, 44100)
+AMPLITUDE = 8000.0
+
+
+def _tone(frequency: float) -> Callable[[np.ndarray], np.ndarray]:
+    return lambda t: AMPLITUDE * np.sin(2 * np.pi * frequency * t)
+
+
+def _sweep(start: float, end: float, seconds: float) -> Callable[[np.ndarray], np.ndarray]:
+    # Linear chirp; the analytic phase lets us build an exact 16 kHz reference
+    rate = (end - start) / seconds
+    return lambda t: AMPLITUDE * np.sin(2 * np.pi * (start * t + 0.5 * rate * t * t))
+
+
+def fixtures(seconds: float) -> dict[str, tuple[Callable[[np.ndarray], np.ndarray], bool]]:
+    # name -> (signal function, whether it lies in the pass band)
+    # The sweep stops at 6 kHz: above that the anti-aliasing filter rolls off by design
+    return {
+        "tone_1k": (_tone(1000.0), True),
+        "sweep_100_6k": (_sweep(100.0, 6000.0, seconds), True),
+        "tone_11k_stopband": (_tone(11000.0), False),
+    }
+
+
+def _chunks(pcm: bytes, chunk_bytes: int) -> list[bytes]:
+    return [pcm[i:i + chunk_bytes] for i in range(0, len(pcm), chunk_bytes)]
+
+
+def run_lexy(chunks: list[bytes], rate: int) -> bytes:
+    resampler = StreamingResampler(rate, TARGET_RATE)
+    return b"".join(resampler.process(chunk) for chunk in chunks) + resampler.flush()
+
+
+def run_audioop_stateless(chunks: list[bytes], rate: int) -> bytes:
+    # The previous behaviour: fresh ratecv state for every chunk
+    return b"".join(audioop.ratecv(chunk, 2, 1, rate, TARGET_RATE, None)[0] for chunk in chunks)
+
+
+def run_audioop_stateful(chunks: list[bytes], rate: int) -> bytes:
+    state = None
+    output = []
+    for chunk in chunks:
+        data, state = audioop.ratecv(chunk, 2, 1, rate, TARGET_RATE, state)
+        output.append(data)
+    return b"".join(output)
+
+
+def accuracy(output: bytes, signal: Callable[[np.ndarray], np.ndarray], passband: bool) -> float:
+    # Pass band: SNR in dB against the exact signal, best alignment within +-4 samples
+    # Stop band: residual level in dB relative to the input (lower is better)
+    y = np.frombuffer(output, dtype=np.int16).astype(np.float64)
+    margin = 64
+    if not passband:
+        residual = y[margin:-margin]
+        return 10 * np.log10(np.mean(residual ** 2) / (AMPLITUDE ** 2 / 2) + 1e-20)
+
+    reference = signal(np.arange(len(y)) / TARGET_RATE)
+    best = -np.inf
+    for lag in range(-4, 5):
+        a = y[margin + lag:len(y) - margin + lag]
+        b = reference[margin:len(y) - margin]
+        error = np.mean((a - b) ** 2)
+        best = max(best, 10 * np.log10(np.mean(b ** 2) / (error + 1e-20)))
+    return best
+
+
+def run(seconds: float, chunk_ms: int) -> dict:
+    methods = {"lexy": run_lexy}
+    if HAVE_AUDIOOP:
+        methods["audioop_stateless"] = run_audioop_stateless
+        methods["audioop_stateful"] = run_audioop_stateful
+
+    results = []
+    for rate in INPUT_RATES:
+        t = np.arange(int(rate * seconds)) / rate
+        for name, (signal, passband) in fixtures(seconds).items():
+            pcm = np.clip(np.rint(signal(t)), -32768, 32767).astype(np.int16).tobytes()
+            chunks = _chunks(pcm, rate * chunk_ms // 1000 * 2)
+            for method, function in methods.items():
+                start = time.perf_counter()
+                output = function(chunks, rate)
+                elapsed = time.perf_counter() - start
+                results.append({
+                    "input_rate": rate,
+                    "fixture": name,
+                    "method": method,
+                    "realtime_x": round(seconds / elapsed, 1),
+                    "snr_db" if passband else "stopband_db": round(accuracy(output, signal, passband), 1),
+                    "output_samples": len(output) // 2,
+                })
+    return {"seconds": seconds, "chunk_ms": chunk_ms, "results": results}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    seconds, chunk_ms, json_path = 10.0, 20, None
+    i = 0
+    while i < len(argv):
+        if argv[i] == "--seconds" and i + 1 < len(argv):
+            seconds = float(argv[i + 1])
+            i += 1
+        elif argv[i] == "--chunk-ms" and i + 1 < len(argv):
+            chunk_ms = int(argv[i + 1])
+            i += 1
+        elif argv[i] == "--json" and i + 1 < len(argv):
+            json_path = argv[i + 1]
+            i += 1
+        else:
+            print(f"Unknown argument: {argv[i]}")
+            return 2
+        i += 1
+
+    report = run(seconds, chunk_ms)
+    for row in report["results"]:
+        quality = (f"SNR {row['snr_db']:6.1f} dB" if "snr_db" in row
+                   else f"stop {row['stopband_db']:6.1f} dB")
+        print(f"{row['input_rate']:>6} {row['fixture']:<18} {row['method']:<18} "
+              f"{row['realtime_x']:>8.1f}x  {quality}")
+    if audioop is None:
+        print("audioop is not available on this Python; compared lexy only")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# Soak test: replays fixtures for hours of audio at accelerated speed through one
+# long-lived transcriber and reports memory growth and latency drift per window
+#
+# Usage: python -m lexy.bench.soak [--hours H] [--window-minutes M] [--model PATH]
+#                                  [--mode listen|stream] [--speed X] [--recycle-minutes N]
+#                                  [--recycle-rss MB] [--json FILE] [FIXTURE.wav...]
+
+import json
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+
+from ..transcription.engine import TranscriptionEngine
+from ..transcription.health import RecyclePolicy, current_rss_mb
+from ..transcription.speech import SpeechTranscriber
+from .fakes import FakeMicrophone, FakeMicrophoneManager, StubEngine
+from .harness import Fixture, _percentile, _quiet, load_fixture, match_latencies, replay, synthetic_fixture
+
+
+def _slope_per_hour(hours: list[float], values: list[Optional[float]]) -> Optional[float]:
+    # Least-squares growth rate; the first window is warm-up and is left out
+    points = [(h, v) for h, v in zip(hours[1:], values[1:]) if v is not None]
+    if len(points) < 2:
+        return None
+    x, y = zip(*points)
+    return round(float(np.polyfit(x, y, 1)[0]), 3)
+
+
+def soak(fixtures: list[Fixture], engine: TranscriptionEngine, hours: float, window_minutes: float,
+         mode: str, speed: float = 0.0) -> dict:
+    # Replay the fixtures round-robin until `hours` of audio have gone through
+    with _quiet():
+        transcriber = SpeechTranscriber(
+            mic_manager=FakeMicrophoneManager(FakeMicrophone(fixtures[0].pcm, fixtures[0].sample_rate)),
+            transcription_engine=engine
+        )
+
+    windows: list[dict] = []
+    # Per-window series for the trend lines
+    hours_axis: list[float] = []
+    rss_series: list[Optional[float]] = []
+    p50s: list[Optional[float]] = []
+    audio_total = 0.0
+    window_target = window_minutes * 60
+    next_fixture = 0
+    while audio_total < hours * 3600:
+        latencies, utterances, results = [], 0, 0
+        window_audio = 0.0
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        while window_audio < window_target:
+            fixture = fixtures[next_fixture % len(fixtures)]
+            next_fixture += 1
+            microphone = FakeMicrophone(fixture.pcm, fixture.sample_rate, speed)
+            transcriber.mic_manager = FakeMicrophoneManager(microphone)
+            with _quiet():
+                emissions = replay(transcriber, microphone, mode)
+            audio_latencies, _ = match_latencies(fixture, emissions, microphone)
+            latencies.extend(audio_latencies)
+            utterances += len(fixture.utterance_ends)
+            results += len(emissions)
+            window_audio += microphone.duration
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        audio_total += window_audio
+
+        rss = current_rss_mb()
+        hours_axis.append(round(audio_total / 3600, 3))
+        rss_series.append(round(rss, 1) if rss is not None else None)
+        p50s.append(_percentile(latencies, 50))
+        windows.append({
+            "audio_hours": hours_axis[-1],
+            "rss_mb": rss_series[-1],
+            "latency_audio_ms": {"p50": p50s[-1], "p95": _percentile(latencies, 95)},
+            "real_time_factor": round(wall / window_audio, 4),
+            "cpu_per_audio_second": round(cpu / window_audio, 4),
+            "utterances": utterances,
+            "results": results,
+            "recognizer_recycles": engine.recycles,
+        })
+        print(f"{hours_axis[-1]:.2f}h audio: RSS {rss_series[-1]} MB, p50 latency {p50s[-1]} ms",
+              file=sys.stderr, flush=True)
+
+    return {
+        "windows": windows,
+        "rss_growth_mb_per_hour": _slope_per_hour(hours_axis, rss_series),
+        "latency_drift_ms_per_hour": _slope_per_hour(hours_axis, p50s),
+        "latency_p50_first_last_ms": [p50s[0], p50s[-1]] if p50s else None,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    hours, window_minutes, model_path, mode, speed, json_path = 1.0, 10.0, None, "stream", 0.0, None
+    recycle_minutes, recycle_rss = None, None
+    paths = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        options = ("--hours", "--window-minutes", "--model", "--mode", "--speed",
+                   "--recycle-minutes", "--recycle-rss", "--json")
+        if arg in options and i + 1 < len(argv):
+            value = argv[i + 1]
+            try:
+                if arg == "--hours":
+                    hours = float(value)
+                elif arg == "--window-minutes":
+                    window_minutes = float(value)
+                elif arg == "--model":
+                    model_path = value
+                elif arg == "--mode" and value in ("listen", "stream"):
+                    mode = value
+                elif arg == "--speed":
+                    speed = float(value)
+                elif arg == "--recycle-minutes":
+                    recycle_minutes = float(value)
+                elif arg == "--recycle-rss":
+                    recycle_rss = float(value)
+                elif arg == "--json":
+                    json_path = value
+                else:
+                    raise ValueError(value)
+            except ValueError:
+                print(f"Invalid value for {arg}: {value}")
+                return 2
+            i += 1
+        elif not arg.startswith("-"):
+            paths.append(arg)
+        else:
+            print(f"Unknown argument: {arg}")
+            return 2
+        i += 1
+
+    policy = RecyclePolicy(max_age_seconds=recycle_minutes * 60 if recycle_minutes else None,
+                           max_rss_mb=recycle_rss)
+    if model_path:
+        with _quiet():
+            engine = TranscriptionEngine(model_path, recycle_policy=policy)
+    else:
+        engine = StubEngine()
+        engine.recycle_policy = policy
+
+    fixtures = [load_fixture(path) for path in paths] or [synthetic_fixture()]
+    report = soak(fixtures, engine, hours, window_minutes, mode, speed)
+    report["config"] = {"engine": model_path or "stub", "hours": hours, "mode": mode,
+                        "recycle_minutes": recycle_minutes, "recycle_rss_mb": recycle_rss}
+    output = json.dumps(report, indent=2)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
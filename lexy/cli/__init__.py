@@ -1,6 +1,6 @@
 # CLI modules for Lexy
 
 from .parser import ArgumentParser
-from .commands import list_microphones
+from .commands import list_microphones, open_output, probe_devices, replay_archive, serve, start_metrics_export, transcribe_files
 
-__all__ = ['ArgumentParser', 'list_microphones']
\ No newline at end of file
+__all__ = ['ArgumentParser', 'list_microphones', 'open_output', 'probe_devices', 'replay_archive', 'serve', 'start_metrics_export', 'transcribe_files']
\ No newline at end of file
@@ -1,10 +1,226 @@
 # CLI command implementations for Lexy
+# Heavy audio and recognition modules are imported inside each command so that
+# importing this module (and running --help) stays cheap
 
-import speech_recognition as sr
+import atexit
+import json
+import sys
+import time
+from typing import TYPE_CHECKING, Iterator, Union
+
+from .parser import Config
+
+if TYPE_CHECKING:
+    from ..transcription.batch import FileResult
+    from ..transcription.output import SinkWriter
+
+
+def start_metrics_export(config: Config) -> None:
+    # Turn on instrumentation and export it to a file and/or a local HTTP endpoint
+    from ..metrics import MetricsFileWriter, metrics, start_http_server
+    
+    metrics.enable()
+    if config.metrics_file:
+        writer = MetricsFileWriter(metrics, config.metrics_file)
+        writer.start()
+        atexit.register(writer.stop)
+    if config.metrics_port:
+        start_http_server(metrics, config.metrics_port)
+        if config.debug:
+            print(f"Serving metrics at http://127.0.0.1:{config.metrics_port}/metrics")
+
+
+def open_output(config: Config) -> "SinkWriter":
+    # Start the writer thread feeding the configured output sinks
+    from ..transcription.output import SinkWriter, open_sink
+    
+    default_format = "jsonl" if config.events else "text"
+    try:
+        sinks = [open_sink(spec, default_format) for spec in config.sinks or ["stdout"]]
+    except OSError as e:
+        print(f"Error: cannot open output sink: {e}")
+        sys.exit(1)
+    return SinkWriter(sinks, fsync_interval=config.fsync_interval).start()
 
 
 def list_microphones() -> None:
     # List all available microphone devices
+    # Only needs PortAudio - no numpy, vosk or speech_recognition
+    from ..audio.backend import get_audio_backend
+    
     print("Available microphones:")
-    for index, name in enumerate(sr.Microphone.list_microphone_names()):
-        print(f"  {index}: {name}")
\ No newline at end of file
+    for index, name in enumerate(get_audio_backend().device_names()):
+        print(f"  {index}: {name}")
+
+
+def probe_devices(config: Config) -> None:
+    # Re-probe every input device and print its capability table
+    from ..audio.capabilities import TARGET_RATE, cache_path, probe_all_devices
+    
+    devices = probe_all_devices(config.debug)
+    for name, entry in devices.items():
+        mono_rates = [rate for rate, channels in entry["supported"] if channels == 1]
+        native = " (native 16kHz, no resampling)" if TARGET_RATE in mono_rates else ""
+        latency = entry["low_input_latency"]
+        latency_text = f", latency {latency * 1000:.1f}ms" if latency else ""
+        print(f"{name}: {entry['max_input_channels']} ch, mono rates "
+              f"{', '.join(map(str, mono_rates)) or 'none'}{latency_text}{native}")
+    print(f"Saved to {cache_path()}")
+
+
+def transcribe_files(config: Config) -> None:
+    # Transcribe recordings from disk and report throughput
+    from ..audio.files import expand_audio_paths
+    from ..transcription.batch import FileTranscriber
+    from ..transcription.engine import TranscriptionEngine
+    from ..transcription.pool import ParallelFileTranscriber
+    
+    def decode(paths: list[str]) -> "Iterator[FileResult]":
+        # The model is loaded here, so with a cache only runs that have misses load it
+        if config.jobs == 1 and not config.split_seconds:
+            engine = TranscriptionEngine(config.model_path, config.debug,
+                                         grammar_path=config.grammar_path)
+            transcriber = FileTranscriber(engine, raw_sample_rate=config.raw_sample_rate, debug=config.debug)
+            return (transcriber.transcribe_file(path) for path in paths)
+        pool = ParallelFileTranscriber(
+            config.model_path, config.jobs, config.raw_sample_rate,
+            max_worker_memory_mb=config.max_worker_memory_mb, debug=config.debug,
+            grammar_path=config.grammar_path, split_seconds=config.split_seconds
+        )
+        return pool.transcribe(paths)
+    
+    paths = expand_audio_paths(config.files)
+    start = time.perf_counter()
+    cache = None
+    if config.cache:
+        from ..transcription.cache import TranscriptCache, transcribe_cached
+        
+        cache = TranscriptCache(config.cache_path, config.cache_max_mb * 1024 * 1024)
+        results = transcribe_cached(paths, cache, decode, config.model_path, config.grammar_path,
+                                    config.raw_sample_rate, split_seconds=config.split_seconds)
+    else:
+        results = decode(paths)
+    
+    output = open(config.output_path, "w", encoding="utf-8") if config.output_path else None
+    total_audio = 0.0
+    try:
+        for result in results:
+            if output is not None:
+                record = {
+                    "path": result.path,
+                    "text": result.text,
+                    "audio_seconds": round(result.audio_seconds, 3),
+                    "elapsed_seconds": round(result.elapsed_seconds, 3),
+                    "rtf": round(result.real_time_factor, 4),
+                    "error": result.error,
+                    "cached": result.cached,
+                }
+                if result.utterances:
+                    record["utterances"] = [utterance.to_dict() for utterance in result.utterances]
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+            
+            print(f"=== {result.path}")
+            if result.error:
+                print(f"Error: {result.error}")
+                continue
+            if result.utterances:
+                for utterance in result.utterances:
+                    print(f"[{utterance.start:8.2f}-{utterance.end:8.2f}] {utterance.text}")
+            else:
+                print(result.text)
+            if result.cached:
+                print(f"({result.audio_seconds:.1f}s audio, cached)", flush=True)
+            else:
+                print(f"({result.audio_seconds:.1f}s audio in {result.elapsed_seconds:.2f}s, "
+                      f"RTF {result.real_time_factor:.3f}, {result.speedup:.1f}x real time)", flush=True)
+            total_audio += result.audio_seconds
+    finally:
+        if output is not None:
+            output.close()
+        if cache is not None:
+            cache.close()
+    
+    # Wall-clock totals include parallelism, so this is the real throughput
+    wall_time = time.perf_counter() - start
+    if len(paths) > 1 and wall_time > 0:
+        print(f"Total: {total_audio:.1f}s audio in {wall_time:.2f}s, "
+              f"RTF {wall_time / total_audio if total_audio else 0.0:.3f}, "
+              f"{total_audio / wall_time:.1f}x real time")
+
+
+def serve(config: Config) -> None:
+    # Accept PCM streams from local clients and reply with transcript events
+    import os
+    from ..readiness import ReadySignal
+    from ..transcription.server import RecognizerPool, TranscriptionServer, shared_model_engines
+    
+    size = config.max_clients or os.cpu_count() or 1
+    print(f"Loading model for {size} concurrent streams...", flush=True)
+    pool = RecognizerPool(size, shared_model_engines(config.model_path, config.debug,
+                                                     config.grammar_path))
+    
+    addresses: list[Union[tuple[str, int], str]] = []
+    if config.listen_address or not config.socket_path:
+        host, _, port = (config.listen_address or "2700").rpartition(":")
+        addresses.append((host or "127.0.0.1", int(port)))
+    if config.socket_path:
+        addresses.append(config.socket_path)
+    servers = [
+        TranscriptionServer(pool, address, config.raw_sample_rate, config.admission_timeout,
+                            debug=config.debug).start()
+        for address in addresses
+    ]
+    for server in servers:
+        where = server.address if isinstance(server.address, str) else "%s:%d" % server.address
+        print(f"Listening on {where}", flush=True)
+    
+    ready_signal = ReadySignal(config.ready_file)
+    ready_signal.notify()
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        print("\nStopping server...")
+    finally:
+        ready_signal.clear()
+        for server in servers:
+            server.stop()
+
+
+def replay_archive(config: Config) -> None:
+    # Re-run recognition over archived speech and show where it disagrees with what was
+    # transcribed live (e.g. after changing models or grammars)
+    import datetime
+    from ..transcription.archive import load_audio, read_index
+    from ..transcription.engine import TranscriptionEngine
+    from ..transcription.rescore import BackgroundRescorer, Segment
+    
+    archive_dir = config.archive_dir
+    assert archive_dir is not None, "the parser requires an archive for replay"
+    engine = TranscriptionEngine(config.model_path, config.debug, grammar_path=config.grammar_path)
+    decoder = BackgroundRescorer(config.model_path, config.debug, engine=engine)
+    output = open(config.output_path, "w", encoding="utf-8") if config.output_path else None
+    count = changed = 0
+    try:
+        for entry in read_index(archive_dir, config.since, config.until):
+            try:
+                pcm = load_audio(archive_dir, entry)
+            except (OSError, ValueError) as e:
+                print(f"Error: cannot read {entry.chunk}@{entry.offset}: {e}")
+                continue
+            segment = Segment(count + 1, entry.text, pcm, finalized_at=time.perf_counter())
+            text = decoder.rescore(segment).text
+            count += 1
+            changed += text != entry.text
+            stamp = datetime.datetime.fromtimestamp(entry.captured_at).isoformat(timespec="seconds")
+            print(f"[{stamp} {entry.stream}] {text}" +
+                  (f"  (live: {entry.text})" if text != entry.text else ""), flush=True)
+            if output is not None:
+                record = entry.to_dict()
+                record["replayed"] = text
+                output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+    print(f"Replayed {count} utterances, {changed} transcribed differently")
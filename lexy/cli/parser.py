@@ -1,17 +1,67 @@
 # Command line argument parser for Lexy
 
+import datetime
+import os
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
+from ..transcription.profiles import PROFILES
+
 
 @dataclass
 class Config:
     # Configuration class to hold parsed arguments
     debug: bool = False
     device_index: Optional[int] = None
+    # (device, channel) pairs when --device lists more than one source
+    devices: list[tuple[int, Optional[int]]] = field(default_factory=list)
+    decode_threads: Optional[int] = None
     model_path: str = "vosk-model-small-en-us-0.15"
+    rescore_model_path: Optional[str] = None
     list_mics: bool = False
+    probe_devices: bool = False
+    stream: bool = False
+    pipeline: bool = False
+    events: bool = False
+    grammar_path: Optional[str] = None
+    queue_size: int = 50
+    overflow_policy: str = "block"
+    vad: bool = True
+    vad_energy_ratio: float = 3.0
+    vad_hangover_ms: Optional[int] = None   # None: the latency profile's value
+    # Latency profile: a built-in name or a JSON file (see lexy/transcription/profiles.py)
+    profile: str = "balanced"
+    ready_file: Optional[str] = None
+    recycle_minutes: Optional[float] = None
+    recycle_rss_mb: Optional[float] = None
+    stall_timeout: float = 10.0
+    metrics_file: Optional[str] = None
+    metrics_port: Optional[int] = None
+    # Output sink specs (stdout, stdout:jsonl, jsonl:PATH, log:PATH, unix:PATH)
+    sinks: list[str] = field(default_factory=list)
+    fsync_interval: Optional[float] = None
+    # Speech archive written while transcribing, and read back by lexy replay
+    archive_dir: Optional[str] = None
+    archive_bucket_minutes: float = 60.0
+    since: Optional[float] = None
+    until: Optional[float] = None
+    command: Optional[str] = None
+    files: list[str] = field(default_factory=list)
+    raw_sample_rate: int = 16000
+    jobs: int = 1
+    output_path: Optional[str] = None
+    max_worker_memory_mb: Optional[int] = None
+    split_seconds: Optional[float] = None
+    # Transcript cache for lexy transcribe (path None = ~/.cache/lexy/transcripts.sqlite)
+    cache: bool = False
+    cache_path: Optional[str] = None
+    cache_max_mb: int = 256
+    # lexy serve: [HOST:]PORT and/or a Unix socket path
+    listen_address: Optional[str] = None
+    socket_path: Optional[str] = None
+    max_clients: Optional[int] = None
+    admission_timeout: float = 5.0
     show_help: bool = False
 
 
@@ -21,13 +71,101 @@ class ArgumentParser:
     def __init__(self):
         self.config = Config()
     
+    @staticmethod
+    def _parse_devices(value: str) -> list[tuple[int, Optional[int]]]:
+        # "1" -> [(1, None)]; "1,3" -> [(1, None), (3, None)]; "2:0,2:1" -> channels of device 2
+        devices = []
+        for item in value.split(","):
+            device, _, channel = item.strip().partition(":")
+            devices.append((int(device), int(channel) if channel else None))
+        return devices
+    
+    @staticmethod
+    def _parse_time(value: str) -> float:
+        # "2026-10-17T09:30" (local time) or Unix seconds -> Unix seconds
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.datetime.fromisoformat(value).timestamp()
+    
     def show_help(self) -> None:
         # Display help message
-        print("Usage: lexy.py [--debug|-d] [--large-model] [--device|-m INDEX] [--list-mics|-l]")
+        print("Usage: lexy.py [--debug|-d] [--large-model] [--device|-m INDEX[,INDEX...]] [--stream|-s] [--list-mics|-l]")
         print("  --debug, -d: Enable debug output")
         print("  --large-model: Use large, more accurate Vosk model (1.8GB)")
+        print("  --rescore: Transcribe live with the small model and re-decode each finished")
+        print("    utterance with the large model in the background, printing corrections")
+        print("  --rescore-model PATH: Model for the background pass (implies --rescore)")
         print("  --device, -m INDEX: Use specific microphone device by index")
+        print("    A comma-separated list (e.g. 1,3 or 2:0,2:1 for channels 0 and 1 of device 2)")
+        print("    transcribes every source at once, sharing one loaded model; it cannot be combined")
+        print("    with --stream, --pipeline, --events, --rescore, --recycle-minutes, --recycle-rss")
+        print("    or --stall-timeout")
+        print("  --decode-threads N: Threads decoding multiple sources (default: one per source)")
+        print("  --stream, -s: Capture continuously from one long-lived audio stream")
+        print("  --grammar FILE: Only recognize the phrases in FILE (one per line or a JSON list);")
+        print("    edits to FILE are applied live without reloading the model")
+        print("  --events: Print partial and final results with word timings as JSON lines")
+        print("  --sink SPEC: Where results go; repeat for several (default: stdout)")
+        print("    stdout, stdout:jsonl, jsonl:PATH, log:PATH (rotating text log) or unix:PATH")
+        print("  --fsync POLICY: fsync file sinks never (default), every batch, or every N seconds")
+        print("  --archive DIR: Keep the recognized speech, FLAC-compressed, in hourly chunk files")
+        print("    under DIR with an index of transcripts (see lexy.py replay)")
+        print("  --archive-bucket MINUTES: Start a new archive chunk file every MINUTES (default 60)")
+        print("  --pipeline: Run capture, VAD/resample and recognition on separate threads")
+        print("  --queue-size N: Chunks each pipeline queue can hold (default 50)")
+        print("  --overflow POLICY: What a full queue does: block, drop-oldest or coalesce")
+        print("  --no-vad: Send all audio to Vosk instead of only detected speech")
+        print("  --vad-threshold RATIO: Speech energy relative to the noise floor (default 3.0)")
+        print("  --vad-hangover MS: Keep decoding this long after speech stops (default: from profile)")
+        print("  --profile NAME|FILE: Capture and endpointing settings: low-latency, balanced")
+        print("    (default), throughput, or a JSON file such as one written by lexy.bench.autotune")
+        print("  --recycle-minutes N: Replace the recognizer (not the model) at the first pause")
+        print("    after it has decoded N minutes of audio")
+        print("  --recycle-rss MB: Replace the recognizer at a pause once RSS exceeds MB")
+        print("  --stall-timeout SECONDS: Reopen the microphone after this long without audio (default 10)")
+        print("    Multi-device capture (--device A,B) has no stall watchdog")
+        print("  --ready-file PATH: Create PATH once the model is loaded and audio is flowing")
+        print("    (systemd Type=notify services are also sent READY=1)")
+        print("  --metrics-file PATH: Write per-stage timings in Prometheus text format to PATH")
+        print("  --metrics-port PORT: Serve per-stage timings at http://127.0.0.1:PORT/metrics")
         print("  --list-mics, -l: List available microphones and exit")
+        print("  --probe-devices: Re-probe supported rates, channels and latency of every input")
+        print("    device and refresh the cached table (otherwise probed once per host)")
+        print()
+        print("Usage: lexy.py transcribe [--debug|-d] [--large-model] [--rate HZ] [--jobs|-j N]")
+        print("                          [--output|-o FILE] [--max-worker-memory MB] [--split SECONDS]")
+        print("                          [--cache] [--cache-file PATH] [--cache-size MB]")
+        print("                          FILE|DIR...")
+        print("  Transcribe WAV or raw 16-bit PCM files and report the real-time factor")
+        print("  --rate HZ: Sample rate of headerless PCM files (default 16000)")
+        print("  --jobs, -j N: Transcribe files in N worker processes (0 = one per CPU)")
+        print("  --output, -o FILE: Write ordered results to FILE as JSON lines")
+        print("  --max-worker-memory MB: Resident memory cap for each worker process (Linux)")
+        print("  --split SECONDS: Cut each file at pauses into spans of about SECONDS and decode")
+        print("    the spans in parallel; output carries per-utterance timestamps")
+        print("  --cache: Reuse transcripts of audio already decoded with the same model, grammar")
+        print("    and settings, without loading the model when every file is a hit")
+        print("  --cache-file PATH: Cache database, implies --cache (default ~/.cache/lexy/transcripts.sqlite)")
+        print("  --cache-size MB: Evict least recently used transcripts beyond MB (default 256)")
+        print()
+        print("Usage: lexy.py serve [--debug|-d] [--large-model] [--listen [HOST:]PORT] [--socket PATH]")
+        print("                     [--max-clients N] [--admission-timeout SECONDS] [--rate HZ]")
+        print("  Load the model once and transcribe 16-bit mono PCM streamed by clients, replying")
+        print("  with partial/final JSON lines (default: --listen 127.0.0.1:2700)")
+        print("  --listen [HOST:]PORT: Accept TCP connections (HOST defaults to 127.0.0.1)")
+        print("  --socket PATH: Accept connections on a Unix socket")
+        print("  --max-clients N: Recognizers in the pool, i.e. concurrent streams (default: one per CPU)")
+        print("  --admission-timeout SECONDS: How long a client waits for a free recognizer before")
+        print("    it is turned away (default 5)")
+        print("  --rate HZ: Sample rate clients send (default 16000)")
+        print()
+        print("Usage: lexy.py replay [--debug|-d] [--large-model] [--grammar FILE] [--since TIME]")
+        print("                      [--until TIME] [--output|-o FILE] DIR")
+        print("  Re-run recognition over speech archived with --archive and show where it differs")
+        print("  from the live transcript")
+        print("  --since, --until TIME: Only utterances in this range (ISO date/time or Unix seconds)")
+        print("  --output, -o FILE: Write each utterance's index entry and new transcript as JSON lines")
     
     def parse_args(self, args: Optional[list[str]] = None) -> Config:
         # Parse command line arguments and return configuration
@@ -35,32 +173,285 @@ class ArgumentParser:
             args = sys.argv[1:]
         
         i = 0
+        stall_timeout_given = False
+        if args and args[0] in ("transcribe", "serve", "replay"):
+            self.config.command = args[0]
+            i = 1
+        
         while i < len(args):
             arg = args[i]
             
             if arg == "--debug" or arg == "-d":
                 self.config.debug = True
+            elif arg == "--rescore":
+                self.config.rescore_model_path = self.config.rescore_model_path or "vosk-model-en-us-0.22"
+            elif arg == "--rescore-model":
+                if i + 1 < len(args):
+                    self.config.rescore_model_path = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --rescore-model requires a model path")
+                    sys.exit(1)
             elif arg == "--large-model":
                 self.config.model_path = "vosk-model-en-us-0.22"
+            elif arg == "--stream" or arg == "-s":
+                self.config.stream = True
+            elif arg == "--grammar":
+                if i + 1 < len(args):
+                    self.config.grammar_path = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --grammar requires a phrase list file")
+                    sys.exit(1)
+            elif arg == "--profile":
+                if i + 1 < len(args) and (args[i + 1] in PROFILES or os.path.isfile(args[i + 1])):
+                    self.config.profile = args[i + 1]
+                    i += 1
+                else:
+                    print(f"Error: --profile requires one of {', '.join(PROFILES)} or a profile file")
+                    sys.exit(1)
+            elif arg == "--events":
+                self.config.events = True
+            elif arg == "--pipeline":
+                self.config.pipeline = True
+            elif arg == "--queue-size":
+                if i + 1 < len(args) and args[i + 1].isdigit() and int(args[i + 1]) > 0:
+                    self.config.queue_size = int(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --queue-size requires a positive number")
+                    sys.exit(1)
+            elif arg == "--overflow":
+                if i + 1 < len(args) and args[i + 1] in ("block", "drop-oldest", "coalesce"):
+                    self.config.overflow_policy = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --overflow must be one of block, drop-oldest, coalesce")
+                    sys.exit(1)
+            elif arg == "--no-vad":
+                self.config.vad = False
+            elif arg == "--vad-threshold":
+                try:
+                    self.config.vad_energy_ratio = float(args[i + 1])
+                    i += 1
+                except (IndexError, ValueError):
+                    print("Error: --vad-threshold requires a number")
+                    sys.exit(1)
+            elif arg == "--vad-hangover":
+                if i + 1 < len(args) and args[i + 1].isdigit():
+                    self.config.vad_hangover_ms = int(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --vad-hangover requires a duration in milliseconds")
+                    sys.exit(1)
+            elif arg in ("--recycle-minutes", "--recycle-rss", "--stall-timeout"):
+                try:
+                    value = float(args[i + 1])
+                    if value <= 0:
+                        raise ValueError(value)
+                    i += 1
+                except (IndexError, ValueError):
+                    print(f"Error: {arg} requires a positive number")
+                    sys.exit(1)
+                if arg == "--recycle-minutes":
+                    self.config.recycle_minutes = value
+                elif arg == "--recycle-rss":
+                    self.config.recycle_rss_mb = value
+                else:
+                    self.config.stall_timeout = value
+                    stall_timeout_given = True
+            elif arg == "--ready-file":
+                if i + 1 < len(args):
+                    self.config.ready_file = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --ready-file requires a path")
+                    sys.exit(1)
+            elif arg == "--metrics-file":
+                if i + 1 < len(args):
+                    self.config.metrics_file = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --metrics-file requires a file path")
+                    sys.exit(1)
+            elif arg == "--sink":
+                kind, _, target = args[i + 1].partition(":") if i + 1 < len(args) else ("", "", "")
+                if (kind == "stdout" and target in ("", "text", "jsonl")) or (
+                        kind in ("jsonl", "log", "unix") and target):
+                    self.config.sinks.append(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --sink requires stdout[:jsonl], jsonl:PATH, log:PATH or unix:PATH")
+                    sys.exit(1)
+            elif arg == "--fsync":
+                try:
+                    interval = args[i + 1]
+                    if interval == "never":
+                        self.config.fsync_interval = None
+                    elif interval == "batch":
+                        self.config.fsync_interval = 0.0
+                    elif float(interval) >= 0:
+                        self.config.fsync_interval = float(interval)
+                    else:
+                        raise ValueError(interval)
+                    i += 1
+                except (IndexError, ValueError):
+                    print("Error: --fsync requires never, batch or a number of seconds")
+                    sys.exit(1)
+            elif arg == "--archive":
+                if i + 1 < len(args):
+                    self.config.archive_dir = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --archive requires a directory")
+                    sys.exit(1)
+            elif arg == "--archive-bucket":
+                try:
+                    self.config.archive_bucket_minutes = float(args[i + 1])
+                    if self.config.archive_bucket_minutes <= 0:
+                        raise ValueError(args[i + 1])
+                    i += 1
+                except (IndexError, ValueError):
+                    print("Error: --archive-bucket requires a positive number of minutes")
+                    sys.exit(1)
+            elif arg == "--metrics-port":
+                if i + 1 < len(args) and args[i + 1].isdigit():
+                    self.config.metrics_port = int(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --metrics-port requires a port number")
+                    sys.exit(1)
             elif arg == "--help" or arg == "-h":
                 self.config.show_help = True
                 return self.config
             elif arg == "--list-mics" or arg == "-l":
                 self.config.list_mics = True
                 return self.config
+            elif arg == "--probe-devices":
+                self.config.probe_devices = True
             elif arg == "--device" or arg == "-m":
                 if i + 1 < len(args):
                     try:
-                        self.config.device_index = int(args[i + 1])
+                        devices = self._parse_devices(args[i + 1])
                         i += 1  # Skip the next argument
                     except ValueError:
                         if self.config.debug:
                             print("Error: Device index must be a number")
                         sys.exit(1)
+                    if len(devices) == 1 and devices[0][1] is None:
+                        self.config.device_index = devices[0][0]
+                    else:
+                        self.config.devices = devices
                 else:
                     if self.config.debug:
                         print("Error: --device requires a microphone index")
                     sys.exit(1)
+            elif arg == "--decode-threads":
+                if i + 1 < len(args) and args[i + 1].isdigit() and int(args[i + 1]) > 0:
+                    self.config.decode_threads = int(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --decode-threads requires a positive number")
+                    sys.exit(1)
+            elif arg == "--rate" and self.config.command in ("transcribe", "serve"):
+                if i + 1 < len(args) and args[i + 1].isdigit():
+                    self.config.raw_sample_rate = int(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --rate requires a sample rate in Hz")
+                    sys.exit(1)
+            elif arg in ("--jobs", "-j") and self.config.command == "transcribe":
+                if i + 1 < len(args) and args[i + 1].isdigit():
+                    self.config.jobs = int(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --jobs requires a number of workers")
+                    sys.exit(1)
+            elif arg in ("--output", "-o") and self.config.command in ("transcribe", "replay"):
+                if i + 1 < len(args):
+                    self.config.output_path = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --output requires a file path")
+                    sys.exit(1)
+            elif arg == "--max-worker-memory" and self.config.command == "transcribe":
+                if i + 1 < len(args) and args[i + 1].isdigit():
+                    self.config.max_worker_memory_mb = int(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --max-worker-memory requires a size in MB")
+                    sys.exit(1)
+            elif arg == "--split" and self.config.command == "transcribe":
+                try:
+                    self.config.split_seconds = float(args[i + 1])
+                    if self.config.split_seconds <= 0:
+                        raise ValueError(args[i + 1])
+                    i += 1
+                except (IndexError, ValueError):
+                    print("Error: --split requires a positive number of seconds")
+                    sys.exit(1)
+            elif arg == "--cache" and self.config.command == "transcribe":
+                self.config.cache = True
+            elif arg == "--cache-file" and self.config.command == "transcribe":
+                if i + 1 < len(args):
+                    self.config.cache = True
+                    self.config.cache_path = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --cache-file requires a path")
+                    sys.exit(1)
+            elif arg == "--cache-size" and self.config.command == "transcribe":
+                if i + 1 < len(args) and args[i + 1].isdigit() and int(args[i + 1]) > 0:
+                    self.config.cache_max_mb = int(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --cache-size requires a size in MB")
+                    sys.exit(1)
+            elif arg == "--listen" and self.config.command == "serve":
+                if i + 1 < len(args) and args[i + 1].rpartition(":")[2].isdigit():
+                    self.config.listen_address = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --listen requires [HOST:]PORT")
+                    sys.exit(1)
+            elif arg == "--socket" and self.config.command == "serve":
+                if i + 1 < len(args):
+                    self.config.socket_path = args[i + 1]
+                    i += 1
+                else:
+                    print("Error: --socket requires a path")
+                    sys.exit(1)
+            elif arg == "--max-clients" and self.config.command == "serve":
+                if i + 1 < len(args) and args[i + 1].isdigit() and int(args[i + 1]) > 0:
+                    self.config.max_clients = int(args[i + 1])
+                    i += 1
+                else:
+                    print("Error: --max-clients requires a positive number")
+                    sys.exit(1)
+            elif arg == "--admission-timeout" and self.config.command == "serve":
+                try:
+                    self.config.admission_timeout = float(args[i + 1])
+                    if self.config.admission_timeout < 0:
+                        raise ValueError(args[i + 1])
+                    i += 1
+                except (IndexError, ValueError):
+                    print("Error: --admission-timeout requires a number of seconds")
+                    sys.exit(1)
+            elif arg in ("--since", "--until") and self.config.command == "replay":
+                try:
+                    value = self._parse_time(args[i + 1])
+                    i += 1
+                except (IndexError, ValueError):
+                    print(f"Error: {arg} requires an ISO date/time or Unix seconds")
+                    sys.exit(1)
+                if arg == "--since":
+                    self.config.since = value
+                else:
+                    self.config.until = value
+            elif self.config.command == "transcribe" and not arg.startswith("-"):
+                self.config.files.append(arg)
+            elif self.config.command == "replay" and not arg.startswith("-") and not self.config.archive_dir:
+                self.config.archive_dir = arg
             else:
                 print(f"Unknown argument: {arg}")
                 self.show_help()
@@ -68,4 +459,25 @@ class ArgumentParser:
             
             i += 1
         
+        if self.config.command == "transcribe" and not self.config.files:
+            print("Error: transcribe requires at least one file")
+            sys.exit(1)
+        if self.config.command == "replay" and not self.config.archive_dir:
+            print("Error: replay requires an archive directory")
+            sys.exit(1)
+        if self.config.devices and self.config.command is None:
+            # Multi-device capture has its own loop; these only apply to a single source
+            single_source = [flag for flag, given in (
+                ("--stream", self.config.stream),
+                ("--pipeline", self.config.pipeline),
+                ("--events", self.config.events),
+                ("--rescore", self.config.rescore_model_path is not None),
+                ("--recycle-minutes", self.config.recycle_minutes is not None),
+                ("--recycle-rss", self.config.recycle_rss_mb is not None),
+                ("--stall-timeout", stall_timeout_given),
+            ) if given]
+            if single_source:
+                print(f"Error: {', '.join(single_source)} cannot be used with several --device sources")
+                sys.exit(1)
+        
         return self.config
\ No newline at end of file
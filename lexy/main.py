@@ -1,7 +1,18 @@
 # Main entry point for Lexy speech transcription application
 
-from .cli import ArgumentParser, list_microphones
-from .transcription import SpeechTranscriber
+import sys
+from typing import TYPE_CHECKING, Optional
+
+from .cli import (ArgumentParser, list_microphones, open_output, probe_devices, replay_archive,
+                  serve, start_metrics_export, transcribe_files)
+from .cli.parser import Config
+
+if TYPE_CHECKING:
+    from .audio.vad import VADConfig
+    from .transcription import SpeechTranscriber
+    from .transcription.archive import SpeechArchive
+    from .transcription.output import SinkWriter
+    from .transcription.profiles import LatencyProfile
 
 
 def main() -> None:
@@ -19,15 +30,138 @@ def main() -> None:
         list_microphones()
         return
     
+    if config.probe_devices:
+        probe_devices(config)
+        return
+    
+    # Optional per-stage instrumentation for the recognition paths
+    if config.metrics_file or config.metrics_port:
+        start_metrics_export(config)
+    
+    if config.command == "transcribe":
+        transcribe_files(config)
+        return
+    
+    if config.command == "serve":
+        serve(config)
+        return
+    
+    if config.command == "replay":
+        replay_archive(config)
+        return
+    
     # Start main application
+    # Imported here so --help and --list-mics never load the recognition stack
+    from .audio.vad import VADConfig
+    from .transcription.profiles import load_profile
+    
+    try:
+        profile = load_profile(config.profile)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
     print(f"Starting Lexy Speech-to-Text Transcriber", flush=True)
     
+    vad_config = VADConfig(
+        energy_ratio=config.vad_energy_ratio,
+        hangover_ms=profile.vad_hangover_ms if config.vad_hangover_ms is None else config.vad_hangover_ms
+    )
+    # Results are written by a separate thread so slow output never stalls recognition
+    output = open_output(config)
+    archive = None
+    if config.archive_dir:
+        # Speech audio is compressed and written by its own thread, off the live path
+        from .transcription.archive import SpeechArchive
+        
+        archive = SpeechArchive(config.archive_dir, config.archive_bucket_minutes * 60,
+                                debug=config.debug).start()
+    try:
+        run_transcription(config, vad_config, output, archive, profile)
+    finally:
+        if archive is not None:
+            archive.stop()
+        output.close()
+
+
+def run_transcription(config: Config, vad_config: "VADConfig", output: "SinkWriter",
+                      archive: Optional["SpeechArchive"] = None,
+                      profile: Optional["LatencyProfile"] = None) -> None:
+    # Build the live transcriber(s) for the configuration and run until stopped
+    from .readiness import ReadySignal
+    from .transcription import RecyclePolicy, SpeechTranscriber
+    
+    ready_signal = ReadySignal(config.ready_file)
+    if config.devices:
+        # Several sources: one process, one model, a recognizer per source
+        from .transcription import MultiStreamTranscriber, StreamSpec
+        
+        try:
+            MultiStreamTranscriber(
+                [StreamSpec(device, channel) for device, channel in config.devices],
+                model_path=config.model_path,
+                workers=config.decode_threads,
+                vad_config=vad_config,
+                use_vad=config.vad,
+                frame_ms=profile.frame_ms if profile else 100,
+                debug=config.debug,
+                grammar_path=config.grammar_path,
+                output=output,
+                archive=archive,
+                on_ready=ready_signal.notify
+            ).run()
+        finally:
+            ready_signal.clear()
+        return
+    
+    recycle_policy = None
+    if config.recycle_minutes or config.recycle_rss_mb:
+        recycle_policy = RecyclePolicy(
+            max_age_seconds=config.recycle_minutes * 60 if config.recycle_minutes else None,
+            max_rss_mb=config.recycle_rss_mb
+        )
+    rescorer = None
+    if config.rescore_model_path:
+        # Two-pass mode: the large model runs on its own thread, off the live path
+        from .transcription import BackgroundRescorer
+        
+        rescorer = BackgroundRescorer(config.rescore_model_path, config.debug, output=output)
+        rescorer.start()
+    
     transcriber = SpeechTranscriber(
         debug=config.debug,
         device_index=config.device_index,
-        model_path=config.model_path
+        model_path=config.model_path,
+        vad_config=vad_config,
+        use_vad=config.vad,
+        grammar_path=config.grammar_path,
+        rescorer=rescorer,
+        on_ready=ready_signal.notify,
+        recycle_policy=recycle_policy,
+        stall_timeout=config.stall_timeout,
+        output=output,
+        archive=archive,
+        profile=profile
     )
-    transcriber.start_listening()
+    try:
+        run_transcriber(transcriber, config)
+    finally:
+        ready_signal.clear()
+        if rescorer is not None:
+            # Let the second pass catch up with what was already said
+            rescorer.stop()
+
+
+def run_transcriber(transcriber: "SpeechTranscriber", config: Config) -> None:
+    # Run the capture loop selected on the command line
+    if config.events:
+        transcriber.start_events()
+    elif config.pipeline:
+        transcriber.start_pipeline(config.queue_size, config.overflow_policy)
+    elif config.stream:
+        transcriber.start_streaming()
+    else:
+        transcriber.start_listening()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,240 @@
+# Optional hot-path instrumentation with Prometheus text-format export
+# Disabled by default; when disabled every hook is a shared no-op
+
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Union
+
+
+# Stage duration buckets in seconds, from sub-millisecond level math to slow decodes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: Optional[tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Counter:
+    # Monotonically increasing value
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    # Value that can go up and down (e.g. queue depth)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    # Cumulative-bucket histogram of observed durations
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Timer:
+    # Context manager that records its elapsed time into a histogram
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    # Shared no-op used while metrics are disabled
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+
+class _NullMetric:
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+_NULL_METRIC = _NullMetric()
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    # Named, optionally labelled counters, gauges and histograms
+
+    def __init__(self):
+        self.enabled = False
+        self._metrics: dict[tuple[str, Labels], Metric] = {}
+        self._help: dict[str, tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def _get(self, kind: str, name: str, help_text: str, labels: dict, factory):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = factory()
+                    self._help.setdefault(name, (kind, help_text))
+        return metric
+
+    def counter(self, name: str, help_text: str = "", **labels):
+        if not self.enabled:
+            return _NULL_METRIC
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name: str, help_text: str = "", **labels):
+        if not self.enabled:
+            return _NULL_METRIC
+        return self._get("gauge", name, help_text, labels, Gauge)
+
+    def histogram(self, name: str, help_text: str = "", **labels):
+        if not self.enabled:
+            return _NULL_METRIC
+        return self._get("histogram", name, help_text, labels, Histogram)
+
+    def time(self, stage: str):
+        # Time a pipeline stage: `with metrics.time("resample"): ...`
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram("lexy_stage_duration_seconds",
+                                     "Time spent in each processing stage", stage=stage))
+
+    def render(self) -> str:
+        # Prometheus text exposition format
+        lines = []
+        by_name: dict[str, list[tuple[Labels, Metric]]] = {}
+        for (name, labels), metric in sorted(self._metrics.items(), key=lambda item: item[0]):
+            by_name.setdefault(name, []).append((labels, metric))
+
+        for name, series in by_name.items():
+            kind, help_text = self._help[name]
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in series:
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, metric.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', repr(bound)))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {metric.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by all instrumentation hooks
+metrics = MetricsRegistry()
+
+
+class MetricsFileWriter:
+    # Periodically writes the registry to a file (node_exporter textfile collector style)
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float = 5.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lexy-metrics-file", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def write(self) -> None:
+        # Write atomically so scrapers never see a half-written file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.registry.render())
+        os.replace(temp_path, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self.write()
+        except OSError:
+            pass
+
+
+def start_http_server(registry: MetricsRegistry, port: int,
+                      host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    # Serve the registry at http://host:port/metrics from a daemon thread
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="lexy-metrics-http", daemon=True).start()
+    return server
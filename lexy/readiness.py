@@ -0,0 +1,52 @@
+# Signals that transcription is live: a ready file and/or systemd's sd_notify protocol
+
+import os
+import socket
+import time
+from typing import Optional
+
+
+def sd_notify(state: str) -> bool:
+    # Send a state string (e.g. "READY=1") to systemd if it is supervising us
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        # Abstract namespace socket
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(state.encode("utf-8"))
+        return True
+    except OSError:
+        return False
+
+
+class ReadySignal:
+    # Announces readiness once the model is loaded and audio is flowing
+    # The ready file holds the PID and the seconds taken to become ready; it is removed
+    # again on shutdown so a stale file never outlives the process
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.started_at = time.perf_counter()
+        self.ready_after: Optional[float] = None
+
+    def notify(self) -> None:
+        self.ready_after = time.perf_counter() - self.started_at
+        if self.path:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(f"{os.getpid()} {self.ready_after:.3f}\n")
+            os.replace(temp_path, self.path)
+        sd_notify(f"READY=1\nSTATUS=Transcribing ({self.ready_after:.1f}s to ready)")
+
+    def clear(self) -> None:
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        if self.ready_after is not None:
+            sd_notify("STOPPING=1")
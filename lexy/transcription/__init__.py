@@ -1,6 +1,51 @@
 # Transcription modules for Lexy
+# Submodules are imported on first attribute access so that importing the
+# package does not load vosk until a recognizer is actually needed
 
-from .engine import TranscriptionEngine
-from .speech import SpeechTranscriber
+import importlib
 
-__all__ = ['TranscriptionEngine', 'SpeechTranscriber']
\ No newline at end of file
+_EXPORTS = {
+    'TranscriptionEngine': '.engine',
+    'SpeechTranscriber': '.speech',
+    'FileTranscriber': '.batch',
+    'FileResult': '.batch',
+    'Utterance': '.batch',
+    'ParallelFileTranscriber': '.pool',
+    'TranscriptionPipeline': '.pipeline',
+    'BoundedQueue': '.pipeline',
+    'EventStream': '.events',
+    'TranscriptEvent': '.events',
+    'PartialEvent': '.events',
+    'FinalEvent': '.events',
+    'Word': '.events',
+    'MultiStreamTranscriber': '.multi',
+    'StreamSpec': '.multi',
+    'BackgroundRescorer': '.rescore',
+    'Segment': '.rescore',
+    'Correction': '.rescore',
+    'RecyclePolicy': '.health',
+    'CaptureWatchdog': '.health',
+    'TranscriptionServer': '.server',
+    'RecognizerPool': '.server',
+    'SinkWriter': '.output',
+    'TranscriptRecord': '.output',
+    'SpeechArchive': '.archive',
+    'ArchiveEntry': '.archive',
+    'TranscriptCache': '.cache',
+    'LatencyProfile': '.profiles',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    # Resolve exported names lazily (PEP 562)
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
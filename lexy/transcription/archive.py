@@ -0,0 +1,203 @@
+# Compressed archive of the speech the recognizer heard, for auditing and replay
+# Only the 16kHz PCM sent to Vosk is kept (the VAD has already dropped the silence).
+# Each utterance is encoded as its own FLAC stream and appended to the chunk file of
+# its time bucket; the bucket's index gets one JSON line per utterance with its byte
+# range and transcript. Encoding and disk writes happen on a background thread
+
+import glob
+import json
+import lzma
+import os
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import BinaryIO, Iterator, Optional, TextIO
+
+from ..metrics import metrics
+from .pipeline import BoundedQueue
+
+SAMPLE_RATE = 16000
+# Longest utterance a decoder buffers for the archive; older audio is trimmed
+MAX_UTTERANCE_BYTES = 30 * SAMPLE_RATE * 2
+_RAW_FLAGS = ["--force-raw-format", "--endian=little", "--sign=signed"]
+
+
+def flac_converter() -> Optional[str]:
+    # The FLAC encoder bundled with speech_recognition (or on PATH), if there is one
+    import speech_recognition as sr
+
+    try:
+        return sr.get_flac_converter()
+    except OSError:
+        return None
+
+
+def _run_flac(args: list[str], data: bytes, converter: Optional[str]) -> bytes:
+    converter = converter or flac_converter()
+    if converter is None:
+        raise OSError("no FLAC converter available")
+    return subprocess.run([converter, "--stdout", "--totally-silent", *args, *_RAW_FLAGS, "-"],
+                          input=data, capture_output=True, check=True).stdout
+
+
+def encode(pcm: bytes, codec: str, converter: Optional[str] = None) -> bytes:
+    # Compress 16kHz 16-bit mono PCM; "flac" is lossless and several times smaller for
+    # speech, "xz" is the fallback where no FLAC encoder is available
+    if codec == "flac":
+        return _run_flac(["--best", "--channels=1", "--bps=16", f"--sample-rate={SAMPLE_RATE}"],
+                         pcm, converter)
+    return lzma.compress(pcm)
+
+
+def decode(data: bytes, codec: str, converter: Optional[str] = None) -> bytes:
+    # Back to 16kHz 16-bit mono PCM
+    if codec == "flac":
+        return _run_flac(["--decode"], data, converter)
+    return lzma.decompress(data)
+
+
+@dataclass
+class ArchiveEntry:
+    # One archived utterance: where its audio is and what was transcribed from it
+    chunk: str              # Chunk file name within the archive directory
+    offset: int
+    length: int
+    codec: str
+    captured_at: float      # Wall-clock time the utterance was finalized (Unix seconds)
+    duration: float
+    text: str               # Empty when the recognizer found no words in the speech
+    stream: str = "default"
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["captured_at"] = round(self.captured_at, 3)
+        data["duration"] = round(self.duration, 3)
+        return data
+
+
+@dataclass
+class ArchivedSpeech:
+    # Queued utterance waiting for the writer thread
+    pcm: bytes
+    text: str
+    stream: str
+    captured_at: float
+    enqueued_at: float = 0.0             # Set by the archive queue
+
+    def release(self) -> None:
+        pass
+
+
+class SpeechArchive:
+    # Writer thread appending utterances to BUCKET.chunk / BUCKET.jsonl pairs, one pair
+    # per bucket_seconds of wall-clock time (named by the bucket's UTC start), so old
+    # audio can be pruned or copied off a file at a time
+    # A full queue drops its oldest utterances rather than hold up recognition
+    # (lexy_queue_dropped_total{queue="archive"})
+
+    def __init__(self, directory: str, bucket_seconds: float = 3600, codec: Optional[str] = None,
+                 queue_size: int = 100, debug: bool = False):
+        self.directory = directory
+        self.bucket_seconds = bucket_seconds
+        self.converter = flac_converter()
+        self.codec = codec or ("flac" if self.converter else "xz")
+        self.debug = debug
+        self.queue: BoundedQueue[ArchivedSpeech] = BoundedQueue("archive", queue_size, "drop-oldest")
+        self._bucket: Optional[str] = None
+        self._chunk: Optional[BinaryIO] = None
+        self._index: Optional[TextIO] = None
+        self._thread = threading.Thread(target=self._run, name="lexy-archive", daemon=True)
+
+    def start(self) -> "SpeechArchive":
+        os.makedirs(self.directory, exist_ok=True)
+        if self.debug:
+            print(f"Archiving speech to {self.directory} ({self.codec})")
+        self._thread.start()
+        return self
+
+    def submit(self, pcm: bytes, text: str, stream: str = "default") -> None:
+        # Queue a finished utterance; never blocks the live pass
+        if pcm:
+            self.queue.put(ArchivedSpeech(pcm, text, stream, time.time()))
+
+    def _open_bucket(self, captured_at: float) -> tuple[BinaryIO, TextIO]:
+        # Return the chunk and index files of the bucket covering captured_at
+        start = captured_at - captured_at % self.bucket_seconds
+        bucket = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(start))
+        if bucket != self._bucket or self._chunk is None or self._index is None:
+            self._close_bucket()
+            self._bucket = bucket
+            self._chunk = open(os.path.join(self.directory, f"{bucket}.chunk"), "ab")
+            self._index = open(os.path.join(self.directory, f"{bucket}.jsonl"), "a", encoding="utf-8")
+        return self._chunk, self._index
+
+    def _close_bucket(self) -> None:
+        for handle in (self._chunk, self._index):
+            if handle is not None:
+                handle.close()
+        self._bucket = self._chunk = self._index = None
+
+    def write(self, item: ArchivedSpeech) -> ArchiveEntry:
+        # Encode and append one utterance; the audio is on disk before the index names it
+        with metrics.time("archive_encode"):
+            data = encode(item.pcm, self.codec, self.converter)
+        chunk, index = self._open_bucket(item.captured_at)
+        offset = chunk.seek(0, os.SEEK_END)
+        chunk.write(data)
+        chunk.flush()
+        entry = ArchiveEntry(f"{self._bucket}.chunk", offset, len(data), self.codec, item.captured_at,
+                             len(item.pcm) / 2 / SAMPLE_RATE, item.text, item.stream)
+        index.write(json.dumps(entry.to_dict()) + "\n")
+        index.flush()
+        metrics.counter("lexy_archive_bytes_total", "Archived audio before and after compression",
+                        kind="pcm").inc(len(item.pcm))
+        metrics.counter("lexy_archive_bytes_total", "Archived audio before and after compression",
+                        kind="encoded").inc(len(data))
+        return entry
+
+    def _run(self) -> None:
+        try:
+            while True:
+                item = self.queue.get(timeout=0.5)
+                if item is None:
+                    if self.queue.closed:
+                        break
+                    continue
+                try:
+                    self.write(item)
+                except (OSError, subprocess.CalledProcessError) as e:
+                    metrics.counter("lexy_archive_errors_total", "Utterances that could not be archived").inc()
+                    if self.debug:
+                        print(f"\nCould not archive utterance: {e}")
+        finally:
+            self._close_bucket()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        # Write out what is queued (bounded by timeout), then close the files
+        self.queue.close()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+
+def read_index(directory: str, since: Optional[float] = None,
+               until: Optional[float] = None) -> Iterator[ArchiveEntry]:
+    # Archived utterances in time order, optionally limited to [since, until)
+    for path in sorted(glob.glob(os.path.join(directory, "*.jsonl"))):
+        with open(path, encoding="utf-8") as index:
+            for line in index:
+                try:
+                    entry = ArchiveEntry(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # A line cut short by a crash
+                if (since is None or entry.captured_at >= since) and (
+                        until is None or entry.captured_at < until):
+                    yield entry
+
+
+def load_audio(directory: str, entry: ArchiveEntry) -> bytes:
+    # The 16kHz PCM of one archived utterance
+    with open(os.path.join(directory, entry.chunk), "rb") as chunk:
+        chunk.seek(entry.offset)
+        data = chunk.read(entry.length)
+    return decode(data, entry.codec)
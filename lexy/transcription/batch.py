@@ -0,0 +1,111 @@
+# Offline transcription of recordings on disk
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ..audio.files import AudioFileReader
+from ..audio.resample import StreamingResampler
+from .engine import TranscriptionEngine
+
+
+@dataclass
+class Utterance:
+    # One final result with its position in the recording, in seconds
+    text: str
+    start: float
+    end: float
+
+    def to_dict(self) -> dict:
+        return {"text": self.text, "start": round(self.start, 3), "end": round(self.end, 3)}
+
+
+@dataclass
+class FileResult:
+    # Transcript and throughput figures for one file (or one span of it)
+    path: str
+    segments: list[str] = field(default_factory=list)
+    # Filled when the engine reports word timings (enable_words)
+    utterances: list[Utterance] = field(default_factory=list)
+    audio_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False    # Served from the transcript cache without decoding
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.segments)
+
+    @property
+    def real_time_factor(self) -> float:
+        # Processing time per second of audio (below 1.0 is faster than real time)
+        return self.elapsed_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    @property
+    def speedup(self) -> float:
+        # Seconds of audio transcribed per wall-clock second
+        return self.audio_seconds / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class FileTranscriber:
+    # Streams recordings from disk through a TranscriptionEngine in large chunks
+    # Bypasses the speech_recognition listen loop entirely
+
+    def __init__(self, engine: TranscriptionEngine, chunk_seconds: float = 2.0,
+                 raw_sample_rate: int = 16000, debug: bool = False):
+        self.engine = engine
+        self.chunk_seconds = chunk_seconds
+        self.raw_sample_rate = raw_sample_rate
+        self.debug = debug
+
+    def transcribe_file(self, path: str, start_frame: int = 0,
+                        end_frame: Optional[int] = None) -> FileResult:
+        # Decode one file (or the frames [start_frame, end_frame) of it) and collect its
+        # final segments; utterance times are absolute within the file
+        result = FileResult(path)
+        start = time.perf_counter()
+        time_base = 0.0
+        try:
+            with AudioFileReader(path, self.raw_sample_rate) as reader:
+                end_frame = reader.frame_count if end_frame is None else min(end_frame, reader.frame_count)
+                result.audio_seconds = max(0, end_frame - start_frame) / reader.sample_rate
+                # Word times count from the recognizer's first sample, which may predate this span
+                time_base = start_frame / reader.sample_rate - self.engine.recognizer_samples / 16000
+                resampler = None
+                if reader.sample_rate != 16000:
+                    resampler = StreamingResampler(reader.sample_rate)
+                for chunk in reader.chunks(self.chunk_seconds, start_frame, end_frame):
+                    if resampler is not None:
+                        chunk = resampler.process(chunk)
+                    self._decode(chunk, result, time_base)
+                if resampler is not None:
+                    self._decode(resampler.flush(), result, time_base)
+        except (OSError, ValueError) as e:
+            result.error = str(e)
+        finally:
+            # Always drain the recognizer so the next file starts clean
+            result_json = self.engine.finish()
+            if result_json and result.error is None:
+                self._collect(result_json, result, time_base)
+        result.elapsed_seconds = time.perf_counter() - start
+        return result
+
+    def _decode(self, chunk: bytes, result: FileResult, time_base: float) -> None:
+        # Feed one chunk and keep any utterance Vosk finalized
+        is_final, result_json = self.engine.decode(chunk)
+        if is_final and result_json:
+            self._collect(result_json, result, time_base)
+
+    def _collect(self, result_json: str, result: FileResult, time_base: float) -> None:
+        # Append a final result's text, and its span when word timings are present
+        final = json.loads(result_json)
+        text = self.engine.clean_text(final.get("text", ""))
+        if not text:
+            return
+        result.segments.append(text)
+        words = final.get("result")
+        if words:
+            result.utterances.append(Utterance(
+                text, time_base + words[0]["start"], time_base + words[-1]["end"]
+            ))
@@ -0,0 +1,195 @@
+# Content-addressed cache of file transcripts
+# A transcript is stored under a hash of the audio's PCM, the model (its path and the
+# checksum of every file in it), the grammar and the decoding settings, so re-running
+# a batch only decodes recordings whose audio or recognition setup actually changed.
+# Lookups happen before any model is loaded: a run made entirely of cache hits never
+# touches vosk. Entries live in one SQLite file and the least recently used are
+# evicted once the stored transcripts exceed max_bytes
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from ..audio.files import AudioFileReader
+from ..metrics import metrics
+from .batch import FileResult, Utterance
+
+# Bump when decoding changes in a way that alters transcripts for the same inputs
+CACHE_VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcripts_last_used ON transcripts (last_used);
+CREATE TABLE IF NOT EXISTS file_checksums (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+"""
+
+
+def cache_path() -> str:
+    # $LEXY_TRANSCRIPT_CACHE, else the XDG cache directory
+    if os.environ.get("LEXY_TRANSCRIPT_CACHE"):
+        return os.environ["LEXY_TRANSCRIPT_CACHE"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "lexy", "transcripts.sqlite")
+
+
+def _result_to_json(result: FileResult) -> str:
+    return json.dumps({
+        "segments": result.segments,
+        "utterances": [utterance.to_dict() for utterance in result.utterances],
+        "audio_seconds": result.audio_seconds,
+    })
+
+
+def _result_from_json(path: str, data: str) -> FileResult:
+    stored = json.loads(data)
+    return FileResult(path, stored["segments"], [Utterance(**utterance) for utterance in stored["utterances"]],
+                      stored["audio_seconds"], cached=True)
+
+
+class TranscriptCache:
+    # SQLite-backed store of FileResults keyed by content hash
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path or cache_path()
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(_SCHEMA)
+        self._checksums: dict[str, str] = {}
+
+    def close(self) -> None:
+        self._db.close()
+
+    def file_checksum(self, path: str) -> str:
+        # SHA-256 of a file, re-read only when its size or mtime has changed
+        stat = os.stat(path)
+        row = self._db.execute("SELECT size, mtime_ns, sha256 FROM file_checksums WHERE path = ?",
+                               (path,)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO file_checksums VALUES (?, ?, ?, ?)",
+                             (path, stat.st_size, stat.st_mtime_ns, digest.hexdigest()))
+        return digest.hexdigest()
+
+    def model_fingerprint(self, model_path: str) -> str:
+        # The model's identity: its path plus the checksum of every file under it
+        # Hashing a large model takes seconds, so checksums persist across runs
+        if model_path not in self._checksums:
+            digest = hashlib.sha256(model_path.encode())
+            root = os.path.abspath(model_path)
+            for directory, subdirectories, files in os.walk(root):
+                subdirectories.sort()
+                for name in sorted(files):
+                    path = os.path.join(directory, name)
+                    digest.update(f"\0{os.path.relpath(path, root)}\0{self.file_checksum(path)}".encode())
+            self._checksums[model_path] = digest.hexdigest()
+        return self._checksums[model_path]
+
+    def key(self, path: str, model_path: str, grammar_path: Optional[str] = None,
+            raw_sample_rate: int = 16000, **settings) -> str:
+        # Cache key for transcribing path with this model, grammar and settings
+        # (anything else that changes the output, e.g. chunk size or split length)
+        # Raises OSError/ValueError if the recording cannot be read
+        with AudioFileReader(path, raw_sample_rate) as reader:
+            audio = reader.digest()
+        identity = {
+            "version": CACHE_VERSION,
+            "audio": audio,
+            "model": self.model_fingerprint(model_path),
+            "grammar": self.file_checksum(os.path.abspath(grammar_path)) if grammar_path else None,
+            "settings": settings,
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str, path: str) -> Optional[FileResult]:
+        # The stored result for key, reported under path; None on a miss
+        row = self._db.execute("SELECT result FROM transcripts WHERE key = ?", (key,)).fetchone()
+        metrics.counter("lexy_transcript_cache_lookups_total", "Transcript cache lookups",
+                        outcome="hit" if row else "miss").inc()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute("UPDATE transcripts SET last_used = ? WHERE key = ?", (time.time(), key))
+        return _result_from_json(path, row[0])
+
+    def put(self, key: str, result: FileResult) -> None:
+        # Store a successful result, then evict least recently used entries over max_bytes
+        data = _result_to_json(result)
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?)",
+                             (key, data, len(data), time.time()))
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._db.execute(
+                "SELECT key, size FROM transcripts ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        metrics.counter("lexy_transcript_cache_evictions_total", "Transcripts evicted from the cache"
+                        ).inc(evicted)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+
+
+def transcribe_cached(paths: Iterable[str], cache: TranscriptCache,
+                      transcribe: Callable[[list[str]], Iterator[FileResult]],
+                      model_path: str, grammar_path: Optional[str] = None,
+                      raw_sample_rate: int = 16000, **settings) -> Iterator[FileResult]:
+    # Yield results in the order of paths, from the cache where possible
+    # transcribe() is only called - and so a model only loaded - for the misses
+    paths = list(paths)
+    keys: dict[str, Optional[str]] = {}
+    hits: dict[str, FileResult] = {}
+    for path in paths:
+        try:
+            key = cache.key(path, model_path, grammar_path, raw_sample_rate, **settings)
+        except (OSError, ValueError):
+            keys[path] = None   # Unreadable: let the transcriber report the error
+            continue
+        keys[path] = key
+        hit = cache.get(key, path)
+        if hit is not None:
+            hits[path] = hit
+
+    misses = [path for path in paths if path not in hits]
+    decoded = transcribe(misses) if misses else iter(())
+    for path in paths:
+        if path in hits:
+            yield hits[path]
+            continue
+        result = next(decoded)
+        result_key = keys[path]
+        if result.error is None and result_key is not None:
+            cache.put(result_key, result)
+        yield result
@@ -1,20 +1,89 @@
 # Vosk transcription engine wrapper
 
 import json
-import vosk
-from typing import Optional, Tuple
+import threading
+from typing import TYPE_CHECKING, Optional, Tuple
 from ..audio.utils import suppress_alsa_messages, restore_stderr
+from ..metrics import metrics
+from .grammar import GrammarFile, strip_unknown
+from .health import RecyclePolicy
+
+if TYPE_CHECKING:
+    import vosk
+
+
+def load_model(model_path: str, debug: bool = False) -> "vosk.Model":
+    # Load a Vosk model from disk (the expensive part of engine startup)
+    # vosk is imported here so engines built on stub recognizers never need it
+    import vosk
+    
+    if debug:
+        print(f"Loading Vosk model from: {model_path}")
+    return vosk.Model(model_path)
 
 
 class TranscriptionEngine:
     # Manages Vosk speech recognition engine
     
-    def __init__(self, model_path: str = "vosk-model-small-en-us-0.15", debug: bool = False):
+    def __init__(self, model_path: str = "vosk-model-small-en-us-0.15", debug: bool = False,
+                 model: Optional["vosk.Model"] = None, grammar_path: Optional[str] = None,
+                 background_load: bool = False, recycle_policy: Optional[RecyclePolicy] = None):
         self.model_path = model_path
         self.debug = debug
-        self.vosk_model = None
-        self.vosk_rec = None
-        self._initialize_vosk()
+        # An already-loaded model can be passed in to share it between engines
+        self.vosk_model = model
+        self.vosk_rec: Optional["vosk.KaldiRecognizer"] = None
+        self.words = False
+        # Optional phrase list constraining recognition; edits to the file are picked up live
+        self.grammar_file = GrammarFile(grammar_path) if grammar_path else None
+        self.grammar: Optional[list[str]] = self.grammar_file.phrases if self.grammar_file else None
+        # An edit picked up mid-utterance waits here for the next utterance boundary, so
+        # the audio the recognizer has already decoded is not thrown away
+        self._grammar_due: Optional[list[str]] = None
+        self._in_utterance = False
+        # Recognizer lifetime: audio fed overall and since the current recognizer was
+        # created (its word times count from there, and it is the recognizer's age for
+        # recycling), plus utterances decoded
+        self.recycle_policy = recycle_policy
+        self.samples_fed = 0
+        self.recognizer_started = 0
+        self.utterances = 0
+        self.recycles = 0
+        self._recycle_due: Optional[str] = None
+        # Where the last final result's last word ended, in samples fed (needs words)
+        self.last_word_end: Optional[int] = None
+        # Set once the recognizer exists; with background_load the model loads on a
+        # thread so callers can open the microphone meanwhile
+        self.ready = threading.Event()
+        self.load_error: Optional[Exception] = None
+        if background_load:
+            threading.Thread(target=self._load_in_background, name="lexy-model-load",
+                             daemon=True).start()
+        else:
+            self._initialize_vosk()
+            self.ready.set()
+    
+    def _load_in_background(self) -> None:
+        try:
+            with metrics.time("model_load"):
+                self._initialize_vosk()
+        except Exception as e:
+            self.load_error = e
+        finally:
+            self.ready.set()
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        # Block until the model is loaded; re-raises a background load failure
+        if not self.ready.wait(timeout):
+            return False
+        if self.load_error is not None:
+            raise self.load_error
+        return True
+    
+    def _recognizer(self) -> "vosk.KaldiRecognizer":
+        # The live recognizer; it exists once the model has loaded (see wait_ready)
+        assert self.vosk_rec is not None, "the model has not finished loading"
+        return self.vosk_rec
     
     def _initialize_vosk(self) -> None:
         # Initialize Vosk model and recognizer
@@ -24,38 +93,164 @@ class TranscriptionEngine:
             old_stderr = suppress_alsa_messages()
         
         try:
-            # Initialize Vosk model
-            if self.debug:
-                print(f"Loading Vosk model from: {self.model_path}")
-            self.vosk_model = vosk.Model(self.model_path)
-            self.vosk_rec = vosk.KaldiRecognizer(self.vosk_model, 16000)
+            # Initialize Vosk model unless one was shared with us
+            if self.vosk_model is None:
+                self.vosk_model = load_model(self.model_path, self.debug)
+            self.vosk_rec = self._create_recognizer()
         finally:
             # Restore stderr
             if not self.debug and old_stderr is not None:
                 restore_stderr(old_stderr)
     
-    def transcribe_audio(self, raw_data: bytes) -> Tuple[Optional[str], Optional[str]]:
-        # Transcribe raw audio data using Vosk
-        # Returns: (final_text, partial_text)
+    def _create_recognizer(self) -> "vosk.KaldiRecognizer":
+        # Build a fresh 16kHz recognizer on the loaded model
+        import vosk
+        
+        if self.grammar is not None:
+            recognizer = vosk.KaldiRecognizer(self.vosk_model, 16000, json.dumps(self.grammar))
+        else:
+            recognizer = vosk.KaldiRecognizer(self.vosk_model, 16000)
+        if self.words:
+            recognizer.SetWords(True)
+        return recognizer
+    
+    def set_grammar(self, phrases: Optional[list[str]]) -> None:
+        # Swap the vocabulary without reloading the model; None restores open vocabulary
+        # Only models with a dynamic graph (e.g. the small models) honour a grammar
+        # Takes effect at once; call at an utterance boundary
+        self.grammar = phrases
+        self._grammar_due = None
+        try:
+            if phrases is None:
+                raise AttributeError("SetGrammar cannot clear a grammar")
+            self._recognizer().SetGrammar(json.dumps(phrases))
+        except AttributeError:
+            # Older Vosk releases (and clearing) need a new recognizer on the same model
+            self._replace_recognizer()
+        metrics.counter("lexy_grammar_reloads_total", "Grammar swaps without a model reload").inc()
+        if self.debug:
+            print(f"\nGrammar updated: {len(phrases) if phrases else 0} phrases")
+    
+    def _replace_recognizer(self) -> None:
+        self.vosk_rec = self._create_recognizer()
+        self.recognizer_started = self.samples_fed
+        self.utterances = 0
+    
+    def recycle(self, reason: str = "manual") -> None:
+        # Swap in a fresh recognizer on the loaded model, releasing whatever state the
+        # old one accumulated; call at an utterance boundary
+        self._replace_recognizer()
+        self._recycle_due = None
+        self.recycles += 1
+        metrics.counter("lexy_recognizer_recycles_total", "Recognizers replaced on the same model",
+                        reason=reason).inc()
+        if self.debug:
+            print(f"\nRecycled recognizer ({reason})")
+    
+    @property
+    def recognizer_samples(self) -> int:
+        # Samples the current recognizer has been fed
+        return self.samples_fed - self.recognizer_started
+    
+    def _end_utterance(self) -> None:
+        # Utterance boundary: decide whether the recognizer is due for recycling; the
+        # swap itself happens before the next audio so this result's timings stay valid
+        self.utterances += 1
+        self._in_utterance = False
+        if self.recycle_policy is not None and self._recycle_due is None:
+            self._recycle_due = self.recycle_policy.reason(
+                self.recognizer_samples / 16000, self.utterances
+            )
+    
+    def _check_grammar(self) -> None:
+        # Pick up edits to the grammar file; the check is a stat at most once a second
+        if self.grammar_file is not None:
+            phrases = self.grammar_file.poll()
+            if phrases is not None:
+                self._grammar_due = phrases
+    
+    def clean_text(self, text: str) -> str:
+        # Normalize recognizer text; in grammar mode drop out-of-grammar speech
+        text = text.lower().strip()
+        return strip_unknown(text) if self.grammar is not None else text
+    
+    def enable_words(self) -> None:
+        # Ask the recognizer for per-word timings in final results (SetWords)
+        # Before the model has loaded, _create_recognizer applies it
+        self.words = True
+        if self.vosk_rec is not None:
+            self.vosk_rec.SetWords(True)
+    
+    def _note_word_end(self, result: dict) -> None:
+        # Word times count from when the current recognizer was created
+        words = result.get("result")
+        self.last_word_end = self.recognizer_started + round(words[-1]["end"] * 16000) if words else None
+    
+    def decode(self, raw_data: bytes) -> Tuple[bool, Optional[str]]:
+        # Feed audio and fetch only the result that is relevant now:
+        # Result() once an utterance is final, otherwise PartialResult()
+        # Returns: (is_final, result JSON) - JSON is None if the recognizer failed
+        self._check_grammar()
+        if self._grammar_due is not None and not self._in_utterance:
+            self.set_grammar(self._grammar_due)
+        if self._recycle_due is not None:
+            self.recycle(self._recycle_due)
+        try:
+            recognizer = self._recognizer()
+            with metrics.time("accept_waveform"):
+                is_final = recognizer.AcceptWaveform(raw_data)
+            self.samples_fed += len(raw_data) // 2
+            if not is_final:
+                self._in_utterance = True
+                return False, recognizer.PartialResult()
+            result_json = recognizer.Result()
+            self._end_utterance()
+            return True, result_json
+        except Exception as e:
+            metrics.counter("lexy_recognizer_errors_total", "Exceptions raised by the recognizer").inc()
+            if self.debug:
+                print(f"Speech recognition error: {e}")
+            return False, None
+    
+    def finish(self) -> Optional[str]:
+        # FinalResult() JSON for whatever audio is buffered; None if the recognizer failed
+        if self._recycle_due is not None:
+            self.recycle(self._recycle_due)
         try:
-            # Process audio with Vosk
-            if self.vosk_rec.AcceptWaveform(raw_data):
-                result = json.loads(self.vosk_rec.Result())
-                final_text = result.get('text', '').lower().strip()
-                
-                # Check for partial results
-                partial_result = json.loads(self.vosk_rec.PartialResult())
-                partial_text = partial_result.get('partial', '').lower().strip()
-                
-                return final_text if final_text else None, partial_text if partial_text else None
-            
-            # Only partial results available
-            partial_result = json.loads(self.vosk_rec.PartialResult())
-            partial_text = partial_result.get('partial', '').lower().strip()
-            
-            return None, partial_text if partial_text else None
-            
+            result_json = self._recognizer().FinalResult()
+            self._end_utterance()
+            return result_json
         except Exception as e:
+            metrics.counter("lexy_recognizer_errors_total", "Exceptions raised by the recognizer").inc()
             if self.debug:
                 print(f"Speech recognition error: {e}")
-            return None, None
\ No newline at end of file
+            return None
+    
+    def transcribe_audio(self, raw_data: bytes) -> Tuple[Optional[str], Optional[str]]:
+        # Transcribe raw audio data using Vosk
+        # Returns: (final_text, partial_text); a final result carries no partial, since
+        # the recognizer has just been reset for the next utterance
+        is_final, result_json = self.decode(raw_data)
+        if not result_json:
+            return None, None
+        
+        with metrics.time("result_parse"):
+            result = json.loads(result_json)
+        if is_final:
+            self._note_word_end(result)
+            final_text = self.clean_text(result.get('text', ''))
+            return final_text if final_text else None, None
+        
+        partial_text = self.clean_text(result.get('partial', ''))
+        return None, partial_text if partial_text else None
+    
+    def flush(self) -> Optional[str]:
+        # Force the recognizer to finalize whatever audio it has buffered
+        # Used at the end of a file or stream; also resets the recognizer for the next one
+        result_json = self.finish()
+        if not result_json:
+            return None
+        result = json.loads(result_json)
+        self._note_word_end(result)
+        final_text = self.clean_text(result.get('text', ''))
+        return final_text if final_text else None
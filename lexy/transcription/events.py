@@ -0,0 +1,138 @@
+# Streaming partial/final transcription events with word timings
+
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+
+from ..metrics import metrics
+from .engine import TranscriptionEngine
+from .grammar import UNKNOWN
+
+
+@dataclass
+class Word:
+    # One recognized word; times are seconds from the start of the event stream
+    word: str
+    start: float
+    end: float
+    conf: float = 1.0
+
+
+@dataclass
+class TranscriptEvent:
+    # Base for partial and final events
+    # offset: seconds of audio the stream had consumed when the event was emitted
+    # sequence: position of the event in the stream, strictly increasing
+    # utterance: index of the utterance the text belongs to
+    text: str
+    offset: float
+    sequence: int
+    utterance: int
+    words: list[Word] = field(default_factory=list)
+
+    is_final = False
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["type"] = "final" if self.is_final else "partial"
+        return data
+
+
+@dataclass
+class PartialEvent(TranscriptEvent):
+    # Current best guess for the utterance in progress; may still change
+    is_final = False
+
+
+@dataclass
+class FinalEvent(TranscriptEvent):
+    # Settled text for a finished utterance
+    is_final = True
+
+
+class EventStream:
+    # Feeds 16kHz PCM to an engine and turns recognizer output into events
+    # Partials are emitted only when their text changes, and JSON is parsed only for
+    # results that are actually new
+
+    def __init__(self, engine: TranscriptionEngine, words: bool = True,
+                 on_event: Optional[Callable[[TranscriptEvent], None]] = None):
+        self.engine = engine
+        self.words = words
+        self.on_event = on_event
+        self.samples = 0
+        self.sequence = 0
+        self.utterance = 0
+        self._last_partial_json = ""
+        self._last_partial = ""
+        if words:
+            engine.enable_words()
+
+    @property
+    def offset(self) -> float:
+        # Seconds of audio consumed so far
+        return self.samples / 16000
+
+    def _emit(self, event: TranscriptEvent, events: list[TranscriptEvent]) -> None:
+        self.sequence += 1
+        metrics.counter("lexy_events_total", "Transcript events emitted",
+                        type="final" if event.is_final else "partial").inc()
+        if self.on_event is not None:
+            self.on_event(event)
+        events.append(event)
+
+    def _final(self, result_json: Optional[str], events: list[TranscriptEvent]) -> None:
+        if not result_json:
+            return
+        with metrics.time("result_parse"):
+            result = json.loads(result_json)
+        text = self.engine.clean_text(result.get("text", ""))
+        self._last_partial_json = ""
+        self._last_partial = ""
+        if not text:
+            return
+        # Word times count from when the current recognizer was created (it may have
+        # been recycled or rebuilt for a new grammar since the stream began)
+        base = self.offset - self.engine.recognizer_samples / 16000
+        words = [Word(w["word"].lower(), round(base + w["start"], 3), round(base + w["end"], 3),
+                      w.get("conf", 1.0))
+                 for w in result.get("result", ()) if w["word"] != UNKNOWN]
+        self._emit(FinalEvent(text, self.offset, self.sequence, self.utterance, words), events)
+        self.utterance += 1
+
+    def _partial(self, partial_json: Optional[str], events: list[TranscriptEvent]) -> None:
+        # Vosk returns the same string while the hypothesis is unchanged; skip the parse
+        if not partial_json or partial_json == self._last_partial_json:
+            return
+        self._last_partial_json = partial_json
+        with metrics.time("result_parse"):
+            text = self.engine.clean_text(json.loads(partial_json).get("partial", ""))
+        if text and text != self._last_partial:
+            self._last_partial = text
+            self._emit(PartialEvent(text, self.offset, self.sequence, self.utterance), events)
+
+    def feed(self, pcm: bytes, speech_ended: bool = False) -> list[TranscriptEvent]:
+        # Decode a chunk; speech_ended finalizes the utterance (e.g. when the VAD closes)
+        events: list[TranscriptEvent] = []
+        if pcm:
+            is_final, result_json = self.engine.decode(pcm)
+            self.samples += len(pcm) // 2
+            if is_final:
+                self._final(result_json, events)
+            else:
+                self._partial(result_json, events)
+        if speech_ended and not (events and events[-1].is_final):
+            self._final(self.engine.finish(), events)
+        return events
+
+    def finish(self) -> list[TranscriptEvent]:
+        # End of input: finalize whatever the recognizer still holds
+        events: list[TranscriptEvent] = []
+        self._final(self.engine.finish(), events)
+        return events
+
+    def iter_events(self, chunks: Iterable[bytes]) -> Iterator[TranscriptEvent]:
+        # Generator form: decode every chunk and yield events as soon as they exist
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.finish()
@@ -0,0 +1,63 @@
+# Phrase lists for grammar-constrained recognition, reloaded when their file changes
+
+import json
+import os
+import time
+from typing import Optional
+
+
+# Vosk maps speech outside the grammar to this token instead of forcing a phrase
+UNKNOWN = "[unk]"
+
+
+def load_grammar(path: str) -> list[str]:
+    # Read phrases from a JSON array or a text file with one phrase per line
+    # (blank lines and lines starting with # are ignored)
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        phrases = [str(phrase) for phrase in json.loads(content)]
+    else:
+        phrases = [line.strip() for line in content.splitlines()]
+        phrases = [line for line in phrases if line and not line.startswith("#")]
+
+    phrases = [phrase.lower() for phrase in phrases]
+    if not phrases:
+        raise ValueError(f"Grammar file {path} contains no phrases")
+    if UNKNOWN not in phrases:
+        phrases.append(UNKNOWN)
+    return phrases
+
+
+class GrammarFile:
+    # A grammar on disk, polled at most every `interval` seconds for changes
+
+    def __init__(self, path: str, interval: float = 1.0):
+        self.path = path
+        self.interval = interval
+        self._mtime = os.stat(path).st_mtime_ns
+        self._next_check = time.monotonic() + interval
+        self.phrases = load_grammar(path)
+
+    def poll(self) -> Optional[list[str]]:
+        # New phrases if the file changed since the last load, otherwise None
+        now = time.monotonic()
+        if now < self._next_check:
+            return None
+        self._next_check = now + self.interval
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return None
+            phrases = load_grammar(self.path)
+        except (OSError, ValueError):
+            # Mid-write or invalid: keep the current grammar and try again later
+            return None
+        self._mtime = mtime
+        self.phrases = phrases
+        return phrases
+
+
+def strip_unknown(text: str) -> str:
+    # Drop the out-of-grammar token so only matched phrases are reported
+    return " ".join(word for word in text.split() if word != UNKNOWN)
@@ -0,0 +1,93 @@
+# Long-running health: recognizer recycling policy and a stalled-capture watchdog
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from ..metrics import metrics
+
+
+def current_rss_mb() -> Optional[float]:
+    # Resident set size right now (not the peak); None where it cannot be read cheaply
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class RecyclePolicy:
+    # When to replace the recognizer with a fresh one on the same model
+    # Checked only at utterance boundaries, so no audio is ever dropped mid-phrase; age
+    # is the audio the recognizer has decoded, which is what its state grows with
+    max_age_seconds: Optional[float] = None
+    max_utterances: Optional[int] = None
+    max_rss_mb: Optional[float] = None
+    # An RSS-triggered recycle that did not bring memory down must not repeat on
+    # every utterance
+    min_interval_seconds: float = 60.0
+
+    @property
+    def enabled(self) -> bool:
+        return any(limit is not None for limit in
+                   (self.max_age_seconds, self.max_utterances, self.max_rss_mb))
+
+    def reason(self, age: float, utterances: int) -> Optional[str]:
+        # Why the recognizer is due for recycling, or None if it is not
+        if self.max_utterances is not None and utterances >= self.max_utterances:
+            return "utterances"
+        if self.max_age_seconds is not None and age >= self.max_age_seconds:
+            return "age"
+        if self.max_rss_mb is not None and age >= self.min_interval_seconds:
+            rss = current_rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                return "rss"
+        return None
+
+
+class CaptureWatchdog:
+    # Calls on_stall from its own thread when kick() has not been called for `timeout`
+    # seconds, e.g. because a device read is hung; re-arms after each stall
+
+    def __init__(self, timeout: float, on_stall: Callable[[], None], name: str = "capture"):
+        self.timeout = timeout
+        self.on_stall = on_stall
+        self.name = name
+        self.stalls = 0
+        self._last_kick: Optional[float] = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lexy-watchdog-{name}", daemon=True)
+
+    def kick(self) -> None:
+        self._last_kick = time.monotonic()
+
+    def pause(self) -> None:
+        # Disarm until the next kick(), e.g. while the caller decodes rather than reads
+        self._last_kick = None
+
+    def start(self) -> "CaptureWatchdog":
+        self.kick()
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        interval = min(1.0, self.timeout / 4)
+        while not self._stop.wait(interval):
+            last_kick = self._last_kick
+            if last_kick is None or time.monotonic() - last_kick < self.timeout:
+                continue
+            self.stalls += 1
+            metrics.counter("lexy_capture_stalls_total", "Capture stalls detected by the watchdog",
+                            source=self.name).inc()
+            try:
+                self.on_stall()
+            except Exception:
+                pass
+            self.kick()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,249 @@
+# Several microphones or channels transcribed in one process on one shared model
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional, cast
+
+from ..audio.resample import StreamingResampler
+from ..audio.stream import CaptureStream
+from ..audio.vad import VADConfig, VoiceActivityDetector
+from ..metrics import metrics
+from .archive import MAX_UTTERANCE_BYTES, SpeechArchive
+from .engine import TranscriptionEngine, load_model
+from .output import SinkWriter, TranscriptRecord
+from .pipeline import BoundedQueue, Chunk, merge_chunks
+
+
+@dataclass
+class StreamSpec:
+    # One audio source: a device, optionally a single channel of it
+    device_index: Optional[int]
+    channel: Optional[int] = None
+
+    @property
+    def label(self) -> str:
+        device = "default" if self.device_index is None else str(self.device_index)
+        return device if self.channel is None else f"{device}:{self.channel}"
+
+
+class StreamDecoder:
+    # Per-stream VAD, resampler and recognizer; the recognizer shares the loaded model
+    # Only one worker decodes a given stream at a time, so no locking is needed here
+
+    def __init__(self, spec: StreamSpec, engine: TranscriptionEngine, sample_rate: int,
+                 vad_config: Optional[VADConfig] = None, use_vad: bool = True,
+                 queue_size: int = 50, policy: str = "drop-oldest",
+                 archive: Optional[SpeechArchive] = None):
+        self.spec = spec
+        self.label = spec.label
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self.vad = VoiceActivityDetector(sample_rate, vad_config or VADConfig()) if use_vad else None
+        self.resampler = StreamingResampler(sample_rate) if sample_rate != 16000 else None
+        self.queue: BoundedQueue[Chunk] = BoundedQueue(f"stream-{self.label}", queue_size, policy,
+                                                       merge=merge_chunks)
+        self.scheduled = False
+        self.archive = archive
+        self._utterance = bytearray()
+
+    def decode(self, pcm: bytes) -> list[str]:
+        # Gate, resample and decode one frame; returns the text of each utterance that
+        # ended in it (the VAD splits the frame where one ends)
+        if self.vad is None:
+            pieces = [(pcm, False)]
+        else:
+            with metrics.time("vad"):
+                pieces = self.vad.process(pcm).pieces()
+        texts = []
+        for piece, speech_ended in pieces:
+            text = self._decode_piece(piece, speech_ended)
+            if text:
+                texts.append(text)
+        return texts
+
+    def _decode_piece(self, pcm: bytes, speech_ended: bool) -> Optional[str]:
+        if pcm and self.resampler is not None:
+            with metrics.time("resample"):
+                pcm = self.resampler.process(pcm)
+
+        final_text = None
+        if pcm:
+            final_text, _ = self.engine.transcribe_audio(pcm)
+        if speech_ended and not final_text:
+            final_text = self.engine.flush()
+        if self.archive is not None:
+            self.archive_utterance(pcm, final_text, speech_ended)
+        return final_text
+
+    def archive_utterance(self, pcm: bytes, final_text: Optional[str], speech_ended: bool) -> None:
+        # Archive the stream's audio one utterance at a time, with the text it produced
+        assert self.archive is not None, "only called with an archive"
+        self._utterance += pcm
+        if len(self._utterance) > MAX_UTTERANCE_BYTES:
+            del self._utterance[:len(self._utterance) - MAX_UTTERANCE_BYTES]
+        if final_text or speech_ended:
+            self.archive.submit(bytes(self._utterance), final_text or "", self.label)
+            self._utterance.clear()
+
+
+class MultiStreamTranscriber:
+    # Transcribes several sources with one vosk.Model and one KaldiRecognizer each
+    # Every device is opened once (channels of one device share its stream); frames are
+    # decoded on a thread pool, which scales across cores because Vosk releases the GIL
+
+    def __init__(self, specs: list[StreamSpec], model_path: str = "vosk-model-small-en-us-0.15",
+                 workers: Optional[int] = None, vad_config: Optional[VADConfig] = None,
+                 use_vad: bool = True, frame_ms: int = 100, debug: bool = False,
+                 on_text: Optional[Callable[[str, str], None]] = None,
+                 grammar_path: Optional[str] = None, output: Optional[SinkWriter] = None,
+                 archive: Optional[SpeechArchive] = None,
+                 on_ready: Optional[Callable[[], None]] = None):
+        self.specs = specs
+        self.model_path = model_path
+        self.workers = workers or len(specs)
+        self.vad_config = vad_config
+        self.use_vad = use_vad
+        self.frame_ms = frame_ms
+        self.debug = debug
+        self.grammar_path = grammar_path
+        self.on_text = on_text or (lambda label, text: print(f"[TRANSCRIBED {label}]: {text}", flush=True))
+        # With an output writer, results become records tagged with the stream label
+        self.output = output
+        self.archive = archive
+        # Called once the model is loaded and every device is capturing
+        self.on_ready = on_ready
+        self.model = None
+        self.streams: list[CaptureStream] = []
+        self._decoders: dict[Optional[int], list[tuple[int, StreamDecoder]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._threads: list[threading.Thread] = []
+
+    def _open(self) -> None:
+        # Load the model once, then open each device with as many channels as requested
+        self.model = load_model(self.model_path, self.debug)
+        devices: dict[Optional[int], list[StreamSpec]] = {}
+        for spec in self.specs:
+            devices.setdefault(spec.device_index, []).append(spec)
+
+        for device_index, specs in devices.items():
+            channels = max((spec.channel or 0) for spec in specs) + 1
+            stream = CaptureStream(device_index, frame_ms=self.frame_ms, debug=self.debug,
+                                   channels=channels)
+            stream.start()
+            assert stream.sample_rate is not None, "start() settles the capture rate"
+            self.streams.append(stream)
+            self._decoders[device_index] = [
+                (spec.channel or 0, StreamDecoder(
+                    spec, TranscriptionEngine(self.model_path, self.debug, model=self.model,
+                                              grammar_path=self.grammar_path),
+                    stream.sample_rate, self.vad_config, self.use_vad, archive=self.archive
+                ))
+                for spec in specs
+            ]
+
+    def _capture(self, stream: CaptureStream) -> None:
+        # Split each device frame into its channels and queue them for decoding
+        decoders = self._decoders[stream.device_index]
+        sample_rate = stream.sample_rate
+        assert sample_rate is not None, "start() settles the capture rate"
+        while not self._stop.is_set():
+            with metrics.time("capture"):
+                frame = stream.read_frame(timeout=0.5)
+            if frame is None:
+                continue
+            channels = stream.split_channels(frame)
+            for channel, decoder in decoders:
+                decoder.queue.put(Chunk(channels[channel], sample_rate, captured_at=time.time()))
+                self._schedule(decoder)
+
+    def _schedule(self, decoder: StreamDecoder) -> None:
+        # Hand a stream to the pool unless a worker is already draining it
+        with self._lock:
+            if decoder.scheduled or self._executor is None:
+                return
+            decoder.scheduled = True
+        self._executor.submit(self._drain, decoder)
+
+    def _drain(self, decoder: StreamDecoder) -> None:
+        # Decode everything queued for one stream, in order
+        try:
+            while True:
+                chunk = decoder.queue.get(timeout=0)
+                if chunk is None:
+                    with self._lock:
+                        if len(decoder.queue) == 0:
+                            decoder.scheduled = False
+                            return
+                    continue
+                # Channel frames are split out as bytes, never pooled views
+                for text in decoder.decode(cast(bytes, chunk.pcm)):
+                    metrics.counter("lexy_transcripts_total", "Final transcripts produced",
+                                    stream=decoder.label).inc()
+                    self._emit(decoder.label, text, chunk.captured_at)
+        except Exception as e:
+            metrics.counter("lexy_recognizer_errors_total", "Exceptions raised by the recognizer").inc()
+            if self.debug:
+                print(f"\nStream {decoder.label} failed: {e}")
+            with self._lock:
+                decoder.scheduled = False
+
+    def _emit(self, label: str, text: str, captured_at: Optional[float] = None) -> None:
+        if self.output is None:
+            self.on_text(label, text)
+            return
+        latency = time.time() - captured_at if captured_at else None
+        self.output.emit(TranscriptRecord(text, stream=label, latency=latency))
+
+    def start(self) -> None:
+        self._open()
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="lexy-decode")
+        for stream in self.streams:
+            thread = threading.Thread(target=self._capture, args=(stream,),
+                                      name=f"lexy-capture-{stream.device_index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        labels = ", ".join(spec.label for spec in self.specs)
+        print(f"Transcribing {len(self.specs)} streams ({labels}) on {self.workers} decode threads",
+              flush=True)
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def stop(self) -> None:
+        # Stop capture, finish queued frames, then finalize every stream
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        for stream in self.streams:
+            stream.stop()
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=True)
+        for decoders in self._decoders.values():
+            for _, decoder in decoders:
+                # Late-queued frames may not have been scheduled once the pool closed
+                chunk = decoder.queue.get(timeout=0)
+                while chunk is not None:
+                    for text in decoder.decode(cast(bytes, chunk.pcm)):
+                        self._emit(decoder.label, text, chunk.captured_at)
+                    chunk = decoder.queue.get(timeout=0)
+                final_text = decoder.engine.flush()
+                if decoder.archive is not None:
+                    decoder.archive_utterance(b"", final_text, True)
+                if final_text:
+                    self._emit(decoder.label, final_text)
+
+    def run(self) -> None:
+        # Transcribe until Ctrl+C
+        print("Press Ctrl+C to stop transcription", flush=True)
+        try:
+            self.start()
+            while not self._stop.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            print("\\nStopping transcription...")
+        finally:
+            self.stop()
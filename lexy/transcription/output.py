@@ -0,0 +1,274 @@
+# Structured transcript records and the sinks they are written to
+# Records are handed to a writer thread, so a slow consumer (a piped stdout, a full
+# disk, a stuck socket reader) never stalls recognition
+
+import datetime
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional, TextIO
+
+from ..metrics import metrics
+from .pipeline import BoundedQueue
+
+
+@dataclass
+class TranscriptRecord:
+    # One line of output
+    # timestamp: wall-clock time the record was emitted (Unix seconds)
+    # latency: seconds from capturing the newest audio in the result to emitting it
+    text: str
+    type: str = "final"                  # final, partial or correction
+    stream: str = "default"              # Source the text came from (e.g. "2:1" for device 2, channel 1)
+    segment: Optional[int] = None        # ID corrections refer to (two-pass mode)
+    latency: Optional[float] = None
+    timestamp: float = field(default_factory=time.time)
+    extra: dict = field(default_factory=dict)   # Event fields such as word timings
+    enqueued_at: float = 0.0             # Set by the writer's queue
+
+    def release(self) -> None:
+        # Records hold no pooled buffers
+        pass
+
+    def to_dict(self) -> dict:
+        data = {"type": self.type, "stream": self.stream, "text": self.text,
+                "timestamp": round(self.timestamp, 3),
+                "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None}
+        if self.segment is not None:
+            data["segment"] = self.segment
+        data.update(self.extra)
+        return data
+
+    def to_text(self) -> str:
+        # The console format: [TRANSCRIBED]: text, [TRANSCRIBED 2:1]: text, [CORRECTED #4]: text
+        tag = {"final": "TRANSCRIBED", "correction": "CORRECTED"}.get(self.type, self.type.upper())
+        if self.stream != "default":
+            tag += f" {self.stream}"
+        if self.segment is not None:
+            tag += f" #{self.segment}"
+        return f"[{tag}]: {self.text}"
+
+    def to_log(self) -> str:
+        # A log line: ISO timestamp, stream, type, latency and text
+        stamp = datetime.datetime.fromtimestamp(self.timestamp).isoformat(timespec="milliseconds")
+        latency = f" {self.latency * 1000:.0f}ms" if self.latency is not None else ""
+        return f"{stamp} {self.stream} {self.type}{latency}: {self.text}"
+
+
+FORMATS = {
+    "jsonl": lambda record: json.dumps(record.to_dict()),
+    "text": TranscriptRecord.to_text,
+    "log": TranscriptRecord.to_log,
+}
+
+
+class Sink(ABC):
+    # A destination for records; the writer hands it whole batches of formatted lines
+
+    name = "sink"
+
+    def __init__(self, format: str = "jsonl"):
+        self.format = FORMATS[format]
+
+    @abstractmethod
+    def write(self, lines: list[str]) -> None:
+        ...
+
+    def flush(self, fsync: bool = False) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class StdoutSink(Sink):
+    name = "stdout"
+
+    def __init__(self, format: str = "text", stream: Optional[TextIO] = None):
+        super().__init__(format)
+        self.stream = stream or sys.stdout
+
+    def write(self, lines: list[str]) -> None:
+        self.stream.write("\n".join(lines) + "\n")
+
+    def flush(self, fsync: bool = False) -> None:
+        self.stream.flush()
+
+
+class FileSink(Sink):
+    # Appends to a file, one record per line
+
+    name = "file"
+
+    def __init__(self, path: str, format: str = "jsonl"):
+        super().__init__(format)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, lines: list[str]) -> None:
+        self._file.write("\n".join(lines) + "\n")
+
+    def flush(self, fsync: bool = False) -> None:
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class RotatingFileSink(FileSink):
+    # A log file that rolls over to PATH.1 ... PATH.backups once it reaches max_bytes
+
+    name = "log"
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 5,
+                 format: str = "log"):
+        super().__init__(path, format)
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def write(self, lines: list[str]) -> None:
+        super().write(lines)
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+
+class UnixSocketSink(Sink):
+    # Streams JSON lines to a listening Unix socket; while no reader is connected the
+    # lines are dropped (and counted) rather than buffered without bound
+
+    name = "unix"
+
+    def __init__(self, path: str, format: str = "jsonl", retry_seconds: float = 1.0):
+        super().__init__(format)
+        self.path = path
+        self.retry_seconds = retry_seconds
+        self.dropped = 0
+        self._sock: Optional[socket.socket] = None
+        self._next_attempt = 0.0
+
+    def _connect(self) -> Optional[socket.socket]:
+        if self._sock is None and time.monotonic() >= self._next_attempt:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+                self._sock = sock
+            except OSError:
+                sock.close()
+                self._next_attempt = time.monotonic() + self.retry_seconds
+        return self._sock
+
+    def write(self, lines: list[str]) -> None:
+        sock = self._connect()
+        if sock is None:
+            self.dropped += len(lines)
+            return
+        try:
+            sock.sendall(("\n".join(lines) + "\n").encode("utf-8"))
+        except OSError:
+            self.dropped += len(lines)
+            self.close()
+            self._next_attempt = time.monotonic() + self.retry_seconds
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def open_sink(spec: str, default_format: str = "text") -> Sink:
+    # stdout, stdout:jsonl, jsonl:PATH, log:PATH (rotating) or unix:PATH
+    kind, _, target = spec.partition(":")
+    if kind == "stdout":
+        return StdoutSink(target or default_format)
+    if kind == "jsonl" and target:
+        return FileSink(target)
+    if kind == "log" and target:
+        return RotatingFileSink(target)
+    if kind == "unix" and target:
+        return UnixSocketSink(target)
+    raise ValueError(f"Unknown output sink: {spec}")
+
+
+class SinkWriter:
+    # Writer thread between the recognizer and the sinks
+    # Whatever has queued up while the last batch was written goes out as the next
+    # batch (up to batch_size), so output is immediate when idle and batched under
+    # load. Files are flushed after every batch; fsync_interval None never fsyncs,
+    # 0 fsyncs every batch, N fsyncs at most every N seconds
+    # The queue drops its oldest records rather than block recognition once
+    # queue_size records are waiting (lexy_queue_dropped_total{queue="output"})
+
+    def __init__(self, sinks: list[Sink], batch_size: int = 64, fsync_interval: Optional[float] = None,
+                 queue_size: int = 10000):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.queue: BoundedQueue[TranscriptRecord] = BoundedQueue("output", queue_size, "drop-oldest")
+        self._last_fsync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="lexy-output", daemon=True)
+
+    def start(self) -> "SinkWriter":
+        self._thread.start()
+        return self
+
+    def emit(self, record: TranscriptRecord) -> None:
+        self.queue.put(record)
+
+    def _run(self) -> None:
+        while True:
+            record = self.queue.get(timeout=0.5)
+            if record is None:
+                if self.queue.closed:
+                    break
+                continue
+            batch = [record]
+            while len(batch) < self.batch_size:
+                record = self.queue.get(timeout=0)
+                if record is None:
+                    break
+                batch.append(record)
+            self._write(batch)
+
+    def _write(self, batch: list[TranscriptRecord]) -> None:
+        fsync = self.fsync_interval is not None and (
+            time.monotonic() - self._last_fsync >= self.fsync_interval
+        )
+        if fsync:
+            self._last_fsync = time.monotonic()
+        for sink in self.sinks:
+            try:
+                with metrics.time(f"output_{sink.name}"):
+                    sink.write([sink.format(record) for record in batch])
+                    sink.flush(fsync)
+                metrics.counter("lexy_output_records_total", "Records written by each sink",
+                                sink=sink.name).inc(len(batch))
+            except (OSError, ValueError):
+                # One failing sink must not stop the others
+                metrics.counter("lexy_output_errors_total", "Batches a sink failed to write",
+                                sink=sink.name).inc()
+
+    def close(self, timeout: float = 5.0) -> None:
+        # Write out everything still queued, then close the sinks
+        self.queue.close()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        for sink in self.sinks:
+            sink.close()
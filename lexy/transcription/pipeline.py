@@ -0,0 +1,311 @@
+# Threaded capture -> VAD/resample -> recognition pipeline with bounded queues
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Generic, Optional, Protocol, TypeVar, Union, cast
+
+from ..audio.buffers import Frame
+from ..metrics import metrics
+from .health import CaptureWatchdog
+
+if TYPE_CHECKING:
+    from ..audio.stream import CaptureStream
+    from .speech import SpeechTranscriber
+
+
+OVERFLOW_POLICIES = ("block", "drop-oldest", "coalesce")
+
+
+class Queueable(Protocol):
+    # What BoundedQueue needs from its items: a slot for the time it was queued
+    # (for the wait histogram) and a way to hand back pooled memory when dropped
+    enqueued_at: float
+
+    def release(self) -> None: ...
+
+
+T = TypeVar("T", bound=Queueable)
+
+
+@dataclass
+class Chunk:
+    # Audio moving between pipeline stages
+    # Capture chunks carry a view of a pooled frame, which goes back to the pool once
+    # the prepare stage is done with it
+    pcm: Union[bytes, memoryview]
+    sample_rate: int
+    speech_ended: bool = False
+    enqueued_at: float = 0.0
+    captured_at: float = 0.0    # Wall-clock time the newest audio in the chunk was read
+    frame: Optional[Frame] = None
+    # An utterance ended in dropped audio just before this chunk: finalize it first
+    flush_first: bool = False
+
+    def release(self) -> None:
+        if self.frame is not None:
+            self.frame.release()
+            self.frame = None
+
+
+def merge_chunks(older: Chunk, newer: Chunk) -> Optional[Chunk]:
+    # Coalesce two queued chunks into one so no audio is lost under overload
+    # Chunks on either side of an utterance end stay apart (None), or the next
+    # utterance's audio would be finalized with the previous one
+    if older.speech_ended or newer.flush_first:
+        return None
+    merged = Chunk(bytes(older.pcm) + bytes(newer.pcm), newer.sample_rate, newer.speech_ended,
+                   older.enqueued_at, newer.captured_at, flush_first=older.flush_first)
+    older.release()
+    newer.release()
+    return merged
+
+
+def carry_endpoint(dropped: Chunk, successor: Chunk) -> None:
+    # A dropped chunk that ended an utterance passes the end on, so the recognizer is
+    # still flushed before the audio that follows
+    if dropped.speech_ended or dropped.flush_first:
+        successor.flush_first = True
+
+
+class BoundedQueue(Generic[T]):
+    # Thread-safe bounded queue whose behaviour when full is set by policy:
+    #   block       - the producer waits for space (lossless, backpressure upstream)
+    #   drop-oldest - discard the oldest queued item (bounded latency, lossy)
+    #   coalesce    - merge into the newest queued item (lossless, fewer larger items);
+    #                 where merge refuses (returns None) the queue merges an older pair
+    #                 instead, and blocks if no pair can be merged or no merge is given
+    # on_drop(dropped, successor) lets a dropped item hand state to the next one
+
+    def __init__(self, name: str, maxsize: int, policy: str = "block",
+                 merge: Optional[Callable[[T, T], Optional[T]]] = None,
+                 on_drop: Optional[Callable[[T, T], None]] = None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.merge = merge
+        self.on_drop = on_drop
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._items: deque[T] = deque()
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: T) -> bool:
+        # Enqueue an item; returns False if the queue was closed
+        item.enqueued_at = time.perf_counter()
+        with self._cond:
+            while len(self._items) >= self.maxsize and not self.closed:
+                if self.policy == "drop-oldest":
+                    discarded = self._items.popleft()
+                    if self.on_drop is not None:
+                        self.on_drop(discarded, self._items[0] if self._items else item)
+                    discarded.release()
+                    self.dropped += 1
+                    metrics.counter("lexy_queue_dropped_total", "Chunks dropped by a full queue",
+                                    queue=self.name).inc()
+                elif self.policy == "coalesce" and self._coalesce(item):
+                    self.coalesced += 1
+                    metrics.counter("lexy_queue_coalesced_total", "Chunks merged into a full queue",
+                                    queue=self.name).inc()
+                    self._report_depth()
+                    self._cond.notify_all()
+                    return True
+                else:
+                    self._cond.wait()
+            if self.closed:
+                return False
+            self._items.append(item)
+            self._report_depth()
+            self._cond.notify_all()
+            return True
+
+    def _coalesce(self, item: T) -> bool:
+        # Merge item into the newest queued item; failing that, merge the newest adjacent
+        # queued pair that allows it and append item. False if nothing could be merged
+        if self.merge is None:
+            return False
+        merged = self.merge(self._items[-1], item)
+        if merged is not None:
+            self._items[-1] = merged
+            return True
+        for i in range(len(self._items) - 2, -1, -1):
+            merged = self.merge(self._items[i], self._items[i + 1])
+            if merged is not None:
+                self._items[i] = merged
+                del self._items[i + 1]
+                self._items.append(item)
+                return True
+        return False
+
+    def get(self, timeout: Optional[float] = None) -> Optional[T]:
+        # Dequeue the oldest item; None on timeout or once closed and drained
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._report_depth()
+            self._cond.notify_all()
+        metrics.histogram("lexy_queue_wait_seconds", "Time items spend queued",
+                          queue=self.name).observe(time.perf_counter() - item.enqueued_at)
+        return item
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def _report_depth(self) -> None:
+        metrics.gauge("lexy_queue_depth", "Items waiting in each queue",
+                      queue=self.name).set(len(self._items))
+
+
+class TranscriptionPipeline:
+    # Runs capture, VAD/resample and recognition on separate threads so a slow
+    # decode never stops the microphone from being read
+
+    def __init__(self, transcriber: "SpeechTranscriber", queue_size: int = 50, policy: str = "block",
+                 frame_ms: int = 100, on_text: Optional[Callable[[str, int], None]] = None):
+        self.transcriber = transcriber
+        self.frame_ms = frame_ms
+        self.on_text = on_text or transcriber.emit_transcript
+        self.capture_queue: BoundedQueue[Chunk] = BoundedQueue("capture", queue_size, policy,
+                                                               merge=merge_chunks)
+        self.speech_queue: BoundedQueue[Chunk] = BoundedQueue("speech", queue_size, policy,
+                                                              merge=merge_chunks,
+                                                              on_drop=carry_endpoint)
+        self.stream: Optional["CaptureStream"] = None
+        # The capture stage reopens the device when the watchdog sees no frames
+        self.watchdog = CaptureWatchdog(transcriber.stall_timeout, self._on_stall, "pipeline")
+        self._stalled = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self.error: Optional[Exception] = None
+
+    def _run_stage(self, name: str, target: Callable[[], None], inbox: Optional[BoundedQueue[Chunk]],
+                   outbox: Optional[BoundedQueue[Chunk]]) -> None:
+        # Wrap a stage so an unexpected error is reported (and re-raised by wait())
+        # instead of silently killing it; however the stage ends its output queue is
+        # closed so the next stage drains and finishes rather than polling forever
+        try:
+            target()
+        except Exception as e:
+            metrics.counter("lexy_pipeline_errors_total", "Unhandled errors in pipeline stages",
+                            stage=name).inc()
+            if self.transcriber.debug:
+                print(f"\nPipeline {name} stage failed: {e}")
+            self.error = self.error or e
+            self._stop.set()
+            # Nobody reads the input any more: release a producer blocked on it
+            if inbox is not None:
+                inbox.close()
+        finally:
+            if outbox is not None:
+                outbox.close()
+
+    def _start_stage(self, name: str, target: Callable[[], None], inbox: Optional[BoundedQueue[Chunk]],
+                     outbox: Optional[BoundedQueue[Chunk]]) -> None:
+        thread = threading.Thread(target=self._run_stage, args=(name, target, inbox, outbox),
+                                  name=f"lexy-{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _capture(self) -> None:
+        # Move frames from the device ring buffer into the pipeline as fast as they arrive
+        stream = self.stream
+        assert stream is not None and stream.sample_rate is not None, "start() opens the stream"
+        sample_rate = stream.sample_rate
+        while not self._stop.is_set():
+            if self._stalled.is_set():
+                self._stalled.clear()
+                stream.stop()
+                stream.start()
+            with metrics.time("capture"):
+                frame = stream.read_pooled(timeout=0.5)
+            if frame is None:
+                continue
+            self.watchdog.kick()
+            if not self.capture_queue.put(Chunk(frame.view, sample_rate, captured_at=time.time(),
+                                                frame=frame)):
+                break
+
+    def _on_stall(self) -> None:
+        # Watchdog thread: only flag the stall, the capture stage owns the stream
+        if self.transcriber.debug:
+            print(f"\nNo audio for {self.watchdog.timeout:.0f}s - reopening the microphone")
+        self._stalled.set()
+
+    def _prepare(self) -> None:
+        while True:
+            chunk = self.capture_queue.get(timeout=0.5)
+            if chunk is None:
+                if self.capture_queue.closed:
+                    break
+                continue
+            try:
+                prepared = self.transcriber.prepare_audio(chunk.pcm, chunk.sample_rate)
+            finally:
+                chunk.release()
+            if not all(self.speech_queue.put(Chunk(pcm, 16000, speech_ended, captured_at=chunk.captured_at))
+                       for pcm, speech_ended in prepared):
+                break
+
+    def _recognize(self) -> None:
+        while True:
+            chunk = self.speech_queue.get(timeout=0.5)
+            if chunk is None:
+                if self.speech_queue.closed:
+                    break
+                continue
+            if chunk.flush_first:
+                # The end of the previous utterance was dropped under overload
+                for text, segment in self.transcriber.decode_audio(b"", True, chunk.captured_at):
+                    self.on_text(text, segment)
+            # prepare_audio has already copied capture views out to bytes
+            pcm = cast(bytes, chunk.pcm)
+            for text, segment in self.transcriber.decode_audio(pcm, chunk.speech_ended, chunk.captured_at):
+                self.on_text(text, segment)
+
+        # Input is exhausted - emit whatever the recognizer still holds
+        for text, segment in self.transcriber.decode_audio(b"", speech_ended=True):
+            self.on_text(text, segment)
+
+    def start(self) -> None:
+        # Open the device and start all stage threads
+        # PortAudio is imported here: the queues above are also used off the capture path
+        from ..audio.stream import CaptureStream
+
+        self.stream = CaptureStream(self.transcriber.mic_manager.device_index,
+                                    frame_ms=self.frame_ms, debug=self.transcriber.debug)
+        self.stream.start()
+        self._start_stage("capture", self._capture, None, self.capture_queue)
+        self._start_stage("prepare", self._prepare, self.capture_queue, self.speech_queue)
+        self._start_stage("recognize", self._recognize, self.speech_queue, None)
+        self.watchdog.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        # Stop capturing, let queued audio drain through recognition, then close the device
+        self._stop.set()
+        self.watchdog.stop()
+        for thread in self._threads:
+            thread.join(timeout)
+        if self.stream is not None:
+            self.stream.stop()
+        self.capture_queue.close()
+        self.speech_queue.close()
+
+    def wait(self) -> None:
+        # Block until a stage fails (or forever) and re-raise its error, or the model's
+        # load failure; Ctrl+C interrupts
+        while not self._stop.wait(0.5):
+            self.transcriber.check_model()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,275 @@
+# Process-pool transcription of many recordings, or of one long recording split at
+# its pauses
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.context import BaseContext
+from multiprocessing.sharedctypes import SynchronizedArray
+from typing import Iterable, Iterator, Optional, Sequence
+
+from ..audio.files import AudioFileReader
+from ..audio.silence import split_spans
+from ..audio.utils import suppress_alsa_messages, restore_stderr
+from .batch import FileResult, FileTranscriber
+from .engine import TranscriptionEngine, load_model
+from .health import current_rss_mb
+
+# How often a worker compares its RSS with --max-worker-memory
+MEMORY_POLL_SECONDS = 0.1
+
+# Slot values in the table of what each worker is running: a task index, IDLE, or
+# CAPPED - task once the worker was stopped for exceeding its memory cap on that task
+IDLE = -1
+CAPPED = -2
+
+# Per-process state created once by the pool initializer
+_worker_transcriber: Optional[FileTranscriber] = None
+# Shared table of each worker's current task
+_worker_tasks: Optional["SynchronizedArray[int]"] = None
+_worker_slot = 0
+_worker_finished = 0        # Tasks this worker has completed
+
+
+def _init_worker(model_path: str, raw_sample_rate: int, chunk_seconds: float,
+                 max_memory_mb: Optional[int], debug: bool, grammar_path: Optional[str],
+                 words: bool, model, tasks, next_slot) -> None:
+    # Runs once in each worker: load (or, forked, inherit) the model and start the
+    # memory watch
+    global _worker_transcriber, _worker_tasks, _worker_slot
+    with next_slot.get_lock():
+        _worker_slot = next_slot.value
+        next_slot.value += 1
+    _worker_tasks = tasks
+    engine = TranscriptionEngine(model_path, debug, model=model, grammar_path=grammar_path)
+    if words:
+        engine.enable_words()
+    _worker_transcriber = FileTranscriber(engine, chunk_seconds, raw_sample_rate, debug)
+    signal.signal(signal.SIGTERM, _on_terminate)
+    if max_memory_mb and current_rss_mb() is not None:
+        threading.Thread(target=_watch_memory, args=(max_memory_mb,), name="lexy-memory-cap",
+                         daemon=True).start()
+
+
+def _watch_memory(max_memory_mb: int) -> None:
+    # Stop the worker once its resident memory (including the model pages it shares)
+    # passes the cap. Kaldi aborts the process when an allocation fails, so an rlimit
+    # cannot turn into a clean per-file error; instead the task running at the time is
+    # marked so the parent fails that file alone and restarts the pool for the rest
+    tasks = _worker_tasks
+    assert tasks is not None, "set by _init_worker"
+    while True:
+        time.sleep(MEMORY_POLL_SECONDS)
+        rss = current_rss_mb()
+        if rss is None or rss <= max_memory_mb:
+            continue
+        with tasks.get_lock():
+            task = tasks[_worker_slot]
+            if task == IDLE and not _worker_finished:
+                continue    # The model alone is over the cap; blame the first task instead
+            if task != IDLE:
+                tasks[_worker_slot] = CAPPED - task
+        # Between tasks, memory kept from earlier files: retire so a fresh worker takes over
+        os._exit(1)
+
+
+def _on_terminate(signum, frame) -> None:
+    # The pool stops every worker once one has died; clear this worker's task so only
+    # the one that died is blamed
+    tasks = _worker_tasks
+    assert tasks is not None, "set by _init_worker"
+    with tasks.get_lock():
+        if tasks[_worker_slot] >= 0:
+            tasks[_worker_slot] = IDLE
+    os._exit(1)
+
+
+def _transcribe_in_worker(task: int, path: str, start_frame: int = 0,
+                          end_frame: Optional[int] = None) -> FileResult:
+    # Each file (or span) gets a fresh recognizer state on the worker's shared model
+    global _worker_finished
+    tasks, transcriber = _worker_tasks, _worker_transcriber
+    assert tasks is not None and transcriber is not None, "set by _init_worker"
+    with tasks.get_lock():
+        tasks[_worker_slot] = task
+    try:
+        return transcriber.transcribe_file(path, start_frame, end_frame)
+    except MemoryError:
+        return FileResult(path, error="worker ran out of memory")
+    finally:
+        with tasks.get_lock():
+            tasks[_worker_slot] = IDLE
+        _worker_finished += 1
+
+
+def stitch_results(path: str, parts: list[FileResult], audio_seconds: float,
+                   elapsed_seconds: float) -> FileResult:
+    # Join span results (already in recording order) into one result for the file
+    result = FileResult(path, audio_seconds=audio_seconds, elapsed_seconds=elapsed_seconds)
+    for part in parts:
+        result.segments.extend(part.segments)
+        result.utterances.extend(part.utterances)
+        if part.error and result.error is None:
+            result.error = part.error
+    return result
+
+
+class _RestartingPool:
+    # ProcessPoolExecutor over a fixed list of tasks that outlives its workers: when one
+    # dies (memory cap, a Kaldi abort, the OOM killer) finished results are kept, the
+    # task that worker was running fails, and everything else is resubmitted to a
+    # fresh pool. A task whose worker died for a reason other than the memory cap
+    # gets one more try before it is reported as failed
+
+    def __init__(self, transcriber: "ParallelFileTranscriber", context, workers: int,
+                 tasks: list[tuple[str, tuple[int, Optional[int]]]]):
+        self.transcriber = transcriber
+        self.context = context
+        self.workers = workers
+        self.tasks = tasks
+        self.results: dict[int, FileResult] = {}
+        self.suspected: set[int] = set()
+        self.restarts = 0
+        self._start(range(len(tasks)))
+
+    def _start(self, pending: Iterable[int]) -> None:
+        t = self.transcriber
+        self.table = self.context.Array("i", [IDLE] * self.workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=self.context, initializer=_init_worker,
+            initargs=(t.model_path, t.raw_sample_rate, t.chunk_seconds, t.max_worker_memory_mb,
+                      t.debug, t.grammar_path, bool(t.split_seconds), t.inherited_model(self.context),
+                      self.table, self.context.Value("i", 0))
+        )
+        self.futures: dict[int, Future] = {
+            task: self.executor.submit(_transcribe_in_worker, task, path, *span)
+            for task, (path, span) in ((task, self.tasks[task]) for task in pending)
+        }
+
+    def result(self, task: int) -> FileResult:
+        # The result of one task, restarting the pool as often as its workers die
+        while task not in self.results:
+            try:
+                self.results[task] = self.futures[task].result()
+            except BrokenProcessPool:
+                self._restart()
+        return self.results.pop(task)
+
+    def _restart(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for task, future in self.futures.items():
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.results.setdefault(task, future.result())
+        capped = {CAPPED - slot for slot in self.table if slot <= CAPPED}
+        running = {slot for slot in self.table if slot >= 0}
+        self.restarts += 1
+        # Workers that die before finishing anything would otherwise restart forever
+        give_up = self.restarts > 2 * len(self.tasks) + 2
+        pending = []
+        for task in self.futures:
+            if task in self.results:
+                continue
+            path = self.tasks[task][0]
+            if task in capped:
+                limit = self.transcriber.max_worker_memory_mb
+                self.results[task] = FileResult(path, error=f"worker exceeded its {limit}MB memory cap")
+            elif give_up or (task in running and task in self.suspected):
+                self.results[task] = FileResult(path, error="worker process died")
+            else:
+                if task in running:
+                    self.suspected.add(task)
+                pending.append(task)
+        if self.transcriber.debug:
+            print(f"Worker process died; restarting the pool for {len(pending)} remaining tasks")
+        self._start(pending)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ParallelFileTranscriber:
+    # Spreads files over a pool of worker processes, each holding one model
+    # With split_seconds, each file is first cut at pauses into spans of about that
+    # length, and the spans are spread over the pool instead, so a single long
+    # recording uses every core; spans are independent because no utterance crosses
+    # a cut
+
+    def __init__(self, model_path: str, jobs: Optional[int] = None, raw_sample_rate: int = 16000,
+                 chunk_seconds: float = 2.0, max_worker_memory_mb: Optional[int] = None,
+                 debug: bool = False, grammar_path: Optional[str] = None,
+                 split_seconds: Optional[float] = None):
+        self.model_path = model_path
+        self.grammar_path = grammar_path
+        self.split_seconds = split_seconds
+        self.jobs = jobs or os.cpu_count() or 1
+        self.raw_sample_rate = raw_sample_rate
+        self.chunk_seconds = chunk_seconds
+        self.max_worker_memory_mb = max_worker_memory_mb
+        self.debug = debug
+        self._model = None
+
+    def inherited_model(self, context):
+        # With fork, load the model once here so workers share its pages; the loaded
+        # model is handed to the workers as they fork (never pickled)
+        if context.get_start_method() != "fork":
+            return None
+        if self._model is None:
+            old_stderr = None
+            if not self.debug:
+                old_stderr = suppress_alsa_messages()
+            try:
+                self._model = load_model(self.model_path, self.debug)
+            finally:
+                if not self.debug and old_stderr is not None:
+                    restore_stderr(old_stderr)
+        return self._model
+
+    def _plan(self, path: str) -> tuple[Sequence[tuple[int, Optional[int]]], float, Optional[str]]:
+        # Spans to decode for one file, its duration, and any error opening it
+        if not self.split_seconds:
+            return [(0, None)], 0.0, None
+        try:
+            with AudioFileReader(path, self.raw_sample_rate) as reader:
+                return split_spans(reader, self.split_seconds), reader.duration, None
+        except (OSError, ValueError) as e:
+            return [], 0.0, str(e)
+
+    def transcribe(self, paths: Iterable[str]) -> Iterator[FileResult]:
+        # Yield results in the same order as paths, as soon as each is ready
+        paths = list(paths)
+        plans = [self._plan(path) for path in paths]
+        span_count = sum(len(spans) for spans, _, _ in plans)
+        context: BaseContext
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        tasks = [(path, span) for path, (spans, _, _) in zip(paths, plans) for span in spans]
+        self.inherited_model(context)
+
+        if self.debug:
+            split = f" in {span_count} spans" if self.split_seconds else ""
+            print(f"Transcribing {len(paths)} files{split} with {self.jobs} workers "
+                  f"({context.get_start_method()} start)")
+
+        pool = _RestartingPool(self, context, min(self.jobs, max(1, span_count)), tasks)
+        try:
+            start = time.perf_counter()
+            task = 0
+            for path, (spans, duration, error) in zip(paths, plans):
+                if error is not None:
+                    yield FileResult(path, error=error)
+                    continue
+                parts = [pool.result(task + i) for i in range(len(spans))]
+                task += len(spans)
+                if not self.split_seconds:
+                    yield parts[0]
+                else:
+                    # Spans run concurrently, so the file took the wall time until its last one
+                    yield stitch_results(path, parts, duration, time.perf_counter() - start)
+        finally:
+            pool.shutdown()
@@ -0,0 +1,98 @@
+# Named latency profiles: the capture and endpointing settings that trade
+# end-of-utterance latency against how much context each decode sees
+# A profile is one of the built-in names or a JSON file of overrides, e.g. as written
+# by python -m lexy.bench.autotune:
+#   {"base": "balanced", "pause_threshold": 0.4, "vad_hangover_ms": 200}
+
+import json
+import os
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Optional
+
+
+@dataclass
+class LatencyProfile:
+    name: str = "balanced"
+    # Capture frame length for --stream, --pipeline and --events (the decode chunk size)
+    frame_ms: int = 100
+    # Silence the VAD keeps sending after speech stops before declaring it ended
+    vad_hangover_ms: int = 300
+    # speech_recognition listen() settings for the default capture loop
+    energy_threshold: float = 10.0          # Extremely low threshold
+    pause_threshold: float = 0.5            # Silence that ends a phrase
+    non_speaking_duration: float = 0.3      # Silence kept either side of a phrase
+    listen_timeout: float = 0.5             # Wait this long for a phrase to start
+    phrase_time_limit: float = 2.0          # Cut phrases longer than this
+
+    def validate(self) -> "LatencyProfile":
+        # Raise ValueError for settings the capture loops cannot use
+        if self.frame_ms < 10 or self.frame_ms > 1000:
+            raise ValueError(f"frame_ms must be between 10 and 1000, not {self.frame_ms}")
+        if self.vad_hangover_ms < 0:
+            raise ValueError("vad_hangover_ms cannot be negative")
+        if not self.pause_threshold >= self.non_speaking_duration >= 0:
+            # speech_recognition asserts this inside listen()
+            raise ValueError("pause_threshold must be at least non_speaking_duration")
+        if self.listen_timeout <= 0 or self.phrase_time_limit <= 0:
+            raise ValueError("listen_timeout and phrase_time_limit must be positive")
+        return self
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+PROFILES = {
+    # Shortest pauses and smallest frames: results as soon as a phrase ends, at the
+    # cost of more decode calls and occasionally splitting a hesitant sentence
+    "low-latency": LatencyProfile("low-latency", frame_ms=50, vad_hangover_ms=150,
+                                  pause_threshold=0.3, non_speaking_duration=0.2,
+                                  listen_timeout=0.3, phrase_time_limit=1.0),
+    "balanced": LatencyProfile(),
+    # Long frames and generous pauses: fewer, larger decodes and whole sentences,
+    # for transcription where nobody is waiting on each line
+    "throughput": LatencyProfile("throughput", frame_ms=200, vad_hangover_ms=500,
+                                 pause_threshold=0.8, non_speaking_duration=0.5,
+                                 listen_timeout=1.0, phrase_time_limit=5.0),
+}
+
+
+def profile_from_dict(data: dict, name: Optional[str] = None) -> LatencyProfile:
+    # Apply a dict of overrides to its "base" profile (balanced by default)
+    data = dict(data)
+    base = data.pop("base", "balanced")
+    if base not in PROFILES:
+        raise ValueError(f"Unknown base profile: {base}")
+    unknown = set(data) - {field.name for field in fields(LatencyProfile)}
+    if unknown:
+        raise ValueError(f"Unknown profile settings: {', '.join(sorted(unknown))}")
+    profile = replace(PROFILES[base], name=str(data.pop("name")) if "name" in data else name or base)
+    for key, value in data.items():
+        setattr(profile, key, int(value) if key in ("frame_ms", "vad_hangover_ms") else float(value))
+    return profile.validate()
+
+
+def load_profile(spec: str) -> LatencyProfile:
+    # A built-in profile by name, or a JSON file of overrides
+    if spec in PROFILES:
+        return PROFILES[spec]
+    try:
+        with open(spec, encoding="utf-8") as f:
+            data = json.load(f)
+    except OSError as e:
+        raise ValueError(f"Cannot read profile {spec}: {e}") from e
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Profile {spec} is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"Profile {spec} must be a JSON object")
+    return profile_from_dict(data, os.path.splitext(os.path.basename(spec))[0])
+
+
+def save_profile(profile: LatencyProfile, path: str, base: str = "balanced") -> None:
+    # Write a profile as overrides of its base, so unchanged settings track the base
+    defaults = PROFILES[base].to_dict()
+    data = {"base": base}
+    data.update({key: value for key, value in profile.to_dict().items()
+                 if key != "name" and value != defaults[key]})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,127 @@
+# Second-pass decoding of finalized segments with a larger model in the background
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from ..metrics import metrics
+from .engine import TranscriptionEngine
+from .output import SinkWriter, TranscriptRecord
+from .pipeline import BoundedQueue
+
+# Default second-pass model; the live pass keeps using the small one
+LARGE_MODEL_PATH = "vosk-model-en-us-0.22"
+
+
+@dataclass
+class Segment:
+    # One utterance finalized by the live pass, with the 16kHz PCM that produced it
+    id: int
+    text: str
+    pcm: bytes
+    finalized_at: float = 0.0
+    enqueued_at: float = 0.0             # Set by the rescore queue
+
+    def release(self) -> None:
+        pass
+
+
+@dataclass
+class Correction:
+    # Second-pass transcript for a segment; changed is False when both passes agree
+    segment_id: int
+    draft: str
+    text: str
+    latency: float
+
+    @property
+    def changed(self) -> bool:
+        return self.text != self.draft
+
+
+class BackgroundRescorer:
+    # Worker thread holding the large model; re-decodes segments from the live pass
+    # The model loads on the worker so live transcription can start immediately, and a
+    # full queue drops its oldest segments - their drafts simply stand uncorrected
+
+    def __init__(self, model_path: str = LARGE_MODEL_PATH, debug: bool = False,
+                 queue_size: int = 20, chunk_seconds: float = 2.0,
+                 on_correction: Optional[Callable[[Correction], None]] = None,
+                 engine: Optional[TranscriptionEngine] = None,
+                 output: Optional[SinkWriter] = None):
+        self.model_path = model_path
+        self.debug = debug
+        self.chunk_bytes = int(16000 * chunk_seconds) * 2
+        self.on_correction = on_correction or self._print_correction
+        self.engine = engine
+        self.output = output
+        self.queue: BoundedQueue[Segment] = BoundedQueue("rescore", queue_size, "drop-oldest")
+        self.ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lexy-rescore", daemon=True)
+
+    def _print_correction(self, correction: Correction) -> None:
+        if correction.changed:
+            record = TranscriptRecord(correction.text, "correction", segment=correction.segment_id,
+                                      latency=correction.latency)
+            if self.output is not None:
+                self.output.emit(record)
+            else:
+                print(record.to_text(), flush=True)
+        elif self.debug:
+            print(f"\nSecond pass agrees with #{correction.segment_id} "
+                  f"({correction.latency:.2f}s after it was final)")
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, segment: Segment) -> None:
+        # Queue a finalized segment; never blocks the live pass
+        segment.finalized_at = time.perf_counter()
+        self.queue.put(segment)
+
+    def rescore(self, segment: Segment) -> Correction:
+        # Decode the whole segment in large chunks and finalize it
+        engine = self.engine
+        assert engine is not None, "pass an engine in or start() the worker to load one"
+        with metrics.time("rescore"):
+            parts = []
+            for start in range(0, len(segment.pcm), self.chunk_bytes):
+                text, _ = engine.transcribe_audio(segment.pcm[start:start + self.chunk_bytes])
+                if text:
+                    parts.append(text)
+            text = engine.flush()
+            if text:
+                parts.append(text)
+        return Correction(segment.id, segment.text, " ".join(parts),
+                          time.perf_counter() - segment.finalized_at)
+
+    def _run(self) -> None:
+        try:
+            if self.engine is None:
+                self.engine = TranscriptionEngine(self.model_path, self.debug)
+        except Exception as e:
+            print(f"\nSecond-pass model unavailable, keeping live transcripts only: {e}", flush=True)
+            self.queue.close()
+            return
+        finally:
+            self.ready.set()
+
+        while True:
+            segment = self.queue.get(timeout=0.5)
+            if segment is None:
+                if self.queue.closed:
+                    break
+                continue
+            correction = self.rescore(segment)
+            metrics.counter("lexy_rescored_segments_total", "Segments re-decoded by the second pass",
+                            changed=str(correction.changed).lower()).inc()
+            metrics.histogram("lexy_rescore_latency_seconds",
+                              "Time from live final to second-pass result").observe(correction.latency)
+            self.on_correction(correction)
+
+    def stop(self, timeout: Optional[float] = 30.0) -> None:
+        # Finish the queued segments (bounded by timeout), then stop the worker
+        self.queue.close()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
@@ -0,0 +1,283 @@
+# Local ingest server: many capture clients stream PCM over TCP or a Unix socket and
+# get partial/final JSON lines back, decoded on a bounded pool of recognizers that
+# share one loaded model
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from ..audio.resample import StreamingResampler
+from ..metrics import metrics
+from .engine import TranscriptionEngine
+from .events import EventStream
+
+
+READ_BYTES = 8000  # A quarter second of 16kHz audio per recv
+REJECT_DRAIN_SECONDS = 1.0  # How long a turned-away client gets to stop sending
+
+
+def shared_model_engines(model_path: str, debug: bool = False,
+                         grammar_path: Optional[str] = None) -> Callable[[], TranscriptionEngine]:
+    # Engine factory that loads the model on the first call and shares it afterwards,
+    # so every pooled recognizer sits on one vosk.Model
+    model = None
+
+    def create() -> TranscriptionEngine:
+        nonlocal model
+        engine = TranscriptionEngine(model_path, debug, model=model, grammar_path=grammar_path)
+        model = engine.vosk_model
+        return engine
+
+    return create
+
+
+class RecognizerPool:
+    # A fixed number of engines, each owning one KaldiRecognizer; a connection holds
+    # one for its whole lifetime and hands it back afterwards
+
+    def __init__(self, size: int, create_engine: Callable[[], TranscriptionEngine]):
+        self.size = size
+        self._idle: queue.Queue = queue.Queue()
+        for _ in range(size):
+            self._idle.put(create_engine())
+        self._report()
+
+    def _report(self) -> None:
+        metrics.gauge("lexy_server_recognizers_idle", "Pooled recognizers not serving a connection"
+                      ).set(self._idle.qsize())
+
+    @property
+    def idle(self) -> int:
+        return self._idle.qsize()
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[TranscriptionEngine]:
+        # An idle engine, or None if none frees up within timeout (0 = don't wait)
+        try:
+            engine = self._idle.get(timeout=timeout) if timeout else self._idle.get_nowait()
+        except queue.Empty:
+            return None
+        self._report()
+        return engine
+
+    def release(self, engine: TranscriptionEngine) -> None:
+        self._idle.put(engine)
+        self._report()
+
+
+@dataclass
+class ConnectionStats:
+    # Per-connection figures, sent to the client as the last line before closing
+    client: str
+    audio_seconds: float = 0.0
+    bytes_received: int = 0
+    partials: int = 0
+    finals: int = 0
+    admission_wait_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "type": "stats",
+            "client": self.client,
+            "audio_seconds": round(self.audio_seconds, 3),
+            "bytes_received": self.bytes_received,
+            "partials": self.partials,
+            "finals": self.finals,
+            "admission_wait_seconds": round(self.admission_wait_seconds, 3),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+class _ServerMixIn(socketserver.ThreadingMixIn):
+    # A connection thread per client, handed to the TranscriptionServer that owns us
+    daemon_threads = True
+    transcription: "TranscriptionServer"
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        server = self.server
+        assert isinstance(server, _ServerMixIn)
+        server.transcription.handle(self.request, self.client_address)
+
+
+class _TCPServer(_ServerMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(_ServerMixIn, socketserver.UnixStreamServer):
+        pass
+
+
+class TranscriptionServer:
+    # Protocol: the client sends raw 16-bit mono PCM at sample_rate and half-closes
+    # (shutdown(SHUT_WR)) when done; the server answers with JSON lines - "ready" or
+    # an "error" if it is at capacity, then "partial"/"final" events as they happen,
+    # then "stats" - and closes
+    # Admission control: a connection waits up to admission_timeout for a recognizer,
+    # and at most max_waiting connections may wait at once; the rest are turned away
+    # immediately instead of queueing without bound
+
+    def __init__(self, pool: RecognizerPool, address: Union[tuple[str, int], str],
+                 sample_rate: int = 16000, admission_timeout: float = 5.0,
+                 max_waiting: Optional[int] = None, idle_timeout: float = 30.0,
+                 words: bool = True, debug: bool = False):
+        self.pool = pool
+        self.address = address
+        self.sample_rate = sample_rate
+        self.admission_timeout = admission_timeout
+        self.max_waiting = pool.size if max_waiting is None else max_waiting
+        self.idle_timeout = idle_timeout
+        self.words = words
+        self.debug = debug
+        self.active = 0
+        self.waiting = 0
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.BaseServer] = None
+
+    def start(self) -> "TranscriptionServer":
+        # Bind and start accepting on a background thread
+        server: Union[_UnixServer, _TCPServer]
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                os.remove(self.address)
+            server = _UnixServer(self.address, _Handler)
+        else:
+            server = _TCPServer(self.address, _Handler)
+            # Port 0 picks a free port; report the real one
+            self.address = (self.address[0], server.server_address[1])
+        server.transcription = self
+        self._server = server
+        threading.Thread(target=server.serve_forever, name="lexy-server", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.remove(self.address)
+
+    def _send(self, sock: socket.socket, message: dict) -> None:
+        sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+    def _admit(self) -> Optional[TranscriptionEngine]:
+        # A recognizer for a new connection, or None if it should be turned away
+        with self._lock:
+            if self.waiting >= self.max_waiting and self.pool.idle == 0:
+                return None
+            self.waiting += 1
+        try:
+            return self.pool.acquire(self.admission_timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def _set_active(self, change: int) -> None:
+        with self._lock:
+            self.active += change
+            metrics.gauge("lexy_server_active_connections", "Connections being transcribed"
+                          ).set(self.active)
+
+    def handle(self, sock: socket.socket, client_address) -> None:
+        # Serve one connection from admission to stats
+        client = f"{client_address[0]}:{client_address[1]}" if isinstance(client_address, tuple) else "unix"
+        stats = ConnectionStats(client)
+        started = time.perf_counter()
+        engine = self._admit()
+        stats.admission_wait_seconds = time.perf_counter() - started
+        metrics.histogram("lexy_server_admission_wait_seconds", "Time connections waited for a recognizer"
+                          ).observe(stats.admission_wait_seconds)
+        if engine is None:
+            metrics.counter("lexy_server_connections_total", "Connections by admission outcome",
+                            outcome="rejected").inc()
+            self._turn_away(sock)
+            if self.debug:
+                print(f"Rejected {client}: all {self.pool.size} recognizers busy")
+            return
+
+        metrics.counter("lexy_server_connections_total", "Connections by admission outcome",
+                        outcome="accepted").inc()
+        self._set_active(1)
+        completed = False
+        try:
+            self._transcribe(sock, engine, stats, started)
+            completed = True
+        except OSError as e:
+            # Client went away or idled out; its recognizer is still returned below
+            if self.debug:
+                print(f"Connection {client} ended: {e}")
+        finally:
+            if not completed:
+                # Clear the utterance an aborted connection left in the recognizer
+                engine.finish()
+            self.pool.release(engine)
+            self._set_active(-1)
+            stats.elapsed_seconds = time.perf_counter() - started
+            metrics.counter("lexy_server_audio_seconds_total", "Audio received from clients"
+                            ).inc(stats.audio_seconds)
+            metrics.histogram("lexy_server_connection_seconds", "Connection lifetimes"
+                              ).observe(stats.elapsed_seconds)
+            if self.debug:
+                print(f"Connection {client}: {stats.audio_seconds:.1f}s audio, "
+                      f"{stats.finals} finals in {stats.elapsed_seconds:.2f}s")
+
+    def _turn_away(self, sock: socket.socket) -> None:
+        # Send the error, half-close, and discard what the client already sent until it
+        # half-closes too: closing with unread data resets the connection, and a client
+        # that streams before reading could lose the error line
+        try:
+            self._send(sock, {"type": "error", "error": "server busy"})
+            sock.shutdown(socket.SHUT_WR)
+            deadline = time.monotonic() + REJECT_DRAIN_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sock.settimeout(remaining)
+                if not sock.recv(READ_BYTES):
+                    break
+        except OSError:
+            pass
+
+    def _transcribe(self, sock: socket.socket, engine: TranscriptionEngine,
+                    stats: ConnectionStats, started: float) -> None:
+        sock.settimeout(self.idle_timeout)
+        self._send(sock, {"type": "ready", "sample_rate": self.sample_rate})
+
+        def on_event(event) -> None:
+            if event.is_final:
+                stats.finals += 1
+            else:
+                stats.partials += 1
+            self._send(sock, event.to_dict())
+
+        stream = EventStream(engine, self.words, on_event)
+        resampler = StreamingResampler(self.sample_rate) if self.sample_rate != 16000 else None
+        remainder = b""
+        while True:
+            data = sock.recv(READ_BYTES)
+            if not data:
+                break
+            stats.bytes_received += len(data)
+            # Only whole samples go to the recognizer
+            data = remainder + data
+            usable = len(data) - len(data) % 2
+            pcm, remainder = data[:usable], data[usable:]
+            stats.audio_seconds += len(pcm) / 2 / self.sample_rate
+            if resampler is not None:
+                pcm = resampler.process(pcm)
+            stream.feed(pcm)
+        if resampler is not None:
+            stream.feed(resampler.flush())
+        stream.finish()
+        stats.elapsed_seconds = time.perf_counter() - started
+        self._send(sock, stats.to_dict())
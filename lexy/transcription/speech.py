@@ -1,27 +1,100 @@
 # Main speech transcription class combining audio and transcription components
 
 import speech_recognition as sr
-from typing import Optional
-from ..audio import MicrophoneManager, AudioProcessor, suppress_alsa_messages, restore_stderr
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import replace
+from typing import Callable, Generator, Optional, Sequence, Tuple, Union
+from ..audio import MicrophoneManager, AudioProcessor, CaptureStream, suppress_alsa_messages, restore_stderr
+from ..audio.vad import VADConfig, VoiceActivityDetector
+from ..metrics import metrics
+from .archive import SpeechArchive
 from .engine import TranscriptionEngine
+from .events import EventStream, TranscriptEvent
+from .health import CaptureWatchdog, RecyclePolicy
+from .output import SinkWriter, TranscriptRecord
+from .pipeline import TranscriptionPipeline
+from .profiles import PROFILES, LatencyProfile
+from .rescore import BackgroundRescorer, Segment
+
+# Longest live-pass segment kept for the second pass (16kHz 16-bit PCM)
+MAX_SEGMENT_BYTES = 30 * 16000 * 2
+
+# Most speech held while the model is still loading (16kHz 16-bit PCM)
+MAX_PENDING_BYTES = 120 * 16000 * 2
+
+# A final result and the segment ID it was finalized under (reported in two-pass mode)
+Final = Tuple[str, int]
 
 
 class SpeechTranscriber:
     # Main class for continuous speech transcription
     
-    def __init__(self, timeout: int = 1, phrase_timeout: float = 0.3, 
+    def __init__(self, timeout: Optional[float] = None, phrase_timeout: Optional[float] = None,
                  device_index: Optional[int] = None, debug: bool = False, 
-                 model_path: str = "vosk-model-small-en-us-0.15"):
-        self.timeout = timeout
-        self.phrase_timeout = phrase_timeout
+                 model_path: str = "vosk-model-small-en-us-0.15",
+                 vad_config: Optional[VADConfig] = None, use_vad: bool = True,
+                 mic_manager: Optional[MicrophoneManager] = None,
+                 transcription_engine: Optional[TranscriptionEngine] = None,
+                 grammar_path: Optional[str] = None,
+                 rescorer: Optional[BackgroundRescorer] = None,
+                 on_ready: Optional[Callable[[], None]] = None,
+                 recycle_policy: Optional[RecyclePolicy] = None,
+                 stall_timeout: float = 10.0,
+                 output: Optional[SinkWriter] = None, stream_id: str = "default",
+                 archive: Optional[SpeechArchive] = None,
+                 profile: Optional[LatencyProfile] = None):
+        # Capture and endpointing settings; timeout and phrase_timeout, when given,
+        # override the profile's listen timeout and the pause that ends a phrase
+        profile = profile or PROFILES["balanced"]
+        if timeout is not None or phrase_timeout is not None:
+            profile = replace(
+                profile,
+                listen_timeout=profile.listen_timeout if timeout is None else timeout,
+                pause_threshold=profile.pause_threshold if phrase_timeout is None else phrase_timeout
+            ).validate()
+        self.profile = profile
+        self.timeout = self.profile.listen_timeout
+        self.phrase_timeout = self.profile.pause_threshold
         self.debug = debug
         self.is_listening = False
+        self.use_vad = use_vad
+        self.vad_config = vad_config or VADConfig(hangover_ms=self.profile.vad_hangover_ms)
+        self.vad: Optional[VoiceActivityDetector] = None
+        # Two-pass mode: audio of the utterance in progress, and the ID of the last final
+        self.rescorer = rescorer
+        self.segment_id = 0
+        self._segment = bytearray()
+        # The same per-utterance audio is also kept in the speech archive, if enabled
+        self.archive = archive
+        # Speech captured before the model finished loading, decoded once it has
+        self.on_ready = on_ready
+        self._pending: deque[Tuple[bytes, bool]] = deque()
+        self._pending_bytes = 0
+        self._started_at = time.perf_counter()
+        # Capture that produces nothing for stall_timeout seconds is reopened
+        self.stall_timeout = stall_timeout
+        self._capture_stalled = False
+        self._watchdog: Optional[CaptureWatchdog] = None
+        # Event mode: the stream events() decodes into, until its last utterance is final
+        self._event_stream: Optional[EventStream] = None
+        # Results go to the output writer's sinks (printed directly without one); each
+        # record's latency counts from when the newest audio decoded was captured
+        self.output = output
+        self.stream_id = stream_id
+        self._captured_at = time.time()
         
-        # Initialize components
+        # Initialize components (callers such as the benchmarks may supply their own)
+        # The model loads in the background while the microphone is opened and tested
+        self.transcription_engine = transcription_engine or TranscriptionEngine(
+            model_path, debug, grammar_path=grammar_path, background_load=True,
+            recycle_policy=recycle_policy
+        )
         self.recognizer = sr.Recognizer()
-        self.mic_manager = MicrophoneManager(device_index, debug)
+        self.mic_manager = mic_manager or MicrophoneManager(device_index, debug)
         self.audio_processor = AudioProcessor(debug)
-        self.transcription_engine = TranscriptionEngine(model_path, debug)
         
         # Configure recognizer settings
         self._configure_recognizer()
@@ -32,21 +105,21 @@ class SpeechTranscriber:
         print("Continuous transcription mode" + (" (debug mode)" if self.debug else ""), flush=True)
     
     def _configure_recognizer(self) -> None:
-        # Configure speech recognizer with optimal settings
-        # Set microphone sensitivity - extremely sensitive settings
-        self.recognizer.energy_threshold = 10   # Extremely low threshold
+        # Configure speech recognizer from the latency profile
+        self.recognizer.energy_threshold = self.profile.energy_threshold
         self.recognizer.dynamic_energy_threshold = False  # Don't auto-adjust
-        self.recognizer.pause_threshold = 0.5   # Shorter pause
-        self.recognizer.non_speaking_duration = 0.3
+        self.recognizer.pause_threshold = self.profile.pause_threshold
+        self.recognizer.non_speaking_duration = self.profile.non_speaking_duration
         
         # Skip ambient noise adjustment - use our manual threshold
         if self.debug:
             print("Skipping ambient noise adjustment - using manual threshold")
             print("Using Vosk offline speech recognition")
             print(f"Energy threshold: {self.recognizer.energy_threshold}")
+            print(f"Latency profile: {self.profile.name}")
     
-    def listen_for_speech(self) -> Optional[str]:
-        # Listen for audio and return transcribed text if any
+    def listen_for_speech(self) -> list[Final]:
+        # Listen for audio and return the final results it completed, if any
         # Suppress ALSA messages during audio capture if not in debug mode
         old_stderr = None
         if not self.debug:
@@ -54,13 +127,16 @@ class SpeechTranscriber:
         
         try:
             with self.mic_manager.microphone as source:
+                if self._watchdog is not None:
+                    # Every device read counts as progress; decoding afterwards does not
+                    source.stream.on_read = self._watchdog.kick
+                    self._watchdog.kick()
                 # Force capture audio data regardless of energy threshold
                 # by using a very short phrase time limit and handling the timeout
                 try:
-                    # Use longer timeout to capture more speech
-                    timeout_val = 0.5
-                    phrase_limit = 2.0
-                    audio = self.recognizer.listen(source, timeout=timeout_val, phrase_time_limit=phrase_limit)
+                    with metrics.time("capture"):
+                        audio = self.recognizer.listen(source, timeout=self.profile.listen_timeout,
+                                                       phrase_time_limit=self.profile.phrase_time_limit)
                 except sr.WaitTimeoutError:
                     # Even if timeout, try to get some ambient audio to show levels
                     audio = self.audio_processor.capture_ambient_audio(
@@ -69,10 +145,13 @@ class SpeechTranscriber:
                     if audio is None:
                         if self.debug:
                             print("\\rAudio: [░░░░░░░░░░░░░░░░░░░░] 0.0 (0 bytes)", end="", flush=True)
-                        return None
+                        return []
+            if self._watchdog is not None:
+                self._watchdog.pause()
             
             # Calculate audio level for monitoring
-            audio_level = self.audio_processor.get_audio_level(audio)
+            with metrics.time("level"):
+                audio_level = self.audio_processor.get_audio_level(audio)
             
             if self.debug:
                 # Show raw audio data info first
@@ -80,48 +159,156 @@ class SpeechTranscriber:
                 raw_bytes = len(raw_data) if raw_data else 0
                 self.audio_processor.display_audio_level(audio_level, raw_bytes)
             
-            # Only try speech recognition if we have any audio (very low threshold)
-            if audio_level > 0.5:
+            # Let the VAD pick speech frames; without it, use the level threshold
+            if self.use_vad or audio_level > 0.5:
                 return self._process_audio_for_transcription(audio)
             else:
-                return None
+                metrics.counter("lexy_chunks_skipped_total", "Chunks not sent to the recognizer").inc()
+                return []
                 
         except sr.WaitTimeoutError:
             # No audio detected within timeout
             if self.debug:
                 print("\\rAudio: [░░░░░░░░░░░░░░░░░░░░] 0.0", end="", flush=True)
-            return None
+            return []
         except Exception as e:
+            if e is self.transcription_engine.load_error:
+                # Not a microphone problem: the model failed to load, so stop
+                raise
+            metrics.counter("lexy_capture_errors_total", "Microphone errors in the capture loop").inc()
             if self.debug:
                 print(f"\\nMicrophone error: {e}")
             # Try to reinitialize microphone
             try:
-                self.mic_manager._initialize_microphone()
-                if self.debug:
-                    print("Reinitialized microphone")
+                self.mic_manager.reinitialize()
             except Exception:
                 if self.debug:
                     print("Failed to reinitialize microphone")
-            return None
+            return []
         finally:
+            if self._watchdog is not None:
+                self._watchdog.pause()
             # Restore stderr
             if not self.debug and old_stderr is not None:
                 restore_stderr(old_stderr)
     
-    def _process_audio_for_transcription(self, audio: sr.AudioData) -> Optional[str]:
+    def _process_audio_for_transcription(self, audio: sr.AudioData) -> list[Final]:
         # Process audio data through the transcription engine
-        raw_data = audio.get_raw_data()
+        return self._transcribe_raw(audio.get_raw_data(), audio.sample_rate)
+    
+    def _get_vad(self, sample_rate: int) -> VoiceActivityDetector:
+        # Voice activity detector for the current capture rate
+        if self.vad is None or self.vad.sample_rate != sample_rate:
+            self.vad = VoiceActivityDetector(sample_rate, self.vad_config)
+        return self.vad
+    
+    def _transcribe_raw(self, raw_data: Union[bytes, memoryview], sample_rate: int) -> list[Final]:
+        # Gate, resample and feed raw 16-bit mono PCM to the engine
+        finals = []
+        for pcm, speech_ended in self.prepare_audio(raw_data, sample_rate):
+            finals.extend(self.decode_audio(pcm, speech_ended))
+        return finals
+    
+    def prepare_audio(self, raw_data: Union[bytes, memoryview],
+                      sample_rate: int) -> list[Tuple[bytes, bool]]:
+        # VAD and resampling stage: 16kHz speech PCM as (pcm, speech_ended) pieces, split
+        # where each utterance ends; an empty list means there is nothing to decode
+        pieces: Sequence[Tuple[Union[bytes, memoryview], bool]]
+        if self.use_vad:
+            # Drop non-speech frames before resampling or decoding them
+            with metrics.time("vad"):
+                pieces = self._get_vad(sample_rate).process(raw_data).pieces()
+            if not pieces:
+                metrics.counter("lexy_chunks_skipped_total", "Chunks not sent to the recognizer").inc()
+                return []
+        else:
+            pieces = [(raw_data, False)]
         
-        # Convert audio to 16kHz if needed (Vosk expects 16kHz)
-        if audio.sample_rate != 16000:
-            raw_data = self.audio_processor.resample_audio_for_vosk(
-                raw_data, audio.sample_rate
-            )
+        prepared = []
+        for pcm, speech_ended in pieces:
+            # Convert audio to 16kHz if needed (Vosk expects 16kHz)
+            if pcm and sample_rate != 16000:
+                with metrics.time("resample"):
+                    pcm = self.audio_processor.resample_audio_for_vosk(pcm, sample_rate)
+            if isinstance(pcm, memoryview):
+                # Untouched capture buffer (no VAD, already 16kHz): copy it out before the
+                # pooled frame is reused - the only copy on the way to the recognizer
+                pcm = bytes(pcm)
+            prepared.append((pcm, speech_ended))
+        return prepared
+    
+    def decode_audio(self, raw_data: bytes, speech_ended: bool = False,
+                     captured_at: Optional[float] = None) -> list[Final]:
+        # Recognition stage: feed 16kHz PCM to the engine and return any final results
+        # Until the model is loaded, speech is held back and decoded in order afterwards
+        # captured_at: wall-clock capture time of the audio, if it was queued since
+        self._captured_at = captured_at or time.time()
+        engine = self.transcription_engine
+        if not engine.ready.is_set():
+            self._hold_until_ready(raw_data, speech_ended)
+            return []
+        self.check_model()
+        if self._pending:
+            return self._decode_backlog(raw_data, speech_ended)
+        text = self._decode(raw_data, speech_ended)
+        return [(text, self.segment_id)] if text else []
+    
+    def check_model(self) -> None:
+        # Re-raise a background model load failure; capture loops call this so the
+        # process exits with the error even while no speech is being decoded
+        engine = self.transcription_engine
+        if engine.ready.is_set() and engine.load_error is not None:
+            raise engine.load_error
+    
+    def _hold_until_ready(self, raw_data: bytes, speech_ended: bool) -> None:
+        self._pending.append((raw_data, speech_ended))
+        self._pending_bytes += len(raw_data)
+        while self._pending_bytes > MAX_PENDING_BYTES:
+            dropped, _ = self._pending.popleft()
+            self._pending_bytes -= len(dropped)
+            metrics.counter("lexy_pending_dropped_bytes_total",
+                            "Speech dropped while waiting for the model to load").inc(len(dropped))
+    
+    def _decode_backlog(self, raw_data: bytes, speech_ended: bool) -> list[Final]:
+        # First decode after the model became ready: catch up on the held speech, one
+        # result per utterance under the segment ID it was finalized with
+        self._pending.append((raw_data, speech_ended))
+        if self.debug:
+            print(f"\nDecoding {self._pending_bytes / 32000:.1f}s of speech captured during startup")
+        finals = []
+        while self._pending:
+            text = self._decode(*self._pending.popleft())
+            if text:
+                finals.append((text, self.segment_id))
+        self._pending_bytes = 0
+        return finals
+    
+    def _decode(self, raw_data: bytes, speech_ended: bool) -> Optional[str]:
+        engine = self.transcription_engine
+        collect = self.rescorer is not None or self.archive is not None
+        if collect and not engine.words:
+            # Word timings tell where each utterance's audio ends
+            engine.enable_words()
+        if not raw_data:
+            # Speech ended on a frame boundary - finalize what Vosk has buffered
+            final_text, partial_text = self.transcription_engine.flush(), None
+        else:
+            # Get transcription results
+            final_text, partial_text = self.transcription_engine.transcribe_audio(raw_data)
+            
+            # Silence was gated away, so Vosk never sees the pause that would end the
+            # utterance; finalize it ourselves when the VAD says speech has stopped
+            if speech_ended and not final_text:
+                final_text = self.transcription_engine.flush()
         
-        # Get transcription results
-        final_text, partial_text = self.transcription_engine.transcribe_audio(raw_data)
+        if collect:
+            trailing = 0
+            if final_text and engine.last_word_end is not None:
+                trailing = max(0, engine.samples_fed - engine.last_word_end) * 2
+            self._collect_segment(raw_data, final_text, trailing)
         
         if final_text:  # Got final result
+            metrics.counter("lexy_transcripts_total", "Final transcripts produced").inc()
             if self.debug:
                 print(f" -> '{final_text}'")
             return final_text
@@ -136,6 +323,80 @@ class SpeechTranscriber:
         
         return None
     
+    def _collect_segment(self, raw_data: bytes, final_text: Optional[str], trailing: int = 0) -> None:
+        # Keep the audio behind the current utterance; once it is final, hand it to the
+        # second pass under the ID the live transcript is printed with, and to the archive
+        # trailing: bytes at the end that came after the final's last word - they belong
+        # to the next utterance, so they stay buffered for it
+        self._segment += raw_data
+        if len(self._segment) > MAX_SEGMENT_BYTES:
+            del self._segment[:len(self._segment) - MAX_SEGMENT_BYTES]
+        if final_text:
+            self.segment_id += 1
+            end = len(self._segment) - min(trailing, len(self._segment))
+            pcm = bytes(self._segment[:end])
+            if self.rescorer is not None:
+                self.rescorer.submit(Segment(self.segment_id, final_text, pcm))
+            if self.archive is not None:
+                self.archive.submit(pcm, final_text, self.stream_id)
+            del self._segment[:end]
+        elif not raw_data:
+            # A flush that produced nothing: the buffered audio held no words, but it was
+            # still speech as far as the VAD could tell, so the archive keeps it
+            if self.archive is not None:
+                self.archive.submit(bytes(self._segment), "", self.stream_id)
+            self._segment.clear()
+    
+    def _watch_ready(self) -> None:
+        # Announce readiness once the model is loaded (capture is already running)
+        def watch() -> None:
+            engine = self.transcription_engine
+            engine.ready.wait()
+            if engine.load_error is not None:
+                # The capture loop raises the error and the process exits with it
+                print(f"\nFailed to load model: {engine.load_error}", flush=True)
+                return
+            elapsed = time.perf_counter() - self._started_at
+            metrics.gauge("lexy_startup_seconds", "Time from startup to transcribing").set(elapsed)
+            if self.debug:
+                print(f"\nReady after {elapsed:.2f}s")
+            if self.on_ready is not None:
+                self.on_ready()
+        
+        threading.Thread(target=watch, name="lexy-ready", daemon=True).start()
+    
+    def transcript_record(self, text: str, type: str = "final", extra: Optional[dict] = None,
+                          segment: Optional[int] = None) -> TranscriptRecord:
+        # Structured form of a result; in two-pass mode it carries the ID corrections refer
+        # to (segment, defaulting to the latest final's)
+        if segment is None:
+            segment = self.segment_id
+        return TranscriptRecord(text, type, self.stream_id,
+                                segment if self.rescorer is not None else None,
+                                time.time() - self._captured_at, extra=extra or {})
+    
+    def format_transcript(self, text: str) -> str:
+        # Live output line
+        return self.transcript_record(text).to_text()
+    
+    def emit_transcript(self, text: str, segment: Optional[int] = None) -> None:
+        # Send a final result to the output sinks
+        record = self.transcript_record(text, segment=segment)
+        if self.output is not None:
+            self.output.emit(record)
+        else:
+            print(record.to_text(), flush=True)
+    
+    def emit_event(self, event: TranscriptEvent) -> None:
+        # Send a partial or final event, with its word timings, to the output sinks
+        extra = event.to_dict()
+        del extra["text"]
+        record = self.transcript_record(event.text, extra.pop("type"), extra)
+        if self.output is not None:
+            self.output.emit(record)
+        else:
+            print(json.dumps(record.to_dict()), flush=True)
+    
     def start_listening(self) -> None:
         # Start the main listening loop
         self.is_listening = True
@@ -144,16 +405,201 @@ class SpeechTranscriber:
         else:
             print("Press Ctrl+C to stop transcription")
         
+        self._watch_ready()
+        # The watchdog only flags a stall: PortAudio is not thread-safe, so the device
+        # is reopened by this loop once the stalled read returns or fails
+        self._watchdog = CaptureWatchdog(self.stall_timeout, self._on_capture_stall, "listen")
+        self._watchdog.start()
         try:
             while self.is_listening:
-                recognized_text = self.listen_for_speech()
+                self.check_model()
+                if self._capture_stalled:
+                    self._capture_stalled = False
+                    self.mic_manager.reinitialize()
+                finals = self.listen_for_speech()
                 
-                if recognized_text:
-                    # Output all recognized text
-                    if self.debug:
+                if finals and self.debug:
+                    print()  # New line after audio bar
+                # Output all recognized text
+                for text, segment in finals:
+                    self.emit_transcript(text, segment)
+                
+        except KeyboardInterrupt:
+            print("\\nStopping transcription...")
+            self.is_listening = False
+        finally:
+            self._watchdog.stop()
+            self._watchdog = None
+    
+    def start_streaming(self, frame_ms: Optional[int] = None) -> None:
+        # Start the continuous capture loop
+        # A single callback stream stays open for the whole session so no audio is lost
+        # between frames; every frame goes to Vosk and its endpointing decides when
+        # an utterance is final
+        self.is_listening = True
+        if self.debug:
+            print("Press Ctrl+C to stop transcription (Debug mode - streaming capture)")
+        else:
+            print("Press Ctrl+C to stop transcription")
+        
+        stream = CaptureStream(self.mic_manager.device_index, frame_ms=frame_ms or self.profile.frame_ms,
+                               debug=self.debug)
+        watchdog = CaptureWatchdog(self.stall_timeout, self._on_capture_stall, "stream")
+        try:
+            with stream:
+                self._watch_ready()
+                watchdog.start()
+                while self.is_listening:
+                    self.check_model()
+                    if self._capture_stalled:
+                        # No frames for stall_timeout seconds: reopen the device
+                        self._capture_stalled = False
+                        stream.stop()
+                        stream.start()
+                    with metrics.time("capture"):
+                        frame = stream.read_pooled(timeout=1.0)
+                    if frame is None:
+                        continue
+                    watchdog.kick()
+                    
+                    # The pooled buffer goes back for reuse once VAD/resampling have
+                    # produced the (copied) PCM the recognizer needs
+                    try:
+                        if self.debug:
+                            with metrics.time("level"):
+                                audio_level = self.audio_processor.pcm_level(frame.samples)
+                            self.audio_processor.display_audio_level(audio_level, len(frame))
+                        
+                        finals = self._transcribe_raw(frame.view, stream.sample_rate)
+                    finally:
+                        frame.release()
+                    if finals and self.debug:
                         print()  # New line after audio bar
-                    print(f"[TRANSCRIBED]: {recognized_text}")
+                    for text, segment in finals:
+                        self.emit_transcript(text, segment)
                 
         except KeyboardInterrupt:
             print("\\nStopping transcription...")
-            self.is_listening = False
\ No newline at end of file
+            self.is_listening = False
+        finally:
+            watchdog.stop()
+            if self.debug and stream.ring is not None and stream.ring.overrun_bytes:
+                print(f"Capture ring buffer overran by {stream.ring.overrun_bytes} bytes")
+    
+    def _on_capture_stall(self) -> None:
+        # Watchdog thread: the capture loop has not seen audio for stall_timeout seconds
+        if self.debug:
+            print(f"\nNo audio for {self.stall_timeout:.0f}s - reopening the microphone")
+        self._capture_stalled = True
+    
+    def start_pipeline(self, queue_size: int = 50, policy: str = "block",
+                       frame_ms: Optional[int] = None) -> None:
+        # Run capture, VAD/resample and recognition as separate threaded stages
+        # joined by bounded queues; policy decides what happens when a queue is full
+        self.is_listening = True
+        if self.debug:
+            print(f"Pipeline mode: queue size {queue_size}, overflow policy '{policy}'")
+        print("Press Ctrl+C to stop transcription")
+        
+        pipeline = TranscriptionPipeline(self, queue_size, policy, frame_ms or self.profile.frame_ms)
+        try:
+            pipeline.start()
+            self._watch_ready()
+            pipeline.wait()
+        except KeyboardInterrupt:
+            print("\\nStopping transcription...")
+        finally:
+            self.is_listening = False
+            pipeline.stop()
+            if self.debug:
+                print(f"Dropped {pipeline.capture_queue.dropped + pipeline.speech_queue.dropped} chunks, "
+                      f"coalesced {pipeline.capture_queue.coalesced + pipeline.speech_queue.coalesced}")
+    
+    def events(self, frame_ms: Optional[int] = None,
+               words: bool = True) -> Generator[TranscriptEvent, None, None]:
+        # Live partial/final events from the microphone, for consumers such as captions
+        # that want to act on partial text before the utterance is final
+        engine = self.transcription_engine
+        event_stream = None
+        watchdog = CaptureWatchdog(self.stall_timeout, self._on_capture_stall, "events")
+        # Runs until the consumer clears is_listening or closes the generator
+        self.is_listening = True
+        try:
+            with CaptureStream(self.mic_manager.device_index, frame_ms=frame_ms or self.profile.frame_ms,
+                               debug=self.debug) as stream:
+                self._watch_ready()
+                watchdog.start()
+                while self.is_listening:
+                    self.check_model()
+                    if self._capture_stalled:
+                        self._capture_stalled = False
+                        stream.stop()
+                        stream.start()
+                    with metrics.time("capture"):
+                        frame = stream.read_pooled(timeout=1.0)
+                    if frame is None:
+                        continue
+                    watchdog.kick()
+                    self._captured_at = time.time()
+                    try:
+                        prepared = self.prepare_audio(frame.view, stream.sample_rate)
+                    finally:
+                        frame.release()
+                    for pcm, speech_ended in prepared:
+                        if event_stream is None:
+                            # Hold speech until the model is loaded, then catch up
+                            if not engine.ready.is_set():
+                                self._hold_until_ready(pcm, speech_ended)
+                                continue
+                            engine.wait_ready()
+                            event_stream = self._event_stream = EventStream(engine, words)
+                            while self._pending:
+                                yield from self._feed_events(event_stream, *self._pending.popleft())
+                            self._pending_bytes = 0
+                        yield from self._feed_events(event_stream, pcm, speech_ended)
+            # Capture stopped: the last utterance is final now
+            yield from self.finish_events()
+        finally:
+            watchdog.stop()
+            self.is_listening = False
+    
+    def finish_events(self) -> list[TranscriptEvent]:
+        # Finalize the utterance events() left in the recognizer; events() does this itself
+        # when capture stops, a consumer that closes it early calls this afterwards
+        event_stream, self._event_stream = self._event_stream, None
+        if event_stream is None:
+            return []
+        return self._feed_events(event_stream, b"", True)
+    
+    def _feed_events(self, event_stream: EventStream, pcm: bytes,
+                     speech_ended: bool) -> list[TranscriptEvent]:
+        # Decode a chunk into events; once an utterance is final its audio goes to the
+        # second pass and the archive, as in the other modes
+        events = event_stream.feed(pcm, speech_ended)
+        if self.rescorer is not None or self.archive is not None:
+            finals = [event for event in events if event.is_final]
+            final_text = " ".join(event.text for event in finals)
+            trailing = 0
+            if finals and finals[-1].words:
+                word_end = round(finals[-1].words[-1].end * 16000)
+                trailing = max(0, event_stream.samples - word_end) * 2
+            self._collect_segment(pcm, final_text or None, trailing)
+            if speech_ended and not final_text:
+                self._collect_segment(b"", None)
+        return events
+    
+    def start_events(self, frame_ms: Optional[int] = None) -> None:
+        # Emit every partial and final event (as JSON lines unless sinks say otherwise)
+        print("Press Ctrl+C to stop transcription", flush=True)
+        events = self.events(frame_ms)
+        try:
+            for event in events:
+                self.emit_event(event)
+        except KeyboardInterrupt:
+            print("\\nStopping transcription...")
+            self.is_listening = False
+        finally:
+            # Ctrl+C leaves the last utterance in the recognizer; emit it after capture stops
+            events.close()
+            for event in self.finish_events():
+                self.emit_event(event)
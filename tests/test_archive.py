@@ -0,0 +1,74 @@
+# Speech archive: bucketed chunk/index files, index queries and audio round-trips
+
+import pytest
+
+from lexy.bench.fakes import synthesize_fixture
+from lexy.transcription import archive
+from lexy.transcription.archive import ArchivedSpeech, SpeechArchive, load_audio, read_index
+
+RATE = 16000
+HOUR = 1700000000.0 - 1700000000.0 % 3600
+
+
+@pytest.fixture(scope="module")
+def utterances():
+    pcm, spans = synthesize_fixture(6.0, RATE, seed=6)
+    return [pcm[int(start * RATE) * 2:int(end * RATE) * 2] for start, end in spans]
+
+
+@pytest.fixture
+def xz_archive(tmp_path, monkeypatch):
+    # Without a flac binary the archive falls back to xz
+    monkeypatch.setattr(archive, "flac_converter", lambda: None)
+    speech_archive = SpeechArchive(str(tmp_path))
+    assert speech_archive.codec == "xz"
+    return speech_archive
+
+
+def test_submitted_speech_round_trips(xz_archive, utterances):
+    xz_archive.start()
+    for i, pcm in enumerate(utterances):
+        xz_archive.submit(pcm, f"utterance {i + 1}", stream="1:0")
+    xz_archive.submit(b"", "nothing")
+    xz_archive.stop()
+
+    entries = list(read_index(xz_archive.directory))
+    assert [entry.text for entry in entries] == [f"utterance {i + 1}" for i in range(len(utterances))]
+    assert all(entry.codec == "xz" and entry.stream == "1:0" for entry in entries)
+    assert [load_audio(xz_archive.directory, entry) for entry in entries] == utterances
+    assert entries[0].duration == pytest.approx(len(utterances[0]) / 2 / RATE, abs=0.001)
+
+
+def test_read_index_orders_buckets_and_filters_by_time(xz_archive, utterances):
+    xz_archive.start()
+    # Written out of order, across three hourly buckets
+    for offset in (7200.0, 10.0, 3600.0, 20.0):
+        xz_archive.write(ArchivedSpeech(utterances[0], f"at {offset:g}", "default", HOUR + offset))
+    xz_archive.stop()
+
+    assert [entry.text for entry in read_index(xz_archive.directory)] == ["at 10", "at 20", "at 3600", "at 7200"]
+    assert len({entry.chunk for entry in read_index(xz_archive.directory)}) == 3
+    window = read_index(xz_archive.directory, since=HOUR + 20, until=HOUR + 7200)
+    assert [entry.text for entry in window] == ["at 20", "at 3600"]
+
+
+def test_truncated_index_line_is_skipped(xz_archive, utterances, tmp_path):
+    xz_archive.start()
+    entry = xz_archive.write(ArchivedSpeech(utterances[0], "kept", "default", HOUR))
+    xz_archive.stop()
+    index = tmp_path / entry.chunk.replace(".chunk", ".jsonl")
+    with open(index, "a", encoding="utf-8") as handle:
+        handle.write('{"chunk": "cut short')
+
+    entries = list(read_index(str(tmp_path)))
+    assert [entry.text for entry in entries] == ["kept"]
+    assert load_audio(str(tmp_path), entries[0]) == utterances[0]
+
+
+@pytest.mark.skipif(archive.flac_converter() is None, reason="needs the flac binary")
+def test_flac_round_trip(tmp_path, utterances):
+    speech_archive = SpeechArchive(str(tmp_path)).start()
+    assert speech_archive.codec == "flac"
+    entry = speech_archive.write(ArchivedSpeech(utterances[0], "flac", "default", HOUR))
+    speech_archive.stop()
+    assert load_audio(str(tmp_path), entry) == utterances[0]
@@ -0,0 +1,109 @@
+# Transcript cache: key stability, hits and misses, and least-recently-used eviction
+
+import itertools
+import wave
+from types import SimpleNamespace
+
+import pytest
+
+from lexy.bench.fakes import synthesize_fixture
+from lexy.transcription import cache as cache_module
+from lexy.transcription.batch import FileResult
+from lexy.transcription.cache import TranscriptCache, transcribe_cached
+
+RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def pcm():
+    return synthesize_fixture(3.0, RATE, seed=7)[0]
+
+
+def write_wav(path, pcm):
+    with wave.open(str(path), "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(RATE)
+        out.writeframes(pcm)
+    return str(path)
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = tmp_path / "model"
+    (model / "am").mkdir(parents=True)
+    (model / "am" / "final.mdl").write_bytes(b"acoustic model")
+    (model / "conf").mkdir()
+    (model / "conf" / "model.conf").write_text("--sample-frequency=16000\n")
+    return model
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache" / "transcripts.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_key_follows_the_audio_not_the_file(cache, model, pcm, tmp_path):
+    first = write_wav(tmp_path / "a.wav", pcm)
+    key = cache.key(first, str(model), chunk_size=4000)
+    assert cache.key(first, str(model), chunk_size=4000) == key
+    # The same PCM under another name, or raw, is the same recording
+    assert cache.key(write_wav(tmp_path / "b.wav", pcm), str(model), chunk_size=4000) == key
+    raw = tmp_path / "a.raw"
+    raw.write_bytes(pcm)
+    assert cache.key(str(raw), str(model), chunk_size=4000) == key
+
+    assert cache.key(write_wav(tmp_path / "c.wav", pcm[:-2]), str(model), chunk_size=4000) != key
+    assert cache.key(first, str(model), chunk_size=8000) != key
+    grammar = tmp_path / "grammar.txt"
+    grammar.write_text("yes\nno\n")
+    assert cache.key(first, str(model), str(grammar), chunk_size=4000) != key
+
+
+def test_key_changes_when_a_model_file_changes(cache, model, pcm, tmp_path):
+    path = write_wav(tmp_path / "a.wav", pcm)
+    key = cache.key(path, str(model))
+    (model / "am" / "final.mdl").write_bytes(b"retrained acoustic model")
+    # Fingerprints are kept for the life of the cache, so a new run sees the change
+    reopened = TranscriptCache(cache.path)
+    try:
+        assert reopened.key(path, str(model)) != key
+    finally:
+        reopened.close()
+
+
+def test_hits_skip_the_transcriber(cache, model, pcm, tmp_path):
+    paths = [write_wav(tmp_path / f"{name}.wav", pcm[:len(pcm) // (i + 1) // 2 * 2])
+             for i, name in enumerate("abc")]
+    decoded = []
+
+    def transcribe(misses):
+        decoded.append(list(misses))
+        for path in misses:
+            yield FileResult(path, [f"text of {path}"], audio_seconds=1.0)
+
+    first = list(transcribe_cached(paths, cache, transcribe, str(model)))
+    assert decoded == [paths] and not any(result.cached for result in first)
+
+    missing = str(tmp_path / "missing.wav")
+    second = list(transcribe_cached(paths[:2] + [missing] + paths[2:], cache, transcribe, str(model)))
+    assert decoded[1:] == [[missing]]
+    assert [result.path for result in second] == paths[:2] + [missing] + paths[2:]
+    assert [result.cached for result in second] == [True, True, False, True]
+    assert [result.text for result in second if result.cached] == [f"text of {path}" for path in paths]
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    clock = itertools.count(1000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: next(clock)))
+    result = FileResult("x.wav", ["word " * 20])
+    cache.put("a", result)
+    cache.put("b", result)
+    cache.max_bytes = cache.size_bytes  # Room for two
+    assert cache.get("a", "x.wav") is not None
+    cache.put("c", result)
+    assert cache.get("b", "x.wav") is None
+    assert cache.get("a", "x.wav") is not None and cache.get("c", "x.wav") is not None
+    assert cache.size_bytes <= cache.max_bytes
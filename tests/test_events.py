@@ -0,0 +1,86 @@
+# events() as a public generator, driven by a fake capture stream and stub recognizer
+
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from lexy.bench.fakes import FakeMicrophone, FakeMicrophoneManager, StubEngine, synthesize_fixture
+from lexy.transcription import speech
+
+RATE = 16000
+FRAME_BYTES = RATE // 10 * 2
+
+
+class FakeFrame:
+    def __init__(self, data):
+        self.view = memoryview(data)
+
+    def release(self):
+        pass
+
+
+class FakeStream:
+    # Serves a recording in 100ms frames, then nothing (like a quiet microphone)
+    pcm = b""
+
+    def __init__(self, *args, **kwargs):
+        self.sample_rate = RATE
+        self.position = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def read_pooled(self, timeout=None):
+        if self.position >= len(self.pcm):
+            return None
+        frame = FakeFrame(self.pcm[self.position:self.position + FRAME_BYTES])
+        self.position += FRAME_BYTES
+        return frame
+
+
+@pytest.fixture
+def transcriber(monkeypatch):
+    pcm, spans = synthesize_fixture(10.0, RATE, seed=4)
+    FakeStream.pcm = pcm
+    monkeypatch.setattr(speech, "CaptureStream", FakeStream)
+    transcriber = speech.SpeechTranscriber(
+        mic_manager=FakeMicrophoneManager(FakeMicrophone(pcm, RATE, 0.0)),
+        transcription_engine=StubEngine()
+    )
+    return transcriber, len(spans)
+
+
+def test_events_runs_without_start_events(transcriber):
+    transcriber, expected = transcriber
+    finals = []
+    for event in transcriber.events():
+        assert transcriber.is_listening
+        if event.is_final:
+            finals.append(event)
+            if len(finals) == expected:
+                # The consumer stops capture by clearing the flag
+                transcriber.is_listening = False
+    assert [event.text for event in finals] == [
+        f"utterance {i}" for i in range(1, expected + 1)]
+    assert not transcriber.is_listening
+
+
+def test_closing_early_leaves_the_utterance_for_finish_events(transcriber):
+    transcriber, _ = transcriber
+    events = transcriber.events()
+    for event in events:
+        if not event.is_final:
+            break
+    events.close()
+    assert not transcriber.is_listening
+    finals = transcriber.finish_events()
+    assert [event.text for event in finals] == ["utterance 1"]
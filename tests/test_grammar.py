@@ -0,0 +1,79 @@
+# Grammar files: loading, live reload at utterance boundaries and out-of-grammar stripping
+
+import os
+
+import pytest
+
+from lexy.bench.fakes import StubEngine, synthesize_fixture
+from lexy.transcription.grammar import UNKNOWN, GrammarFile, load_grammar, strip_unknown
+
+RATE = 16000
+CHUNK_BYTES = RATE // 10 * 2
+
+
+@pytest.fixture
+def grammar_path(tmp_path):
+    path = tmp_path / "grammar.txt"
+    path.write_text("# lights\nTurn on the lights\n\nturn off the lights\n", encoding="utf-8")
+    return path
+
+
+def rewrite(path, text):
+    path.write_text(text, encoding="utf-8")
+    # Make sure the edit is visible even on filesystems with coarse timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_load_grammar_text_and_json(grammar_path, tmp_path):
+    assert load_grammar(str(grammar_path)) == ["turn on the lights", "turn off the lights", UNKNOWN]
+    json_path = tmp_path / "grammar.json"
+    json_path.write_text('["Yes", "no", "[unk]"]', encoding="utf-8")
+    assert load_grammar(str(json_path)) == ["yes", "no", UNKNOWN]
+
+
+def test_strip_unknown():
+    assert strip_unknown("turn on [unk] the lights [unk]") == "turn on the lights"
+    engine = StubEngine()
+    assert engine.clean_text(" Hello [unk] ") == "hello [unk]"
+    engine.grammar = ["hello", UNKNOWN]
+    assert engine.clean_text(" Hello [unk] ") == "hello"
+
+
+def test_poll_picks_up_edits_and_keeps_invalid_ones_out(grammar_path):
+    grammar = GrammarFile(str(grammar_path), interval=0.0)
+    assert grammar.poll() is None
+    rewrite(grammar_path, "yes\nno\n")
+    assert grammar.poll() == ["yes", "no", UNKNOWN]
+    rewrite(grammar_path, "# nothing here\n")
+    assert grammar.poll() is None
+    assert grammar.phrases == ["yes", "no", UNKNOWN]
+
+
+def test_edit_mid_utterance_waits_for_the_boundary(grammar_path):
+    pcm, spans = synthesize_fixture(8.0, RATE, seed=3)
+    engine = StubEngine()
+    engine.grammar_file = GrammarFile(str(grammar_path), interval=0.0)
+    engine.grammar = engine.grammar_file.phrases
+    chunks = [pcm[i:i + CHUNK_BYTES] for i in range(0, len(pcm), CHUNK_BYTES)]
+
+    finals = []
+    edited = False
+    for chunk in chunks:
+        final, partial = engine.transcribe_audio(chunk)
+        if partial and not edited:
+            # The stub recognizer has no SetGrammar, so a swap now would replace it
+            rewrite(grammar_path, "yes\nno\n")
+            edited = True
+        elif edited and not finals:
+            assert engine.grammar == ["turn on the lights", "turn off the lights", UNKNOWN]
+        if final:
+            finals.append(final)
+    final = engine.flush()
+    if final:
+        finals.append(final)
+
+    # Every utterance survived the edit (the swap starts a fresh stub recognizer, so
+    # its numbering restarts) and the new grammar is in place
+    assert finals == ["utterance 1"] * len(spans)
+    assert engine.grammar == ["yes", "no", UNKNOWN]
@@ -0,0 +1,93 @@
+# Output sinks: record formats, the writer thread, rotation and socket delivery
+
+import io
+import json
+import os
+import socket
+
+import pytest
+
+from lexy.transcription.output import (FileSink, RotatingFileSink, SinkWriter, StdoutSink, TranscriptRecord,
+                                       UnixSocketSink, open_sink)
+
+
+def records(count, **fields):
+    return [TranscriptRecord(f"line {i}", timestamp=1700000000.0 + i, **fields) for i in range(count)]
+
+
+def test_record_formats():
+    record = TranscriptRecord("hello there", stream="2:1", segment=4, latency=0.25, timestamp=1700000000.0,
+                              extra={"words": []})
+    assert record.to_text() == "[TRANSCRIBED 2:1 #4]: hello there"
+    assert TranscriptRecord("fixed", "correction", segment=3).to_text() == "[CORRECTED #3]: fixed"
+    assert record.to_dict() == {"type": "final", "stream": "2:1", "text": "hello there",
+                                "timestamp": 1700000000.0, "latency_ms": 250.0, "segment": 4, "words": []}
+    assert record.to_log().endswith(" 2:1 final 250ms: hello there")
+
+
+def test_writer_delivers_every_record_in_order(tmp_path):
+    path = tmp_path / "out.jsonl"
+    stdout = io.StringIO()
+    writer = SinkWriter([FileSink(str(path)), StdoutSink("text", stdout)], batch_size=8).start()
+    for record in records(50):
+        writer.emit(record)
+    writer.close()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["text"] for line in lines] == [f"line {i}" for i in range(50)]
+    assert stdout.getvalue().splitlines() == [f"[TRANSCRIBED]: line {i}" for i in range(50)]
+
+
+def test_failing_sink_does_not_stop_the_others(tmp_path):
+    class BrokenSink(StdoutSink):
+        def write(self, lines):
+            raise OSError("disk full")
+
+    stdout = io.StringIO()
+    writer = SinkWriter([BrokenSink("text", io.StringIO()), StdoutSink("text", stdout)]).start()
+    for record in records(3):
+        writer.emit(record)
+    writer.close()
+    assert len(stdout.getvalue().splitlines()) == 3
+
+
+def test_rotating_sink_keeps_the_configured_backups(tmp_path):
+    path = str(tmp_path / "lexy.log")
+    sink = RotatingFileSink(path, max_bytes=200, backups=2)
+    for record in records(40):
+        sink.write([sink.format(record)])
+    sink.close()
+    assert os.path.exists(path)
+    assert os.path.exists(path + ".1") and os.path.exists(path + ".2")
+    assert not os.path.exists(path + ".3")
+    assert os.path.getsize(path + ".1") >= 200
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_unix_sink_drops_without_a_reader_then_delivers(tmp_path):
+    path = str(tmp_path / "lexy.sock")
+    sink = UnixSocketSink(path, retry_seconds=0.0)
+    sink.write(["dropped"])
+    assert sink.dropped == 1
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with server:
+        server.bind(path)
+        server.listen(1)
+        sink.write(["one", "two"])
+        connection, _ = server.accept()
+        with connection, connection.makefile("r", encoding="utf-8") as reader:
+            sink.close()
+            assert reader.read().splitlines() == ["one", "two"]
+    assert sink.dropped == 1
+
+
+def test_open_sink_specs(tmp_path):
+    assert isinstance(open_sink("stdout"), StdoutSink)
+    sink = open_sink(f"jsonl:{tmp_path / 'out.jsonl'}")
+    assert type(sink) is FileSink
+    sink.close()
+    sink = open_sink(f"log:{tmp_path / 'out.log'}")
+    assert isinstance(sink, RotatingFileSink)
+    sink.close()
+    with pytest.raises(ValueError):
+        open_sink("jsonl")
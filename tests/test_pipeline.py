@@ -0,0 +1,95 @@
+# Bounded queues between pipeline stages: overflow policies and utterance ends
+
+import pytest
+
+from lexy.transcription.pipeline import BoundedQueue, Chunk, TranscriptionPipeline, carry_endpoint, merge_chunks
+
+
+class FailingTranscriber:
+    # Just what the pipeline stages call; preparing audio always fails
+    debug = False
+    stall_timeout = 0.0
+
+    def __init__(self):
+        self.decoded = []
+
+    def emit_transcript(self, text, segment=None):
+        pass
+
+    def check_model(self):
+        pass
+
+    def prepare_audio(self, pcm, sample_rate):
+        raise RuntimeError("resampler broke")
+
+    def decode_audio(self, pcm, speech_ended=False, captured_at=None):
+        self.decoded.append(pcm)
+        return []
+
+
+def chunk(pcm, speech_ended=False):
+    return Chunk(pcm, 16000, speech_ended)
+
+
+def drain(queue):
+    items = []
+    while len(queue):
+        items.append(queue.get(timeout=0))
+    return items
+
+
+def test_coalesce_merges_into_the_newest_chunk():
+    queue = BoundedQueue("test", 2, "coalesce", merge=merge_chunks)
+    for pcm in (b"a", b"b", b"c", b"d"):
+        assert queue.put(chunk(pcm))
+    assert [item.pcm for item in drain(queue)] == [b"a", b"bcd"]
+    assert queue.coalesced == 2
+
+
+def test_coalesce_never_joins_across_an_utterance_end():
+    queue = BoundedQueue("test", 3, "coalesce", merge=merge_chunks)
+    queue.put(chunk(b"a"))
+    queue.put(chunk(b"b"))
+    queue.put(chunk(b"c", speech_ended=True))
+    queue.put(chunk(b"d"))
+    items = drain(queue)
+    assert [(item.pcm, item.speech_ended) for item in items] == [(b"a", False), (b"bc", True), (b"d", False)]
+
+
+def test_drop_oldest_keeps_the_utterance_end():
+    queue = BoundedQueue("test", 2, "drop-oldest", on_drop=carry_endpoint)
+    queue.put(chunk(b"a", speech_ended=True))
+    queue.put(chunk(b"b"))
+    queue.put(chunk(b"c"))
+    items = drain(queue)
+    assert [item.pcm for item in items] == [b"b", b"c"]
+    assert items[0].flush_first and not items[0].speech_ended
+    assert not items[1].flush_first
+    assert queue.dropped == 1
+
+
+def test_chunk_after_a_dropped_end_is_not_merged_into_the_previous_utterance():
+    queue = BoundedQueue("test", 2, "coalesce", merge=merge_chunks)
+    first = chunk(b"a")
+    second = chunk(b"b")
+    second.flush_first = True
+    queue.put(first)
+    queue.put(second)
+    queue.put(chunk(b"c"))
+    assert [(item.pcm, item.flush_first) for item in drain(queue)] == [(b"a", False), (b"bc", True)]
+
+
+def test_failed_stage_closes_its_queue_and_wait_raises():
+    transcriber = FailingTranscriber()
+    pipeline = TranscriptionPipeline(transcriber, queue_size=1)
+    pipeline.capture_queue.put(chunk(b"a"))
+    pipeline._start_stage("prepare", pipeline._prepare, pipeline.capture_queue, pipeline.speech_queue)
+    pipeline._start_stage("recognize", pipeline._recognize, pipeline.speech_queue, None)
+    for thread in pipeline._threads:
+        thread.join(5.0)
+        assert not thread.is_alive()
+    # Recognition drained the closed queue and flushed; capture can no longer block
+    assert transcriber.decoded == [b""]
+    assert not pipeline.capture_queue.put(chunk(b"b"))
+    with pytest.raises(RuntimeError, match="resampler broke"):
+        pipeline.wait()
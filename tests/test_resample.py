@@ -0,0 +1,61 @@
+# Streaming resampler: chunk boundaries must not change the output
+
+import numpy as np
+import pytest
+
+from lexy.audio.resample import StreamingResampler
+from lexy.bench.fakes import synthesize_fixture
+
+SECONDS = 3.0
+
+
+def speech_at(rate):
+    pcm, _ = synthesize_fixture(SECONDS, rate, seed=5)
+    return pcm
+
+
+def resample_in_chunks(resampler, pcm, chunk_bytes):
+    view = memoryview(pcm)
+    parts = [resampler.process(view[i:i + chunk_bytes]) for i in range(0, len(pcm), chunk_bytes)]
+    return b"".join(parts) + resampler.flush()
+
+
+@pytest.mark.parametrize("rate", [48000, 44100, 22050, 8000])
+def test_chunked_output_equals_one_shot(rate):
+    pcm = speech_at(rate)
+    one_shot = resample_in_chunks(StreamingResampler(rate), pcm, len(pcm))
+    # 10ms frames and a size that splits the rate ratio unevenly
+    for chunk_bytes in (rate // 100 * 2, 2 * 1237):
+        assert resample_in_chunks(StreamingResampler(rate), pcm, chunk_bytes) == one_shot
+
+
+@pytest.mark.parametrize("rate", [48000, 44100])
+def test_single_sample_chunks(rate):
+    # One output at a time takes a different BLAS path, so allow rounding by one LSB
+    pcm = speech_at(rate)
+    one_shot = np.frombuffer(resample_in_chunks(StreamingResampler(rate), pcm, len(pcm)), np.int16)
+    chunked = np.frombuffer(resample_in_chunks(StreamingResampler(rate), pcm, 2), np.int16)
+    assert len(chunked) == len(one_shot)
+    assert np.abs(chunked.astype(np.int32) - one_shot).max() <= 1
+
+
+@pytest.mark.parametrize("rate", [48000, 44100])
+def test_output_length_follows_the_rate_ratio(rate):
+    pcm = speech_at(rate)
+    output = resample_in_chunks(StreamingResampler(rate), pcm, rate // 10 * 2)
+    assert len(output) // 2 == -(-len(pcm) // 2 * 16000 // rate)
+
+
+def test_reset_starts_a_new_signal():
+    pcm = speech_at(48000)
+    resampler = StreamingResampler(48000)
+    first = resample_in_chunks(resampler, pcm, 4800)
+    resampler.reset()
+    assert resample_in_chunks(resampler, pcm, 4800) == first
+
+
+def test_same_rate_passes_through():
+    pcm = speech_at(16000)
+    resampler = StreamingResampler(16000)
+    assert resample_in_chunks(resampler, pcm, 3200) == pcm
+    assert np.array_equal(resampler.process_array(np.arange(4, dtype=np.float32)), np.arange(4))
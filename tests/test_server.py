@@ -0,0 +1,73 @@
+# Ingest server with stub recognizers: admission, rejection at capacity and stats
+
+import json
+import socket
+
+import pytest
+
+from lexy.bench.fakes import StubEngine, synthesize_fixture
+from lexy.transcription.server import RecognizerPool, TranscriptionServer
+
+RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def pcm():
+    return synthesize_fixture(8.0, RATE, seed=2)[0]
+
+
+@pytest.fixture
+def server():
+    server = TranscriptionServer(RecognizerPool(1, StubEngine), ("127.0.0.1", 0),
+                                 admission_timeout=0, max_waiting=0, idle_timeout=5.0).start()
+    yield server
+    server.stop()
+
+
+def connect(server):
+    sock = socket.create_connection(server.address, timeout=5.0)
+    return sock, sock.makefile("r", encoding="utf-8")
+
+
+def stream(server, pcm):
+    # Send a whole recording, half-close, and collect every reply
+    sock, replies = connect(server)
+    with sock, replies:
+        sock.sendall(pcm)
+        sock.shutdown(socket.SHUT_WR)
+        return [json.loads(line) for line in replies]
+
+
+def test_admitted_client_gets_events_then_stats(server, pcm):
+    messages = stream(server, pcm)
+    assert messages[0] == {"type": "ready", "sample_rate": RATE}
+    assert messages[-1]["type"] == "stats"
+    events = messages[1:-1]
+    assert any(event["type"] == "final" for event in events)
+    assert all(event["type"] in ("partial", "final") for event in events)
+
+
+def test_stats_line_counts_the_connection(server, pcm):
+    messages = stream(server, pcm)
+    stats = messages[-1]
+    assert stats["bytes_received"] == len(pcm)
+    assert stats["audio_seconds"] == pytest.approx(len(pcm) / 2 / RATE, abs=0.001)
+    assert stats["finals"] == sum(message["type"] == "final" for message in messages)
+    assert stats["partials"] == sum(message["type"] == "partial" for message in messages)
+    # The recognizer went back to the pool for the next client
+    assert server.pool.idle == 1
+
+
+def test_client_is_turned_away_at_capacity(server, pcm):
+    holder, holder_replies = connect(server)
+    with holder, holder_replies:
+        assert json.loads(holder_replies.readline())["type"] == "ready"
+        # This client streams before reading; it still gets the error and a clean close
+        sock, replies = connect(server)
+        with sock, replies:
+            sock.sendall(pcm[:RATE * 2])
+            assert json.loads(replies.readline()) == {"type": "error", "error": "server busy"}
+            sock.shutdown(socket.SHUT_WR)
+            assert replies.readline() == ""
+        holder.shutdown(socket.SHUT_WR)
+        assert json.loads(holder_replies.readlines()[-1])["type"] == "stats"
@@ -0,0 +1,85 @@
+# Voice activity detector on synthetic speech-like bursts in room noise
+
+import numpy as np
+import pytest
+
+from lexy.audio.vad import VADConfig, VoiceActivityDetector
+from lexy.bench.fakes import synthesize_fixture
+
+RATE = 16000
+BYTES_PER_SECOND = RATE * 2
+
+
+@pytest.fixture(scope="module")
+def fixture():
+    return synthesize_fixture(30.0, RATE, seed=1)
+
+
+def feed(vad, pcm, chunk_seconds):
+    step = int(chunk_seconds * BYTES_PER_SECOND)
+    return [vad.process(pcm[i:i + step]) for i in range(0, len(pcm), step)]
+
+
+def test_silence_is_dropped():
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0.0, 40.0, RATE * 5).astype(np.int16).tobytes()
+    results = feed(VoiceActivityDetector(RATE), noise, 0.1)
+    assert sum(len(result.audio) for result in results) == 0
+    assert not any(result.speech_ended for result in results)
+
+
+def test_one_end_per_utterance(fixture):
+    pcm, spans = fixture
+    results = feed(VoiceActivityDetector(RATE), pcm, 0.1)
+    assert sum(len(result.end_offsets) for result in results) == len(spans)
+    # Speech plus hangover and padding is sent, the gaps between utterances are not
+    sent = sum(len(result.audio) for result in results) / BYTES_PER_SECOND
+    speech = sum(end - start for start, end in spans)
+    assert speech < sent < speech + len(spans) * 0.6
+
+
+def test_ends_follow_speech_by_the_hangover(fixture):
+    pcm, spans = fixture
+    vad = VoiceActivityDetector(RATE, VADConfig(hangover_ms=300))
+    step = int(0.1 * BYTES_PER_SECOND)
+    ends = []
+    for i in range(0, len(pcm), step):
+        if vad.process(pcm[i:i + step]).speech_ended:
+            ends.append((i + step) / BYTES_PER_SECOND)
+    for (_, span_end), ended in zip(spans, ends):
+        assert span_end + 0.2 <= ended <= span_end + 0.5
+
+
+def test_chunk_is_split_where_an_utterance_ends(fixture):
+    # One long chunk (like a listen() phrase) holding the end of one utterance and
+    # the start of the next must not put the next utterance's onset before the end
+    pcm, spans = fixture
+    config = VADConfig(hangover_ms=300, padding_ms=200)
+    vad = VoiceActivityDetector(RATE, config)
+    (_, first_end), (second_start, _) = spans[0], spans[1]
+    split_at = int((first_end - 0.2) * RATE) * 2
+    chunk_end = int((second_start + 0.3) * RATE) * 2
+    vad.process(pcm[:split_at])
+    result = vad.process(pcm[split_at:chunk_end])
+
+    assert result.speech_ended
+    pieces = result.pieces()
+    assert [ended for _, ended in pieces] == [True, False]
+    before, after = (len(piece) / BYTES_PER_SECOND for piece, _ in pieces)
+    frame = config.frame_ms / 1000
+    # The tail of the first utterance plus its hangover, then the next onset's padding
+    assert before == pytest.approx(0.2 + 0.3, abs=3 * frame)
+    assert after == pytest.approx(0.2 + 0.3, abs=3 * frame)
+    assert b"".join(piece for piece, _ in pieces) == result.audio
+
+
+def test_end_on_a_chunk_boundary_is_an_empty_final_piece():
+    vad = VoiceActivityDetector(RATE, VADConfig(hangover_ms=100, padding_ms=0))
+    rng = np.random.default_rng(0)
+    t = np.arange(RATE) / RATE
+    tone = (4000 * np.sin(2 * np.pi * 150 * t) + rng.normal(0, 40, RATE)).astype(np.int16)
+    noise = rng.normal(0, 40, RATE).astype(np.int16)
+    vad.process(noise.tobytes())
+    vad.process(tone.tobytes() + noise[:int(0.1 * RATE)].tobytes())
+    result = vad.process(noise[:int(0.1 * RATE)].tobytes())
+    assert result.pieces() == [(b"", True)]